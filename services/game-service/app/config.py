@@ -50,6 +50,32 @@ class Settings(BaseSettings):
 
     # Game engine settings (не настраиваемые пользователями)
     GAME_UPDATE_FPS: float = 30.0
+    # Частота тиков игр в статусе PENDING/PAUSED и игр без подключённых игроков
+    GAME_IDLE_UPDATE_FPS: float = 2.0
+    # Фиксированный шаг симуляции 1/GAME_UPDATE_FPS с накопителем времени
+    GAME_FIXED_TIMESTEP: bool = True
+    # Тики без изменений не публикуются; раз в интервал отправляется heartbeat со счётчиком тиков
+    GAME_HEARTBEAT_INTERVAL: float = 1.0  # секунды
+    # Раз в столько тиков публикуется game.keyframe.* - снимок состояния для resync клиентов (0 = выключено)
+    GAME_KEYFRAME_INTERVAL: int = 150
+    # Формат публикации game.update.*: json или msgpack (хэндлы сущностей вместо uuid, float32)
+    GAME_UPDATE_FORMAT: str = "json"
+    # Кодировка карты в обновлениях и keyframe: list, rle, base64 или zlib (см. Map.get_map)
+    GAME_MAP_ENCODING: str = "base64"
+    # Доля тиков, замеряемых профилировщиком для /metrics (0 = выключен, 1 = каждый тик)
+    GAME_PROFILER_SAMPLE_RATE: float = 0.05
+    # Каталог файлов повторов игр (пусто = повторы не пишутся) и интервал контрольных сумм состояния в тиках
+    GAME_REPLAY_DIR: str = ""
+    GAME_REPLAY_CHECKSUM_INTERVAL: int = 300
+    GAME_MAX_CATCH_UP_STEPS: int = 5  # максимум шагов догонки за одну итерацию цикла
+    # Размер кольцевого буфера ввода игрока между тиками (при переполнении вытесняются старые записи)
+    GAME_INPUT_BUFFER_SIZE: int = 32
+    # Максимум свободных объектов оружия и усилений в пуле игры на тип (0 = без пула)
+    GAME_ENTITY_POOL_SIZE: int = 64
+    # Число процессов-воркеров с игровыми циклами (0 = игры обновляются в процессе сервиса)
+    GAME_WORKERS: int = 0
+    GAME_WORKER_CALL_TIMEOUT: float = 5.0  # секунды ожидания ответа воркера на команду
+    GAME_WORKER_RESTART_DELAY: float = 1.0  # секунды до перезапуска завершившегося воркера
     GAME_OVER_TIMEOUT: float = 5.0  # секунды
 
     AI_ACTION_INTERVAL: float = 0.33  # минимальный интервал в секундах между командами AI (3 команды/сек)
@@ -1,17 +1,23 @@
 import asyncio
+import heapq
 import logging
 import time
 import uuid
 
+from .game_worker_pool import GameWorkerPool
 from ..config import settings
-from ..models.game_models import GameCreateSettings, GameSettings
+from ..models.game_models import GAME_HEARTBEAT_FIELDS, GameCreateSettings, GameSettings
 from ..services.game_service import GameService
 from ..services.ai_inference_service import AIInferenceService
 from ..services.event_service import EventService, NatsEvents
 from ..services.map_service import MapService
+from ..services.tick_profiler import TickSample, tick_profiler
+from ..services.update_codec import UPDATE_FORMAT_JSON, UPDATE_FORMAT_MSGPACK, pack_game_update
+from ..services.replay_log import ReplayRecorder
 
 from ..repositories.map_repository import MapRepository
 from ..entities.game_mode import GameModeType
+from ..entities.map import MAP_ENCODING_LIST
 from ..entities.weapon import WeaponAction
 
 logger = logging.getLogger(__name__)
@@ -22,62 +28,229 @@ class GameCoordinator:
         notification_service: EventService,
         map_repository: MapRepository,
         ai_inference_service: AIInferenceService,
+        workers: int = 0,
     ) -> None:
         self.notification_service: EventService = notification_service
         self.map_repository: MapRepository = map_repository
         self.ai_inference_service = ai_inference_service
         self.games: dict[str, GameService] = {}
+        # Планировщик тиков: куча (дедлайн, порядковый номер, game_id), у каждой игры свой дедлайн
+        self._tick_schedule: list[tuple[float, int, str]] = []
+        self._tick_sequence: int = 0
+        # game_id -> актуальный дедлайн; записи кучи с другим дедлайном устарели
+        self._game_deadlines: dict[str, float] = {}
+        self._phase_counter: int = 0
+        self._schedule_changed: asyncio.Event = asyncio.Event()
+        # game_id -> время последней публикации обновления (для heartbeat вместо пустых тиков)
+        self._last_publish_times: dict[str, float] = {}
+        # При workers > 0 игры живут в процессах-воркерах, а координатор только маршрутизирует события
+        self.worker_pool: GameWorkerPool | None = (
+            GameWorkerPool(workers=workers, notification_service=notification_service) if workers > 0 else None
+        )
 
 
     async def initialize_handlers(self) -> None:
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_CREATE, callback=self.game_create)
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_JOIN, callback=self.game_join)
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_INPUT, callback=self.game_input)
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_PLACE_WEAPON, callback=self.game_place_weapon)
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_GET_STATE, callback=self.game_get_state)
-        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_DISCONNECT, callback=self.game_player_disconnect)
+        handlers = self if self.worker_pool is None else self.worker_pool
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_CREATE, callback=handlers.game_create)
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_JOIN, callback=handlers.game_join)
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_INPUT, callback=handlers.game_input)
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_PLACE_WEAPON, callback=handlers.game_place_weapon)
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_GET_STATE, callback=handlers.game_get_state)
+        await self.notification_service.subscribe_handler(event=NatsEvents.GAME_DISCONNECT, callback=handlers.game_player_disconnect)
+
+    def stop_workers(self) -> None:
+        """Остановить процессы-воркеры игр (если включены)"""
+        if self.worker_pool is not None:
+            self.worker_pool.stop()
 
     async def start_game_loop(self) -> None:
         """Запуск игрового цикла"""
-        logger.info("Starting game loop")
+        if self.worker_pool is not None:
+            # Игровые циклы работают в воркерах, здесь только публикуем их события
+            logger.info(f"Starting game loop in {self.worker_pool.workers} worker processes")
+            self.worker_pool.start()
+            await self.worker_pool.run()
+            return
 
-        fps = settings.GAME_UPDATE_FPS
-        interval = 1 / fps
-        # Max time for one iteration (update all games + sleep); on timeout loop continues
-        iteration_timeout_sec: float = 60.0
+        logger.info("Starting game loop")
+        # Max time for one game tick; on timeout loop continues
+        tick_timeout_sec: float = 60.0
 
         while True:
             try:
-                async def _one_iteration() -> None:
-                    active_games = 0
-                    start_time = time.time()
-
-                    for game_id, game in list(self.games.items()):
-                        if game.game_mode.is_alive() and game.is_active():
-                            active_games += 1
-                            updated_state = await game.update(delta_seconds=None)
-                            await self.notification_service.send_game_update(data=updated_state.model_dump(mode="json"))
-                        elif game.is_active() and not game.game_mode.is_game_over():
-                            logger.info(f"Game {game_id} is over or has no players, sending game over notification")
-                            await self.notification_service.send_game_over(game_id=game_id)
-                            del self.games[game_id]
-
-                    if active_games > 0:
-                        logger.debug(f"Game loop update: {active_games} active games")
-
-                    time_difference = interval - (time.time() - start_time)
-                    sleep_duration = max(0, time_difference)
-                    await asyncio.sleep(sleep_duration)
-
-                await asyncio.wait_for(_one_iteration(), timeout=iteration_timeout_sec)
+                if not self._tick_schedule:
+                    self._schedule_changed.clear()
+                    await self._schedule_changed.wait()
+                    continue
+
+                deadline, _, game_id = self._tick_schedule[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    # Спим до ближайшего дедлайна или до появления новой игры
+                    self._schedule_changed.clear()
+                    try:
+                        await asyncio.wait_for(self._schedule_changed.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(self._tick_schedule)
+                if self._game_deadlines.get(game_id) != deadline:
+                    continue
+                game = self.games.get(game_id)
+                if game is None:
+                    self._game_deadlines.pop(game_id, None)
+                    self._last_publish_times.pop(game_id, None)
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._tick_game(game_id=game_id, game=game), timeout=tick_timeout_sec)
+                except asyncio.TimeoutError:
+                    logger.error(f"Game {game_id} tick timed out after {tick_timeout_sec}s")
+
+                if game_id in self.games:
+                    interval = self._get_tick_interval(game)
+                    next_deadline = deadline + interval
+                    now = time.monotonic()
+                    if next_deadline < now:
+                        # Игра отстала: пропускаем тики, сохраняя её фазу внутри интервала
+                        tick_profiler.tick_late(game_id=game_id)
+                        next_deadline = now + interval - (now - deadline) % interval
+                    self._push_tick(game_id=game_id, deadline=next_deadline)
+                else:
+                    self._game_deadlines.pop(game_id, None)
+                    self._last_publish_times.pop(game_id, None)
             except asyncio.CancelledError:
                 logger.info("Game loop task was cancelled")
                 raise
-            except asyncio.TimeoutError:
-                logger.error(f"Game loop iteration timed out after {iteration_timeout_sec}s")
             except Exception as e:
                 logger.error(f"Error in game loop: {e}", exc_info=True)
 
+    async def _tick_game(self, game_id: str, game: GameService, delta_seconds: float | None = None) -> None:
+        """
+        Один тик игры: обновление и публикация состояния либо завершение неактивной игры.
+        delta_seconds - фиксированный шаг вместо реального времени (нагрузочный стенд)
+        """
+        if game.game_mode.is_alive() and game.is_active():
+            sample = tick_profiler.begin_tick(game_id=game_id)
+            game.game_mode.tick_sample = sample
+            try:
+                updated_state = await game.update(delta_seconds=delta_seconds)
+            finally:
+                game.game_mode.tick_sample = None
+
+            # Тик без изменений не публикуется, раз в GAME_HEARTBEAT_INTERVAL уходит heartbeat со счётчиком тиков
+            now = time.monotonic()
+            if game.has_changes:
+                self._last_publish_times[game_id] = now
+                await self._publish_update(game_id=game_id, game=game, update=updated_state, sample=sample)
+            elif now - self._last_publish_times.get(game_id, 0.0) >= settings.GAME_HEARTBEAT_INTERVAL:
+                self._last_publish_times[game_id] = now
+                heartbeat = {field: updated_state.get(field) for field in GAME_HEARTBEAT_FIELDS}
+                await self._publish_update(game_id=game_id, game=game, update=heartbeat, sample=sample)
+            elif sample is not None:
+                sample.entities = game.game_mode.get_entity_counts()
+                tick_profiler.end_tick(sample=sample)
+
+            if settings.GAME_KEYFRAME_INTERVAL > 0 and (
+                game.keyframe_tick is None or game.tick - game.keyframe_tick >= settings.GAME_KEYFRAME_INTERVAL
+            ):
+                game.keyframe_tick = game.tick
+                await self.notification_service.send_game_keyframe(
+                    data={**game.get_keyframe(), **self._get_update_format_info(game=game)}
+                )
+        elif game.is_active() and not game.game_mode.is_game_over():
+            logger.info(f"Game {game_id} is over or has no players, sending game over notification")
+            await self.notification_service.send_game_over(game_id=game_id)
+            game.close_replay()
+            del self.games[game_id]
+
+    async def _publish_update(self, game_id: str, game: GameService, update: dict, sample: TickSample | None) -> None:
+        """Присвоить обновлению следующий номер seq и опубликовать его"""
+        game.update_seq += 1
+        update["seq"] = game.update_seq
+        if sample is None:
+            await self._send_update(game_id=game_id, data=self._serialize_update(game=game, update=update))
+            return
+
+        sample.start_phase()
+        data = self._serialize_update(game=game, update=update)
+        sample.end_phase("serialize")
+        await self._send_update(game_id=game_id, data=data)
+        sample.end_phase("publish")
+        sample.entities = game.game_mode.get_entity_counts()
+        tick_profiler.end_tick(sample=sample, update=data)
+
+    @staticmethod
+    def _serialize_update(game: GameService, update: dict) -> dict | bytes:
+        """Сериализовать обновление в формате GAME_UPDATE_FORMAT (словарь для JSON кодирует NatsRepository)"""
+        if settings.GAME_UPDATE_FORMAT == UPDATE_FORMAT_MSGPACK:
+            return pack_game_update(update=update, handles=game.entity_handles)
+        return update
+
+    async def _send_update(self, game_id: str, data: dict | bytes) -> None:
+        if isinstance(data, bytes):
+            await self.notification_service.send_game_update_packed(game_id=game_id, payload=data)
+        else:
+            await self.notification_service.send_game_update(data=data)
+
+    @staticmethod
+    def _get_update_format_info(game: GameService) -> dict:
+        """
+        Формат обновлений игры, таблица хэндлов сущностей, параметры квантования (или None,
+        если игра передаёт значения как есть) и радиус области интереса для присоединяющегося клиента
+        """
+        quantizer = game.game_mode.update_quantizer
+        info = {
+            "update_quantization": quantizer.get_info() if quantizer is not None else None,
+            # Радиус области интереса: webapi фильтрует сущности обновлений по entity_cells (None = выключено)
+            "interest_radius": game.settings.interest_radius or None,
+        }
+        if settings.GAME_UPDATE_FORMAT == UPDATE_FORMAT_MSGPACK:
+            info["update_format"] = UPDATE_FORMAT_MSGPACK
+            info["entity_handles"] = game.entity_handles.table()
+        else:
+            info["update_format"] = UPDATE_FORMAT_JSON
+        return info
+
+    def _get_tick_interval(self, game: GameService) -> float:
+        """
+        Интервал тиков игры: полная частота для идущих игр, пониженная — для игр в ожидании и на паузе.
+        Идущая игра без подключённых игроков обновляется с полной частотой: её время не должно замедляться
+        """
+        if game.is_active():
+            return 1 / settings.GAME_UPDATE_FPS
+        return 1 / settings.GAME_IDLE_UPDATE_FPS
+
+    def _schedule_game(self, game_id: str) -> None:
+        """Добавить игру в планировщик тиков со своей фазой внутри интервала кадра"""
+        if game_id in self._game_deadlines:
+            return
+        # Последовательность золотого сечения равномерно распределяет фазы при любом числе игр
+        phase = (self._phase_counter * 0.6180339887) % 1.0
+        self._phase_counter += 1
+        self._push_tick(game_id=game_id, deadline=time.monotonic() + phase / settings.GAME_UPDATE_FPS)
+        self._schedule_changed.set()
+
+    def wake_game(self, game_id: str) -> None:
+        """
+        Перенести тик игры на ближайший кадр полной частоты (старт, возобновление, переподключение),
+        не дожидаясь тика с пониженной частотой. Фаза игры внутри интервала сохраняется.
+        """
+        deadline = self._game_deadlines.get(game_id)
+        if deadline is None:
+            return
+        interval = 1 / settings.GAME_UPDATE_FPS
+        now = time.monotonic()
+        if deadline - now > interval:
+            self._push_tick(game_id=game_id, deadline=deadline - ((deadline - now) // interval) * interval)
+            self._schedule_changed.set()
+
+    def _push_tick(self, game_id: str, deadline: float) -> None:
+        self._game_deadlines[game_id] = deadline
+        self._tick_sequence += 1
+        heapq.heappush(self._tick_schedule, (deadline, self._tick_sequence, game_id))
+
     async def game_create(self, **kwargs) -> dict:
         """Создать новую игру с настройками"""
         try:
@@ -96,12 +269,14 @@ class GameCoordinator:
                 game_settings=game_settings,
                 map_service=map_service,
                 ai_inference_service=self.ai_inference_service,
+                replay_recorder=self._create_replay_recorder(game_id=game_settings.game_id),
             )
             
             # Инициализируем игру
             await game_service.initialize_game()
             
             self.games[game_settings.game_id] = game_service
+            self._schedule_game(game_id=game_settings.game_id)
             logger.info(f"Game {game_settings.game_id} created with mode {game_settings.game_mode}")
             return {
                 "success": True,
@@ -116,6 +291,21 @@ class GameCoordinator:
             }
 
 
+    @staticmethod
+    def _create_replay_recorder(game_id: str) -> ReplayRecorder | None:
+        """Запись повтора игры в GAME_REPLAY_DIR; ошибка открытия файла не мешает созданию игры"""
+        if not settings.GAME_REPLAY_DIR:
+            return None
+        try:
+            return ReplayRecorder.for_game(
+                directory=settings.GAME_REPLAY_DIR,
+                game_id=game_id,
+                checksum_interval=settings.GAME_REPLAY_CHECKSUM_INTERVAL,
+            )
+        except Exception as e:
+            logger.error(f"Error creating replay recorder for game {game_id}: {e}", exc_info=True)
+            return None
+
     async def game_join(self, **kwargs) -> dict:
         player_id = kwargs.get("player_id")
         game_id = kwargs.get("game_id")
@@ -128,24 +318,28 @@ class GameCoordinator:
                 "message": "Game not found"
             }
         self.games[game_id].game_mode.update_player_connection_status(player_id=player_id, connected=True)
+        self.wake_game(game_id=game_id)
 
         return {
             "success": True,
-            "message": f"Player {player_id} joined game {game_id}"
+            "message": f"Player {player_id} joined game {game_id}",
+            **self._get_update_format_info(game=self.games[game_id]),
         }
 
     async def game_input(self, **kwargs) -> None:
         game_id = kwargs.get("game_id")
         player_id = kwargs.get("player_id")
         inputs = kwargs.get("inputs")
+        seq = kwargs.get("seq")
 
         if game_id in self.games:
             game = self.games[game_id]
             player = game.get_player(player_id)
 
             if player:
-                player.set_inputs(inputs)
-                logger.debug(f"Input received for player {player_id} in game {game_id}: {inputs}")
+                # Ввод применяется в начале следующего тика игры (GameService.update)
+                player.queue_inputs(inputs=inputs, seq=seq)
+                logger.debug(f"Input queued for player {player_id} in game {game_id}: seq={seq}, {inputs}")
             else:
                 pass
                 #TODO исправить frontend чтобы он не отправлял комманты на input до старта игры.
@@ -192,11 +386,15 @@ class GameCoordinator:
 
         if game_id in self.games:
             game_service = self.games[game_id]
-            game_state = game_service.get_state()
+            # Кодировка карты, которую понимает клиент (по умолчанию вложенный список)
+            game_state = game_service.get_state(map_encoding=kwargs.get("map_encoding", MAP_ENCODING_LIST))
 
             result = {
                 "success": True,
                 "game_state": game_state.model_dump(mode="json"),
+                # Номер последнего опубликованного обновления, которое уже учтено в game_state
+                "seq": game_service.update_seq,
+                **self._get_update_format_info(game=game_service),
             }
             logger.debug(f"State requested for game game_id: {game_id}, result: {result}")
             return result
@@ -0,0 +1,452 @@
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import multiprocessing
+import queue
+import threading
+import uuid
+from multiprocessing.connection import Connection
+from typing import Any, Callable, TYPE_CHECKING
+
+from fastapi import HTTPException
+
+from ..config import settings
+from ..services.event_service import EventService
+from ..services.tick_profiler import tick_profiler
+
+if TYPE_CHECKING:
+    from .game_coordinator import GameCoordinator
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventSender:
+    """
+    Канал событий воркера в процесс координатора. Запись идёт из отдельного потока,
+    поэтому заполненный канал не блокирует игровой цикл воркера.
+    """
+
+    def __init__(self, connection: Connection) -> None:
+        self.connection: Connection = connection
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._send_events, name="game-worker-events", daemon=True)
+        self._thread.start()
+
+    def put(self, event: tuple) -> None:
+        self._events.put(event)
+
+    def close(self) -> None:
+        """Дождаться отправки накопленных событий и закрыть канал"""
+        self._events.put(None)
+        self._thread.join()
+        self.connection.close()
+
+    def _send_events(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            try:
+                self.connection.send(event)
+            except OSError:
+                # Процесс координатора закрыл канал
+                break
+
+
+class WorkerNotificationService:
+    """Отправка событий игр воркера в процесс координатора через канал событий"""
+
+    def __init__(self, event_queue: WorkerEventSender) -> None:
+        self.event_queue: WorkerEventSender = event_queue
+
+    async def send_game_update(self, data: dict) -> bool:
+        self.event_queue.put(("update", data))
+        return True
+
+    async def send_game_update_packed(self, game_id: str, payload: bytes) -> bool:
+        self.event_queue.put(("update_packed", game_id, payload))
+        return True
+
+    async def send_game_keyframe(self, data: dict) -> bool:
+        self.event_queue.put(("keyframe", data))
+        return True
+
+    async def send_game_over(self, game_id: str) -> bool:
+        self.event_queue.put(("game_over", game_id))
+        return True
+
+
+class GameWorkerPool:
+    """
+    Пул процессов-воркеров, в каждом из которых работает свой GameCoordinator с игровым циклом.
+
+    Игра закрепляется за воркером при создании. Процесс координатора остаётся точкой входа NATS и REST:
+    команды игр пересылаются воркеру через очередь, а обновления игр из канала событий воркера
+    публикуются через EventService координатора. Завершившийся воркер перезапускается,
+    его игры заканчиваются (game_over), ожидающие ответа команды завершаются ошибкой.
+    """
+
+    def __init__(self, workers: int, notification_service: EventService) -> None:
+        self.workers: int = workers
+        self.notification_service: EventService = notification_service
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[multiprocessing.Process] = []
+        self._command_queues: list[multiprocessing.Queue] = []
+        # Читающие концы каналов событий; пишущий конец есть только у воркера (у каждого свой,
+        # чтобы воркер, убитый посреди записи, не повредил события остальных)
+        self._event_connections: list[Connection] = []
+        # id запроса -> (индекс воркера, ожидающий ответа future)
+        self._pending: dict[str, tuple[int, asyncio.Future]] = {}
+        # game_id -> индекс воркера
+        self.game_workers: dict[str, int] = {}
+        # Цикл и очередь run(): в неё потоки чтения каналов передают события воркеров
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._events: asyncio.Queue | None = None
+        self._stopping: bool = False
+
+    def start(self) -> None:
+        """Запустить процессы воркеров"""
+        self._stopping = False
+        self._command_queues = [None] * self.workers
+        self._event_connections = [None] * self.workers
+        self._processes = [None] * self.workers
+        for worker_index in range(self.workers):
+            self._start_worker(worker_index)
+        logger.info(f"Started {self.workers} game worker processes")
+
+    def _start_worker(self, worker_index: int) -> None:
+        command_queue = self._context.Queue()
+        event_connection, worker_connection = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=run_game_worker,
+            args=(worker_index, command_queue, worker_connection),
+            name=f"game-worker-{worker_index}",
+            daemon=True,
+        )
+        process.start()
+        # Без копии пишущего конца в этом процессе чтение канала получает EOF, когда воркер завершается
+        worker_connection.close()
+        self._command_queues[worker_index] = command_queue
+        self._event_connections[worker_index] = event_connection
+        self._processes[worker_index] = process
+        if self._loop is not None:
+            self._start_reader(worker_index)
+
+    def _start_reader(self, worker_index: int) -> None:
+        threading.Thread(
+            target=self._read_events,
+            args=(worker_index, self._event_connections[worker_index], self._loop, self._events),
+            name=f"game-worker-{worker_index}-events",
+            daemon=True,
+        ).start()
+
+    def stop(self) -> None:
+        """Остановить процессы воркеров"""
+        self._stopping = True
+        for command_queue in self._command_queues:
+            if command_queue is not None:
+                command_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=settings.GAME_WORKER_CALL_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        self._command_queues.clear()
+        self._event_connections.clear()
+        self.game_workers.clear()
+        logger.info("Game worker processes stopped")
+
+    async def run(self) -> None:
+        """Обрабатывать события воркеров: ответы на команды, обновления и окончания игр, завершения процессов"""
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        for worker_index in range(len(self._processes)):
+            self._start_reader(worker_index)
+        while True:
+            try:
+                event = await self._events.get()
+                match event:
+                    case ("response", request_id, result, error):
+                        _, future = self._pending.pop(request_id, (None, None))
+                        if future is not None and not future.done():
+                            if error is not None:
+                                future.set_exception(HTTPException(status_code=error[0], detail=error[1]))
+                            else:
+                                future.set_result(result)
+                    case ("update", data):
+                        await self.notification_service.send_game_update(data=data)
+                    case ("update_packed", game_id, payload):
+                        await self.notification_service.send_game_update_packed(game_id=game_id, payload=payload)
+                    case ("keyframe", data):
+                        await self.notification_service.send_game_keyframe(data=data)
+                    case ("game_over", game_id):
+                        self.game_workers.pop(game_id, None)
+                        await self.notification_service.send_game_over(game_id=game_id)
+                    case ("game_removed", game_id):
+                        self.game_workers.pop(game_id, None)
+                    case ("metrics", kind, summary):
+                        tick_profiler.observe(kind, summary)
+                    case ("worker_exited", worker_index, connection):
+                        await self._handle_worker_exit(worker_index=worker_index, connection=connection)
+                    case _:
+                        logger.warning(f"Unknown game worker event: {event}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error handling game worker event: {e}", exc_info=True)
+
+    @staticmethod
+    def _read_events(
+        worker_index: int,
+        connection: Connection,
+        loop: asyncio.AbstractEventLoop,
+        events: asyncio.Queue,
+    ) -> None:
+        """
+        Поток чтения канала событий воркера: блокирующий recv без опроса, события передаются в цикл run().
+        EOF приходит после всех отправленных воркером событий и означает, что воркер завершился.
+        """
+        try:
+            while True:
+                try:
+                    event = connection.recv()
+                except (EOFError, OSError):
+                    event = ("worker_exited", worker_index, connection)
+                try:
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+                except RuntimeError:
+                    # Цикл событий закрыт при остановке сервиса
+                    break
+                if event[0] == "worker_exited":
+                    break
+        finally:
+            connection.close()
+
+    async def _handle_worker_exit(self, worker_index: int, connection: Connection) -> None:
+        """Воркер завершился сам: его команды не получат ответа, а игры потеряны"""
+        if self._stopping or self._event_connections[worker_index] is not connection:
+            return
+        process = self._processes[worker_index]
+        # Канал закрывается при выходе процесса; воркер, закрывший канал и не вышедший, завершаем сами
+        process.join(timeout=settings.GAME_WORKER_CALL_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        logger.error(
+            f"Game worker {worker_index} exited with code {process.exitcode}, "
+            f"restarting in {settings.GAME_WORKER_RESTART_DELAY} s"
+        )
+        for request_id, (pending_worker, future) in list(self._pending.items()):
+            if pending_worker == worker_index:
+                del self._pending[request_id]
+                if not future.done():
+                    future.set_exception(HTTPException(status_code=503, detail="Game worker exited"))
+
+        lost_games = [game_id for game_id, index in self.game_workers.items() if index == worker_index]
+        for game_id in lost_games:
+            self.game_workers.pop(game_id, None)
+            await self.notification_service.send_game_over(game_id=game_id)
+        if lost_games:
+            logger.error(f"Games lost with game worker {worker_index}: {lost_games}")
+
+        # Команды, оставшиеся в очереди мёртвого воркера, не отправятся: не ждём их при выходе
+        command_queue = self._command_queues[worker_index]
+        self._command_queues[worker_index] = None
+        command_queue.cancel_join_thread()
+        command_queue.close()
+        # Задержка не даёт падающему при старте воркеру перезапускаться без остановки
+        self._loop.call_later(settings.GAME_WORKER_RESTART_DELAY, self._restart_worker, worker_index)
+
+    def _restart_worker(self, worker_index: int) -> None:
+        if self._stopping:
+            return
+        try:
+            self._start_worker(worker_index)
+            logger.info(f"Game worker {worker_index} restarted")
+        except Exception as e:
+            logger.error(f"Error restarting game worker {worker_index}: {e}", exc_info=True)
+
+    async def call(self, worker_index: int, method: str, **kwargs) -> Any:
+        """Вызвать метод GameCoordinator воркера и дождаться ответа"""
+        request_id = str(uuid.uuid4())
+        future = asyncio.get_running_loop().create_future()
+        command_queue = self._command_queues[worker_index]
+        if command_queue is None:
+            raise HTTPException(status_code=503, detail="Game worker is restarting")
+        self._pending[request_id] = (worker_index, future)
+        command_queue.put((request_id, method, kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout=settings.GAME_WORKER_CALL_TIMEOUT)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def send(self, worker_index: int, method: str, **kwargs) -> None:
+        """Вызвать метод GameCoordinator воркера без ожидания ответа"""
+        command_queue = self._command_queues[worker_index]
+        if command_queue is None:
+            logger.warning(f"Game worker {worker_index} is restarting, {method} dropped")
+            return
+        command_queue.put((None, method, kwargs))
+
+    async def call_route(self, route: Callable, **kwargs) -> Any:
+        """
+        Выполнить REST-обработчик в воркере, которому принадлежит игра.
+        Обработчики без game_id выполняются во всех воркерах, списки результатов объединяются —
+        пагинацию вызывающий применяет к объединённому списку.
+        """
+        route_path = f"{route.__module__}:{route.__name__}"
+        game_id = kwargs.get("game_id")
+        if game_id is None:
+            results = await asyncio.gather(*[
+                self.call(worker_index, "run_route", route=route_path, kwargs=kwargs)
+                for worker_index in range(self.workers)
+            ])
+            return [item for result in results for item in result]
+
+        worker_index = self.game_workers.get(game_id)
+        if worker_index is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return await self.call(worker_index, "run_route", route=route_path, kwargs=kwargs)
+
+    def _pick_worker(self) -> int:
+        """Воркер с наименьшим числом игр; перезапускающиеся воркеры пропускаются, пока есть работающие"""
+        load = [0] * self.workers
+        for worker_index in self.game_workers.values():
+            load[worker_index] += 1
+        running = [index for index, command_queue in enumerate(self._command_queues) if command_queue is not None]
+        return min(running or range(self.workers), key=load.__getitem__)
+
+    async def _call_game(self, method: str, **kwargs) -> dict:
+        game_id = kwargs.get("game_id")
+        worker_index = self.game_workers.get(game_id)
+        if worker_index is None:
+            logger.warning(f"Game {game_id} not found for {method}")
+            return {
+                "success": False,
+                "message": "Game not found"
+            }
+        return await self.call(worker_index, method, **kwargs)
+
+    async def game_create(self, **kwargs) -> dict:
+        worker_index = self._pick_worker()
+        result = await self.call(worker_index, "game_create", **kwargs)
+        if result.get("success"):
+            self.game_workers[result["game_id"]] = worker_index
+            logger.info(f"Game {result['game_id']} pinned to worker {worker_index}")
+        return result
+
+    async def game_join(self, **kwargs) -> dict:
+        return await self._call_game("game_join", **kwargs)
+
+    async def game_input(self, **kwargs) -> None:
+        game_id = kwargs.get("game_id")
+        worker_index = self.game_workers.get(game_id)
+        if worker_index is None:
+            logger.warning(f"Game {game_id} not found for input")
+            return
+        self.send(worker_index, "game_input", **kwargs)
+
+    async def game_place_weapon(self, **kwargs) -> dict:
+        return await self._call_game("game_place_weapon", **kwargs)
+
+    async def game_get_state(self, **kwargs) -> dict:
+        return await self._call_game("game_get_state", **kwargs)
+
+    async def game_player_disconnect(self, **kwargs) -> dict:
+        return await self._call_game("game_player_disconnect", **kwargs)
+
+
+def forward_to_game_worker(get_coordinator: Callable[[], "GameCoordinator"]) -> Callable:
+    """
+    Декоратор REST-обработчика: при включённых воркерах обработчик выполняется в процессе,
+    которому принадлежит игра. Параметр coordinator (Depends) воркер подставляет свой.
+    """
+    def decorator(route: Callable) -> Callable:
+        @functools.wraps(route)
+        async def wrapper(**kwargs):
+            worker_pool = get_coordinator().worker_pool
+            if worker_pool is None:
+                return await route(**kwargs)
+            kwargs.pop("coordinator", None)
+            return await worker_pool.call_route(route=wrapper, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_game_worker(
+    worker_index: int,
+    command_queue: multiprocessing.Queue,
+    event_connection: Connection,
+) -> None:
+    """Точка входа процесса-воркера"""
+    from ..logging_config import configure_logging
+
+    configure_logging()
+    event_queue = WorkerEventSender(connection=event_connection)
+    try:
+        asyncio.run(_worker_main(worker_index, command_queue, event_queue))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        event_queue.close()
+
+
+async def _run_route(coordinator: "GameCoordinator", route: str, kwargs: dict) -> Any:
+    module_name, route_name = route.split(":")
+    handler = getattr(importlib.import_module(module_name), route_name)
+    if "coordinator" in inspect.signature(handler).parameters:
+        kwargs["coordinator"] = coordinator
+    return await handler(**kwargs)
+
+
+async def _worker_main(
+    worker_index: int,
+    command_queue: multiprocessing.Queue,
+    event_queue: WorkerEventSender,
+) -> None:
+    # Воркер сам обновляет свои игры: его координатор работает без пула
+    settings.GAME_WORKERS = 0
+    from .. import dependenties
+
+    coordinator = dependenties.game_coordinator
+    coordinator.worker_pool = None
+    coordinator.notification_service = WorkerNotificationService(event_queue=event_queue)
+    # Метрики профилировщика экспортирует /metrics процесса сервиса
+    tick_profiler.sink = lambda kind, summary: event_queue.put(("metrics", kind, summary))
+    game_loop_task = asyncio.create_task(coordinator.start_game_loop())
+    logger.info(f"Game worker {worker_index} started")
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            command = await loop.run_in_executor(None, command_queue.get)
+            if command is None:
+                break
+            request_id, method, kwargs = command
+            # Команды выполняются по порядку, чтобы ввод игрока не обгонял создание игры
+            result, error = None, None
+            try:
+                if method == "run_route":
+                    result = await _run_route(coordinator, **kwargs)
+                    game_id = kwargs["kwargs"].get("game_id")
+                else:
+                    result = await getattr(coordinator, method)(**kwargs)
+                    game_id = kwargs.get("game_id")
+                if game_id is not None and game_id not in coordinator.games:
+                    event_queue.put(("game_removed", game_id))
+            except HTTPException as e:
+                error = (e.status_code, e.detail)
+            except Exception as e:
+                logger.error(f"Error executing {method} in game worker {worker_index}: {e}", exc_info=True)
+                error = (500, str(e))
+            if request_id is not None:
+                event_queue.put(("response", request_id, result, error))
+    finally:
+        game_loop_task.cancel()
+        await dependenties.ai_inference_service.disconnect()
+        await dependenties.redis_repository.disconnect()
+        await dependenties.event_service.disconnect()
+        await dependenties.postgres_repository.disconnect()
+        logger.info(f"Game worker {worker_index} stopped")
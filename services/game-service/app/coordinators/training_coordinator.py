@@ -15,7 +15,7 @@ from app.entities.enemy import Enemy, EnemyType
 from app.services.ai_action_mapper import action_to_inputs, action_to_direction
 
 from app.services.ai_observation import build_observation, ObservationData, GRID_ENEMY_INFERENCE_SIZE, \
-    GRID_PLAYER_INFERENCE_SIZE, STATS_SIZE, DEFAULT_WINDOW_SIZE, get_closest_enemy_distance
+    GRID_PLAYER_INFERENCE_SIZE, GRID_DANGER_SIZE, STATS_SIZE, DEFAULT_WINDOW_SIZE, get_closest_enemy_distance
 from app.services.game_service import GameService
 from app.services.map_service import MapService
 from app.models.game_models import GameSettings
@@ -118,6 +118,8 @@ class TrainingCoordinator:
                 powerup_drop_chance=0.7,
                 enemy_powerup_drop_chance=0.7
             )
+            if game_settings.ai_danger_channel:
+                self.grid_size += GRID_DANGER_SIZE
 
             map_service = MapService(
                 map_repository=self._map_repository,
@@ -172,7 +174,7 @@ class TrainingCoordinator:
                 )
                 game_service.team_service.auto_distribute_players([entity])
 
-            entity.can_handle_ai_action = lambda x=None: False  # patching to avoid back requests to the ai-service
+            entity.ai_external_control = True  # actions come from the training step, no requests to the ai-service
 
             for i in range(player_ai_count):
                 game_service.add_player(
@@ -446,4 +448,5 @@ class TrainingCoordinator:
             players_positions=players_positions,
             weapons_positions=weapons_positions,
             power_ups_positions=power_ups_positions,
+            danger_grid=game_service.game_mode.map.blast_layer if game_service.settings.ai_danger_channel else None,
         )
@@ -25,6 +25,7 @@ game_coordinator = GameCoordinator(
     notification_service=event_service,
     map_repository=map_repository,
     ai_inference_service=ai_inference_service,
+    workers=settings.GAME_WORKERS,
 )
 training_coordinator = TrainingCoordinator(
     map_repository=map_repository,
@@ -17,6 +17,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 class Bomb(Weapon):
+    __slots__ = ()
     weapon_type: WeaponType = WeaponType.BOMB
     scale_size = 0.8
 
@@ -50,9 +51,9 @@ class Bomb(Weapon):
         logger.debug(f"Bomb created: position=({x}, {y}), power={power}, owner={owner_id}, timer={self.settings.bomb_timer}")
 
 
-    def activate(self, **kwargs) -> None:
-        """Активировать взрыв бомбы"""
-        super().activate(**kwargs)
+    def detonate(self) -> None:
+        """Взорвать бомбу и освободить её клетку"""
+        super().detonate()
         self.map.set_cell_type(
             x=int(self.x / self.settings.cell_size),
             y=int(self.y / self.settings.cell_size),
@@ -60,10 +61,6 @@ class Bomb(Weapon):
         )
         logger.info(f"Bomb {self.id} exploded!")
 
-    
-    def update(self, **kwargs) -> None:
-        """Обновить состояние бомбы"""
-        super().update(**kwargs)
 
     
     def get_damage_area(self) -> set[tuple[int, int]]:
@@ -11,6 +11,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 class Bomberman(Player):
+    __slots__ = ()
 
     scale_size = 0.8
     unit_type: UnitType = UnitType.BOMBERMAN
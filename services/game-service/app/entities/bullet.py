@@ -10,6 +10,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 class Bullet(Weapon):
+    __slots__ = ()
     weapon_type: WeaponType = WeaponType.BULLET
     scale_size = 0.3
 
@@ -39,15 +40,20 @@ class Bullet(Weapon):
         logger.debug(f"Bullet created: position=({x}, {y}), direction={direction}, speed={speed}, owner={owner_id}")
     
 
-    def activate(self, **kwargs) -> None:
-        """Bullet activates on hit; fill single cell for damage area before base activate()."""
+    def detonate(self) -> None:
+        """Bullet activates on hit; fill single cell for damage area before base detonate()."""
         grid_x: int = int(self.x / self.settings.cell_size)
         grid_y: int = int(self.y / self.settings.cell_size)
-        self.explosion_cells_grid.append((grid_x, grid_y))
-        super().activate(**kwargs)
+        self.explosion_cells_grid.add((grid_x, grid_y))
+        super().detonate()
         logger.debug(f"Bullet {self.id} hit target!")
 
 
+    def get_fuse_time(self) -> float | None:
+        """Bullet has no fuse: it moves every tick and activates on hit."""
+        return None
+
+
     def update(self, **kwargs) -> None:
         """Обновить положение пули"""
         if not self.move(
@@ -9,6 +9,7 @@ import logging
 
 if TYPE_CHECKING:
     from . import Map
+    from .flow_field import FlowField
     from ..models.game_models import GameSettings
 
 
@@ -20,6 +21,14 @@ class EnemyType(Enum):
     BEAR = "BEAR"
     GHOST = "GHOST"
 
+class EnemyLod(Enum):
+    # Рядом с игроком: обновляется каждый тик
+    NEAR = "NEAR"
+    # Раз в enemy_lod_mid_interval тиков шагом за время с прошлого обновления
+    MID = "MID"
+    # Раз в enemy_lod_far_interval тиков, без запросов действий к ai-service
+    FAR = "FAR"
+
 class EnemyUpdate(TypedDict):
     entity_id: str
     x: NotRequired[float]
@@ -31,12 +40,14 @@ class EnemyUpdate(TypedDict):
 
 
 class Enemy(Entity):
+    __slots__ = ("type", "flow_field", "lod_tier", "lod_updated_at")
     ENEMY_LIVES: dict[EnemyType, int] = {
         EnemyType.COIN: 1,
         EnemyType.BEAR: 3,
         EnemyType.GHOST: 2,
     }
     scale_size: float = 0.8
+    change_fields = ("x", "y", "type", "lives", "invulnerable", "destroyed")
 
     def __init__(
             self,
@@ -47,7 +58,8 @@ class Enemy(Entity):
             enemy_type: EnemyType,
             map: "Map",
             settings: "GameSettings",
-            ai: bool = False
+            ai: bool = False,
+            rng: random.Random | None = None,
     ):
         super().__init__(
             x=x,
@@ -58,30 +70,55 @@ class Enemy(Entity):
             ai=ai,
             name=f"Enemy_{enemy_type.value}",
             map=map,
-            settings=settings
+            settings=settings,
+            # Игровой режим передаёт random, засеянный из random игры (GameService.rng)
+            rng=rng if rng is not None else random.Random(),
         )
         
         self.type: EnemyType = enemy_type
         self.lives: int = self.ENEMY_LIVES[enemy_type]
+        # Поле преследования игроков (GameSettings.enemy_chase_players); None - случайное блуждание или AI
+        self.flow_field: "FlowField | None" = None
+        # Уровень детализации по расстоянию до игроков (GameSettings.enemy_lod) и время игры прошлого обновления
+        self.lod_tier: EnemyLod = EnemyLod.NEAR
+        self.lod_updated_at: float | None = None
 
 
         logger.debug(f"Enemy created: type={enemy_type.value}, position=({x}, {y}), speed={speed}, lives={self.lives}")
 
-    def get_changes(self, full_state: bool = False) -> EnemyUpdate:
-        previous_state = {} if full_state else getattr(self, "_state", {})
-        current_state = {
-            "x": self.x,
-            "y": self.y,
-            "type": self.type,
-            "lives": self.lives,
-            "invulnerable": self.invulnerable,
-            "destroyed": self.destroyed,
-        }
-        changes = {
-            "entity_id": self.id
-        }
-        for key, value in current_state.items():
-            if key not in previous_state or previous_state[key] != value:
-                changes[key] = value
-        self._state = current_state
-        return EnemyUpdate(**changes)
+    @property
+    def passes_breakable(self) -> bool:
+        """Преследующий игроков GHOST проходит сквозь разрушаемые блоки"""
+        return self.flow_field is not None and self.type == EnemyType.GHOST
+
+    def move(self, delta_time: float) -> bool:
+        # Преследующий игроков враг ходит от клетки к клетке, как AI
+        if self.flow_field is not None:
+            return self._move_ai_grid_based(delta_time=delta_time)
+        return super().move(delta_time=delta_time)
+
+    def get_direction(self, delta_time: float) -> tuple[int, int]:
+        """Следующая клетка преследующего врага берётся из поля преследования"""
+        if self.flow_field is None:
+            return super().get_direction(delta_time=delta_time)
+        self.direction = self.flow_field.next_direction(
+            cell_x=round(self.x / self.settings.cell_size),
+            cell_y=round(self.y / self.settings.cell_size),
+            passes_breakable=self.passes_breakable,
+            rng=self.rng,
+        )
+        return self.direction
+
+    def is_idle(self) -> bool:
+        """Уничтоженный враг ждёт удаления, запертый без свободных соседних клеток - изменения карты рядом"""
+        if self.destroyed:
+            return True
+        if self.ai or self.flow_field is not None or self.direction != (0, 0):
+            return False
+        return not self.map.get_available_direction(
+            x=round(self.x / self.settings.cell_size),
+            y=round(self.y / self.settings.cell_size),
+        )
+
+    def get_changes(self, full_state: bool = False) -> EnemyUpdate | None:
+        return self._collect_changes(id_field="entity_id", full_state=full_state)
@@ -5,6 +5,7 @@ import random
 import time
 import uuid
 import logging
+from types import MemberDescriptorType
 from typing import Any, TYPE_CHECKING
 
 from app.config import settings
@@ -16,9 +17,66 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+
+def _change_field(field: str, slot: MemberDescriptorType) -> property:
+    """Свойство поля change_fields поверх его слота: чтение идёт прямо из слота, присваивание отмечает изменение"""
+    get_slot = slot.__get__
+    set_slot = slot.__set__
+
+    def set_field(entity: "Entity", value: Any) -> None:
+        try:
+            dirty_fields = entity._dirty_fields
+        except AttributeError:
+            # copy.copy восстанавливает слоты в произвольном порядке, отслеживание ещё не началось
+            dirty_fields = None
+        if dirty_fields is not None:
+            try:
+                changed = get_slot(entity, None) != value
+            except AttributeError:
+                changed = True
+            if changed:
+                dirty_fields.add(field)
+                # Изменения спящей сущности отдаёт её обновление, поэтому любое изменение её будит
+                entity.sleeping = False
+        set_slot(entity, value)
+
+    return property(get_slot, set_field)
+
+
 class Entity:
     """Базовый класс для всех игровых сущностей."""
+    # Атрибуты экземпляра объявлены в __slots__ (без __dict__); подклассы объявляют только свои новые атрибуты
+    __slots__ = (
+        "_dirty_fields",
+        "map",
+        "settings",
+        "x",
+        "y",
+        "width",
+        "height",
+        "id",
+        "name",
+        "destroyed",
+        "ai",
+        "ai_external_control",
+        "ai_last_action_time",
+        "move_timer",
+        "ai_target_cell_x",
+        "ai_target_cell_y",
+        "speed",
+        "lives",
+        "invulnerable",
+        "color",
+        "invulnerable_timer",
+        "direction",
+        "sleeping",
+        "rng",
+    )
     scale_size: float = 1.0
+    # Проходит сквозь разрушаемые блоки (коллизии по Map.hard_solid_layer вместо solid_layer)
+    passes_breakable: bool = False
+    # Поля модели обновления сущности; изменения отмечаются при присваивании атрибута (см. _change_field)
+    change_fields: tuple[str, ...] = ()
     # _frontend_x: float = 0.0
     # _map_x: int = 0
     # _frontend_y: float = 0.0
@@ -75,9 +133,12 @@ class Entity:
         speed: float = 0.0,
         lives: int = 1,
         invulnerable: bool = False,
-        color: str = "#FFFFFF"  # Белый цвет по умолчанию
+        color: str = "#FFFFFF",  # Белый цвет по умолчанию
+        rng: random.Random | None = None,
     ):
         try:
+            # Поля, изменившиеся с прошлого get_changes; None - нужно отдать полное состояние
+            self._dirty_fields: set[str] | None = None
             self.map = map
             self.settings = settings
 
@@ -88,10 +149,10 @@ class Entity:
             self.id: str = id if id is not None else str(uuid.uuid4())
             self.name: str = name
             self.destroyed: bool = False
-            # State
-            self.destroy_animation_timer: float = 0
 
             self.ai: bool = ai
+            # Действия AI задаются извне (training_coordinator), запросы к ai-service не отправляются
+            self.ai_external_control: bool = False
             self.ai_last_action_time: float = 0.0
             self.move_timer = 0
             
@@ -106,9 +167,15 @@ class Entity:
             self.color: str = color
 
             # таймер бессмертия после получения урона, по умолчанию таймер для enemy должен быть переопределен для других типов
+            # (бессмертие снимает событие INVULNERABILITY_END колеса таймеров игры)
             self.invulnerable_timer: float = 0
 
             self.direction: tuple[int, int] = (0, 0)  # Направление
+            # Спящая сущность не обновляется в тике, пока её не разбудят (см. is_idle и wake)
+            self.sleeping: bool = False
+            # Собственный random блуждающей сущности (Enemy): пакетный путь EntityStore берёт из него
+            # те же значения, что и get_direction, поэтому порядок обновления сущностей на них не влияет
+            self.rng: random.Random | None = rng
             
             # For AI entities, ensure initial position is aligned to grid
             if self.ai:
@@ -119,12 +186,73 @@ class Entity:
             logger.error(f"Error creating entity: {e}", exc_info=True)
             raise
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Слоты полей change_fields заменяются свойствами, отмечающими изменение; остальные атрибуты пишутся напрямую
+        for field in cls.change_fields:
+            slot = next((klass.__dict__[field] for klass in cls.__mro__ if field in klass.__dict__), None)
+            if isinstance(slot, MemberDescriptorType):
+                setattr(cls, field, _change_field(field=field, slot=slot))
+
+    def reinit(self, **kwargs) -> None:
+        """Заново инициализировать объект из пула на месте (аргументы как у __init__)"""
+        self.__init__(**kwargs)
+
+    def mark_changed(self, field: str) -> None:
+        """Отметить изменение поля, которое не присваивается атрибутом (вычисляемое или изменяемое на месте)"""
+        if self._dirty_fields is not None:
+            self._dirty_fields.add(field)
+        self.wake()
+
+    def reset_changes(self) -> None:
+        """Следующий get_changes вернёт полное состояние (сущность снова появилась у клиента)"""
+        self._dirty_fields = None
+        self.wake()
+
+    def is_idle(self) -> bool:
+        """Стоит ли сущность без движения и без ожидающих действий: такую можно усыпить до внешнего события"""
+        return False
+
+    def sleep(self) -> None:
+        self.sleeping = True
+
+    def wake(self) -> None:
+        self.sleeping = False
+
+    def get_change_value(self, field: str) -> Any:
+        return getattr(self, field)
+
     @abstractmethod
-    def get_changes(self, *args, **kwargs):
+    def get_changes(self, full_state: bool = False):
         """Возвращает последние изменения в обьекте,
         каждый класс должен реализовывать самостоятельно логику
         и базироваться на своей моделе обновлений данных"""
-        return self._state
+        return self._collect_changes(id_field="entity_id", full_state=full_state)
+
+    def _collect_changes(self, id_field: str, full_state: bool = False) -> dict | None:
+        """
+        Собрать поля change_fields, изменившиеся с прошлого вызова (все поля при full_state или первом вызове).
+        Для неизменившейся сущности возвращает None, не создавая словарь.
+        Полное состояние (full_state) не сбрасывает накопленные изменения для следующего обновления.
+        """
+        dirty_fields = self._dirty_fields
+        if full_state or dirty_fields is None:
+            fields = self.change_fields
+        elif not dirty_fields:
+            return None
+        else:
+            fields = dirty_fields
+
+        changes = {id_field: self.id}
+        for field in fields:
+            changes[field] = self.get_change_value(field)
+
+        if dirty_fields is None:
+            if not full_state:
+                self._dirty_fields = set()
+        elif not full_state:
+            dirty_fields.clear()
+        return changes
 
     def get_direction(self, delta_time: float) -> tuple[int, int]:
         """Get a random normalized direction vector"""
@@ -134,7 +262,7 @@ class Entity:
                 # Обновление таймера движения
                 self.move_timer += delta_time
                 # Смена направления периодически или при столкновении со стеной
-                change_direction_interval: float = 1.0 + random.random() * 2.0
+                change_direction_interval: float = 1.0 + self.rng.random() * 2.0
                 if self.move_timer >= change_direction_interval:
                     # Choose one of four cardinal directions
                     # choices = [(0, 1), (1, 0), (0, -1), (-1, 0)]
@@ -144,7 +272,7 @@ class Entity:
                     )
                     if not choices:
                         choices = [(0,0)]
-                    self.direction = random.choice(choices)
+                    self.direction = self.rng.choice(choices)
                     self.move_timer = 0
 
             logger.debug(f"Enemy new direction: {self.direction}")
@@ -288,51 +416,7 @@ class Entity:
             dy *= delta_time * 60
 
             if dx != 0 or dy != 0:
-                new_x: float = self.x + dx
-                new_y: float = self.y + dy
-                #TODO доработать проверку коллизий со стенами в методе получения направления,
-                # чтобы сразу отсечь невозможные направления и вернуть только то что возможно
-                # Move with collision detection (X axis)
-                collision_x = self.check_collision(new_x, self.y)
-                # Corner assist при движении только по X
-                if collision_x and dy == 0:
-                    assist_result = self._try_corner_assist(
-                        move_dx=dx,
-                        move_dy=0.0,
-                    )
-                    if assist_result is not None:
-                        assist_x, assist_y = assist_result
-                        self.x = assist_x
-                        self.y = assist_y
-                        # Перепроверяем коллизию уже из выровненной позиции
-                        collision_x = self.check_collision(new_x, self.y)
-
-                # Проверка коллизии по оси Y
-                collision_y = self.check_collision(self.x, new_y)
-                # Corner assist при движении только по Y
-                if collision_y and dx == 0:
-                    assist_result = self._try_corner_assist(
-                        move_dx=0.0,
-                        move_dy=dy,
-                    )
-                    if assist_result is not None:
-                        assist_x, assist_y = assist_result
-                        self.x = assist_x
-                        self.y = assist_y
-                        # Перепроверяем коллизию уже из выровненной позиции
-                        collision_y = self.check_collision(self.x, new_y)
-
-                if not collision_x:
-                    self.x = new_x
-
-                if not collision_y:
-                    self.y = new_y
-
-                # Если была коллизия по любой оси — даём сигнал сменить направление
-                if collision_x or collision_y:
-                    self.move_timer = 10
-                    self.direction = self.get_direction(delta_time=delta_time)
-
+                self._apply_continuous_step(dx=dx, dy=dy, delta_time=delta_time)
                 return True
 
             return False
@@ -340,18 +424,67 @@ class Entity:
             logger.error(f"Error in continuous movement: {e}", exc_info=True)
             return False
 
+    def _apply_continuous_step(self, dx: float, dy: float, delta_time: float) -> None:
+        """
+        Применить шаг непрерывного движения с проверкой коллизий и corner assist.
+
+        Args:
+            dx: Смещение по оси X в пикселях
+            dy: Смещение по оси Y в пикселях
+            delta_time: Шаг симуляции в секундах
+        """
+        try:
+            new_x: float = self.x + dx
+            new_y: float = self.y + dy
+            #TODO доработать проверку коллизий со стенами в методе получения направления,
+            # чтобы сразу отсечь невозможные направления и вернуть только то что возможно
+            # Move with collision detection (X axis)
+            collision_x = self.check_collision(new_x, self.y)
+            # Corner assist при движении только по X
+            if collision_x and dy == 0:
+                assist_result = self._try_corner_assist(
+                    move_dx=dx,
+                    move_dy=0.0,
+                )
+                if assist_result is not None:
+                    assist_x, assist_y = assist_result
+                    self.x = assist_x
+                    self.y = assist_y
+                    # Перепроверяем коллизию уже из выровненной позиции
+                    collision_x = self.check_collision(new_x, self.y)
+
+            # Проверка коллизии по оси Y
+            collision_y = self.check_collision(self.x, new_y)
+            # Corner assist при движении только по Y
+            if collision_y and dx == 0:
+                assist_result = self._try_corner_assist(
+                    move_dx=0.0,
+                    move_dy=dy,
+                )
+                if assist_result is not None:
+                    assist_x, assist_y = assist_result
+                    self.x = assist_x
+                    self.y = assist_y
+                    # Перепроверяем коллизию уже из выровненной позиции
+                    collision_y = self.check_collision(self.x, new_y)
+
+            if not collision_x:
+                self.x = new_x
+
+            if not collision_y:
+                self.y = new_y
+
+            # Если была коллизия по любой оси — даём сигнал сменить направление
+            if collision_x or collision_y:
+                self.move_timer = 10
+                self.direction = self.get_direction(delta_time=delta_time)
+        except Exception as e:
+            logger.error(f"Error applying continuous step: {e}", exc_info=True)
+
 
     def update(self, delta_time: float = None) -> bool:
         """Обновляет состояние сущности. Должен быть расширен в дочерних классах."""
         try:
-            # Update invulnerability
-            if self.invulnerable:
-                self.invulnerable_timer -= delta_time
-                if self.invulnerable_timer <= 0:
-                    logger.debug(f"Entity {self.id} ({self.name}) is no longer invulnerable")
-                    self.invulnerable = False
-                    self.invulnerable_timer = 0
-
             #Update moving
             return self.move(delta_time=delta_time)
 
@@ -399,34 +532,34 @@ class Entity:
             if dir_x != 0:
                 if dir_x > 0:  # Движение вправо - проверяем только правые углы
                     if ((new_grid_right != current_cell_x or new_grid_top != current_cell_y) and 
-                        self.map.is_solid(new_grid_right, new_grid_top)):
+                        self.is_cell_solid(new_grid_right, new_grid_top)):
                         return True
                     if ((new_grid_right != current_cell_x or new_grid_bottom != current_cell_y) and 
-                        self.map.is_solid(new_grid_right, new_grid_bottom)):
+                        self.is_cell_solid(new_grid_right, new_grid_bottom)):
                         return True
                 else:  # Движение влево - проверяем только левые углы
                     if ((new_grid_left != current_cell_x or new_grid_top != current_cell_y) and 
-                        self.map.is_solid(new_grid_left, new_grid_top)):
+                        self.is_cell_solid(new_grid_left, new_grid_top)):
                         return True
                     if ((new_grid_left != current_cell_x or new_grid_bottom != current_cell_y) and 
-                        self.map.is_solid(new_grid_left, new_grid_bottom)):
+                        self.is_cell_solid(new_grid_left, new_grid_bottom)):
                         return True
 
             # Движение по оси Y (вверх или вниз)
             if dir_y != 0:
                 if dir_y > 0:  # Движение вниз - проверяем только нижние углы
                     if ((new_grid_left != current_cell_x or new_grid_bottom != current_cell_y) and 
-                        self.map.is_solid(new_grid_left, new_grid_bottom)):
+                        self.is_cell_solid(new_grid_left, new_grid_bottom)):
                         return True
                     if ((new_grid_right != current_cell_x or new_grid_bottom != current_cell_y) and 
-                        self.map.is_solid(new_grid_right, new_grid_bottom)):
+                        self.is_cell_solid(new_grid_right, new_grid_bottom)):
                         return True
                 else:  # Движение вверх - проверяем только верхние углы
                     if ((new_grid_left != current_cell_x or new_grid_top != current_cell_y) and 
-                        self.map.is_solid(new_grid_left, new_grid_top)):
+                        self.is_cell_solid(new_grid_left, new_grid_top)):
                         return True
                     if ((new_grid_right != current_cell_x or new_grid_top != current_cell_y) and 
-                        self.map.is_solid(new_grid_right, new_grid_top)):
+                        self.is_cell_solid(new_grid_right, new_grid_top)):
                         return True
 
             return False
@@ -435,6 +568,12 @@ class Entity:
             logger.error(f"Error updating entity {self.id} ({self.name}): {e}", exc_info=True)
             return False
 
+    def is_cell_solid(self, x: int, y: int) -> bool:
+        """Непроходима ли клетка карты для этой сущности"""
+        if self.passes_breakable:
+            return self.map.is_hard_solid(x, y)
+        return self.map.is_solid(x, y)
+
     def _try_corner_assist(
         self,
         *,
@@ -597,6 +736,9 @@ class Entity:
         Returns:
             True if entity can handle new action, False otherwise
         """
+        if self.ai_external_control:
+            return False
+
         if not now_time:
             now_time = time.time()
         
@@ -0,0 +1,146 @@
+import logging
+import random
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from .map import CARDINAL_OFFSETS
+
+if TYPE_CHECKING:
+    from .map import Map
+
+
+logger = logging.getLogger(__name__)
+
+# Расстояние клеток, до которых нельзя дойти ни от одного игрока
+UNREACHABLE: int = np.iinfo(np.int32).max
+# Направление клетки хранится индексом в CARDINAL_OFFSETS (-1 - клетка игрока или тупик)
+OFFSETS: np.ndarray = np.array(CARDINAL_OFFSETS, dtype=np.int64)
+
+
+class FlowField:
+    """
+    Общее для врагов игры поле направлений к ближайшему игроку.
+
+    BFS сразу от всех клеток игроков по проходимым клеткам даёт расстояние до ближайшего
+    игрока, и для каждой клетки запоминается соседняя клетка с меньшим расстоянием. Враг
+    выбирает следующую клетку одним обращением к массиву, поэтому сотни врагов стоят
+    столько же, сколько один. Поле пересчитывается, только когда меняются твёрдые клетки
+    карты (Map.layers_version) или клетки игроков.
+
+    Поля строятся для двух масок: solid_layer и hard_solid_layer (для врагов, проходящих
+    сквозь разрушаемые блоки). Массивы с рамкой в одну клетку (индексация [y + 1, x + 1]).
+    """
+
+    def __init__(self) -> None:
+        self.map: "Map | None" = None
+        self.layers_version: int = -1
+        self.targets: tuple[tuple[int, int], ...] = ()
+        # Первая ось - passes_breakable: маски, расстояния и индексы направлений
+        self.solid: np.ndarray = np.ones((2, 1, 1), dtype=bool)
+        self.distances: np.ndarray = np.full((2, 1, 1), UNREACHABLE, dtype=np.int32)
+        self.directions: np.ndarray = np.full((2, 1, 1), -1, dtype=np.int8)
+        # Сколько раз поле строилось заново (для замеров)
+        self.rebuilds: int = 0
+
+    def update(self, game_map: "Map", targets: Iterable[tuple[int, int]]) -> bool:
+        """Пересчитать поле, если изменились твёрдые клетки карты или клетки игроков"""
+        targets = tuple(sorted(set(targets)))
+        if game_map is self.map and game_map.layers_version == self.layers_version and targets == self.targets:
+            return False
+        try:
+            self.map = game_map
+            self.layers_version = game_map.layers_version
+            self.targets = targets
+            self.solid = np.stack([game_map.solid_layer, game_map.hard_solid_layer])
+            self.distances = np.stack([self._build_distances(solid=solid, targets=targets) for solid in self.solid])
+            self.directions = np.stack([self._build_directions(distances=distances) for distances in self.distances])
+            self.rebuilds += 1
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding flow field: {e}", exc_info=True)
+            self.map = None
+            return False
+
+    @staticmethod
+    def _build_distances(solid: np.ndarray, targets: tuple[tuple[int, int], ...]) -> np.ndarray:
+        """BFS волной по всей маске: один шаг волны - одна клетка расстояния"""
+        passable: np.ndarray = ~solid
+        distances: np.ndarray = np.full(solid.shape, UNREACHABLE, dtype=np.int32)
+        frontier: np.ndarray = np.zeros(solid.shape, dtype=bool)
+        for x, y in targets:
+            # Клетка игрока - источник, даже если она твёрдая (игрок стоит на своей бомбе)
+            if 0 <= x < solid.shape[1] - 2 and 0 <= y < solid.shape[0] - 2:
+                frontier[y + 1, x + 1] = True
+        visited: np.ndarray = frontier.copy()
+        distance: int = 0
+        while frontier.any():
+            distances[frontier] = distance
+            distance += 1
+            grown: np.ndarray = np.zeros_like(frontier)
+            grown[1:, :] |= frontier[:-1, :]
+            grown[:-1, :] |= frontier[1:, :]
+            grown[:, 1:] |= frontier[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:]
+            frontier = grown & passable & ~visited
+            visited |= frontier
+        return distances
+
+    @staticmethod
+    def _build_directions(distances: np.ndarray) -> np.ndarray:
+        """Индекс соседа с наименьшим расстоянием (при равенстве - первый в CARDINAL_OFFSETS)"""
+        height: int = distances.shape[0] - 2
+        width: int = distances.shape[1] - 2
+        neighbours: np.ndarray = np.stack([
+            distances[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx] for dx, dy in CARDINAL_OFFSETS
+        ])
+        best: np.ndarray = neighbours.argmin(axis=0)
+        best_distance: np.ndarray = np.take_along_axis(neighbours, best[None], axis=0)[0]
+        directions: np.ndarray = np.full(distances.shape, -1, dtype=np.int8)
+        directions[1:-1, 1:-1] = np.where(best_distance < distances[1:-1, 1:-1], best, -1)
+        return directions
+
+    def lookup(
+        self,
+        cell_x: np.ndarray,
+        cell_y: np.ndarray,
+        passes_breakable: np.ndarray,
+        rngs: list[random.Random],
+    ) -> np.ndarray:
+        """
+        Направления (n, 2) для врагов в клетках cell_x, cell_y. Враги, от которых игроки
+        недостижимы, идут в случайную свободную сторону (rngs - random каждого врага).
+        """
+        result: np.ndarray = np.zeros((len(cell_x), 2), dtype=np.int64)
+        if self.map is None or not len(cell_x):
+            return result
+        layer: np.ndarray = passes_breakable.astype(np.int64)
+        iy: np.ndarray = np.clip(cell_y + 1, 0, self.directions.shape[1] - 1)
+        ix: np.ndarray = np.clip(cell_x + 1, 0, self.directions.shape[2] - 1)
+        directions: np.ndarray = self.directions[layer, iy, ix]
+        unreachable: np.ndarray = self.distances[layer, iy, ix] == UNREACHABLE
+
+        chasing: np.ndarray = directions >= 0
+        result[chasing] = OFFSETS[directions[chasing]]
+        # Недостижимых врагов мало: случайная сторона выбирается поштучно, как в next_direction
+        for row in np.flatnonzero(unreachable).tolist():
+            result[row] = self.next_direction(
+                cell_x=int(cell_x[row]),
+                cell_y=int(cell_y[row]),
+                passes_breakable=bool(passes_breakable[row]),
+                rng=rngs[row],
+            )
+        return result
+
+    def next_direction(self, cell_x: int, cell_y: int, passes_breakable: bool, rng: random.Random) -> tuple[int, int]:
+        """Направление одного врага (поштучное обновление), аналог lookup; rng - random врага"""
+        if self.map is None or not (0 <= cell_x < self.map.width and 0 <= cell_y < self.map.height):
+            return 0, 0
+        layer: int = int(passes_breakable)
+        if self.distances[layer, cell_y + 1, cell_x + 1] == UNREACHABLE:
+            choices: list[tuple[int, int]] = [
+                (dx, dy) for dx, dy in CARDINAL_OFFSETS if not self.solid[layer, cell_y + 1 + dy, cell_x + 1 + dx]
+            ]
+            return rng.choice(choices) if choices else (0, 0)
+        direction: int = int(self.directions[layer, cell_y + 1, cell_x + 1])
+        return CARDINAL_OFFSETS[direction] if direction >= 0 else (0, 0)
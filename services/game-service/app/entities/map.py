@@ -1,16 +1,37 @@
+import base64
 import logging
-from typing import List, Tuple
+import zlib
+from typing import Iterable, List, Tuple
 import numpy as np
 from .cell_type import CellType
-from ..models.map_models import MapData, MapUpdate
+from ..models.map_models import MapData
 
 logger = logging.getLogger(__name__)
 
+# Значения ячеек, через которые нельзя пройти
+SOLID_CELL_VALUES: frozenset[int] = frozenset({
+    CellType.SOLID_WALL.value,
+    CellType.BREAKABLE_BLOCK.value,
+    CellType.BLOCKED_BOMB.value,
+})
+CARDINAL_OFFSETS: tuple[tuple[int, int], ...] = ((-1, 0), (0, -1), (0, 1), (1, 0))
+
+# Кодировки grid в MapData: вложенный список (grid) или компактная строка/список в data.
+# Компактные формы записывают ячейки построчно: rle - пары [значение, длина серии],
+# base64 - буфер int8, zlib - буфер int8, сжатый zlib, в base64
+MAP_ENCODING_LIST: str = "list"
+MAP_ENCODING_RLE: str = "rle"
+MAP_ENCODING_BASE64: str = "base64"
+MAP_ENCODING_ZLIB: str = "zlib"
+MAP_ENCODINGS: tuple[str, ...] = (MAP_ENCODING_LIST, MAP_ENCODING_RLE, MAP_ENCODING_BASE64, MAP_ENCODING_ZLIB)
+
 
 class Map:
     """Упрощенный класс карты без логики генерации"""
     
     def __init__(self, width: int, height: int):
+        # Счётчик изменений булевых слоев: по нему FlowField узнаёт, что твёрдые клетки изменились
+        self.layers_version: int = 0
         self.new_map(width=width, height=height)
 
     def new_map(self, width: int, height: int) -> "Map":
@@ -20,7 +41,14 @@ class Map:
             # Initialize grid with empty cells using numpy array
             self.grid: np.ndarray = np.zeros((height, width), dtype=np.int8)
             # Для отслеживания изменений на карте
-            self.changed_cells: list[MapUpdate] = []
+            self.changed_cells: list[dict] = []
+            # Изменившиеся клетки, соседей которых игровой режим ещё не разбудил (спящие сущности)
+            self.wake_cells: set[tuple[int, int]] = set()
+            # Карта заменена целиком (новый уровень): клиентам нужна вся карта, а не changed_cells
+            self.replaced: bool = True
+            # Сколько активных зон взрыва (бомбы, мины) покрывает каждую клетку
+            self.blast_layer: np.ndarray = np.zeros((height, width), dtype=np.int16)
+            self.rebuild_layers()
 
             logger.info(f"Map initialized with dimensions {width}x{height}")
             return self
@@ -37,12 +65,56 @@ class Map:
             # Конвертируем в numpy array
             self.grid = np.array(grid_data, dtype=np.int8)
             self.changed_cells = []
+            self.wake_cells = set()
+            self.replaced = True
+            self.rebuild_layers()
             
             logger.info(f"Map loaded from template: {self.width}x{self.height}")
         except Exception as e:
             logger.error(f"Error loading map from template: {e}", exc_info=True)
             raise
     
+    def rebuild_layers(self) -> None:
+        """
+        Пересчитать булевы слои карты по grid. Нужно вызывать после прямой записи в grid,
+        set_cell_type обновляет слои сам.
+
+        Слои имеют рамку в одну клетку (индексация [y + 1, x + 1]): за пределами карты
+        solid_layer и wall_layer равны True, поэтому соседние клетки можно читать без
+        проверки границ.
+        """
+        try:
+            padded_shape: tuple[int, int] = (self.height + 2, self.width + 2)
+            self.solid_layer: np.ndarray = np.ones(padded_shape, dtype=bool)
+            self.wall_layer: np.ndarray = np.ones(padded_shape, dtype=bool)
+            # Стены и бомбы: твёрдые и для сущностей, проходящих сквозь разрушаемые блоки
+            self.hard_solid_layer: np.ndarray = np.ones(padded_shape, dtype=bool)
+            self.breakable_layer: np.ndarray = np.zeros(padded_shape, dtype=bool)
+            self.bomb_layer: np.ndarray = np.zeros(padded_shape, dtype=bool)
+
+            self.wall_layer[1:-1, 1:-1] = self.grid == CellType.SOLID_WALL.value
+            self.breakable_layer[1:-1, 1:-1] = self.grid == CellType.BREAKABLE_BLOCK.value
+            self.bomb_layer[1:-1, 1:-1] = self.grid == CellType.BLOCKED_BOMB.value
+            self.hard_solid_layer[1:-1, 1:-1] = self.wall_layer[1:-1, 1:-1] | self.bomb_layer[1:-1, 1:-1]
+            self.solid_layer[1:-1, 1:-1] = self.hard_solid_layer[1:-1, 1:-1] | self.breakable_layer[1:-1, 1:-1]
+            self.layers_version += 1
+        except Exception as e:
+            logger.error(f"Error rebuilding map layers: {e}", exc_info=True)
+            raise
+
+    def _update_layers(self, x: int, y: int, value: int) -> None:
+        """Обновить булевы слои для одной ячейки"""
+        px: int = x + 1
+        py: int = y + 1
+        self.wall_layer[py, px] = value == CellType.SOLID_WALL.value
+        self.breakable_layer[py, px] = value == CellType.BREAKABLE_BLOCK.value
+        self.bomb_layer[py, px] = value == CellType.BLOCKED_BOMB.value
+        self.hard_solid_layer[py, px] = self.wall_layer[py, px] or self.bomb_layer[py, px]
+        self.solid_layer[py, px] = value in SOLID_CELL_VALUES
+
+    def _in_padded_bounds(self, x: int, y: int) -> bool:
+        return -1 <= x <= self.width and -1 <= y <= self.height
+
     def get_cell_type(self, x: int, y: int) -> CellType:
         """Получает тип ячейки по указанным координатам"""
         try:
@@ -65,16 +137,14 @@ class Map:
             
             old_type = self.grid[y, x]
             self.grid[y, x] = cell_type.value
+            self._update_layers(x, y, cell_type.value)
             
             # Отслеживаем изменения если тип действительно изменился
             if old_type != cell_type.value:
-                self.changed_cells.append(
-                    MapUpdate(
-                        x = x,
-                        y = y,
-                        type = cell_type
-                    )
-                )
+                self.layers_version += 1
+                # Словарь с полями MapUpdate: изменения уходят в обновление тика без валидации pydantic
+                self.changed_cells.append({"x": int(x), "y": int(y), "type": cell_type.value})
+                self.wake_cells.add((int(x), int(y)))
                 logger.debug(f"Cell type changed at ({x}, {y}): {CellType(old_type).name} -> {cell_type.name}")
             
         except Exception as e:
@@ -82,25 +152,62 @@ class Map:
 
     def get_available_direction(self, x: int, y: int) -> list[tuple[int, int]]:
         # offsets = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)] # полная сетка с диагональными перемещениями
-        offsets = [(-1, 0), (0, -1), (0, 1), (1, 0)]# только верх низ право лево
-        neighbors = [(dx, dy) for dx, dy in offsets
-                     if 0 <= x + dx < self.width and 0 <= y + dy < self.height
-                     and self.grid[y + dy, x + dx] not in {CellType.SOLID_WALL.value, CellType.BREAKABLE_BLOCK.value, CellType.BLOCKED_BOMB.value}]
-        return neighbors
+        # только верх низ право лево, выход за карту отсекается рамкой solid_layer
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return []
+        solid: np.ndarray = self.solid_layer
+        return [(dx, dy) for dx, dy in CARDINAL_OFFSETS if not solid[y + dy + 1, x + dx + 1]]
     
     def is_wall(self, x: int, y: int) -> bool:
         """Проверяет, является ли ячейка твердой стеной"""
-        return self.get_cell_type(x, y) == CellType.SOLID_WALL
+        if not self._in_padded_bounds(x, y):
+            return True
+        return bool(self.wall_layer[y + 1, x + 1])
     
     def is_breakable_block(self, x: int, y: int) -> bool:
         """Проверяет, является ли ячейка разрушаемым блоком"""
-        return self.get_cell_type(x, y) == CellType.BREAKABLE_BLOCK
+        if not self._in_padded_bounds(x, y):
+            return False
+        return bool(self.breakable_layer[y + 1, x + 1])
+
+    def is_blocked_bomb(self, x: int, y: int) -> bool:
+        """Проверяет, заблокирована ли ячейка бомбой"""
+        if not self._in_padded_bounds(x, y):
+            return False
+        return bool(self.bomb_layer[y + 1, x + 1])
     
+    def is_hard_solid(self, x: int, y: int) -> bool:
+        """Проверяет, является ли ячейка стеной или бомбой (твёрдой без учёта разрушаемых блоков)"""
+        if not self._in_padded_bounds(x, y):
+            return True
+        return bool(self.hard_solid_layer[y + 1, x + 1])
+
     def is_solid(self, x: int, y: int) -> bool:
         """Проверяет, является ли ячейка твердой (стена или разрушаемый блок)"""
-        cell_type = self.get_cell_type(x, y)
-        return cell_type in {CellType.SOLID_WALL, CellType.BREAKABLE_BLOCK, CellType.BLOCKED_BOMB}
+        if not self._in_padded_bounds(x, y):
+            return True
+        return bool(self.solid_layer[y + 1, x + 1])
+
+    def is_passable(self, x: int, y: int) -> bool:
+        """Проверяет, можно ли пройти через ячейку"""
+        return not self.is_solid(x, y)
     
+    def add_blast_zone(self, cells: Iterable[tuple[int, int]]) -> None:
+        """Учесть клетки зоны взрыва оружия в blast_layer"""
+        for x, y in cells:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                self.blast_layer[y, x] += 1
+
+    def remove_blast_zone(self, cells: Iterable[tuple[int, int]]) -> None:
+        """Снять клетки зоны взрыва оружия из blast_layer"""
+        for x, y in cells:
+            if 0 <= x < self.width and 0 <= y < self.height and self.blast_layer[y, x] > 0:
+                self.blast_layer[y, x] -= 1
+
+    def is_in_blast_zone(self, x: int, y: int) -> bool:
+        """Проверяет, покрыта ли ячейка зоной взрыва хотя бы одного оружия"""
+        return 0 <= x < self.width and 0 <= y < self.height and self.blast_layer[y, x] > 0
+
     def is_empty(self, x: int, y: int) -> bool:
         """Проверяет, является ли ячейка пустой"""
         return self.get_cell_type(x, y) == CellType.EMPTY
@@ -228,9 +335,17 @@ class Map:
             return []
 
             
-    def get_map(self) -> MapData:
-        """Получает данные карты"""
+    def get_map(self, encoding: str = MAP_ENCODING_LIST) -> MapData:
+        """Получает данные карты (encoding - одна из MAP_ENCODINGS, неизвестная отдаётся списком)"""
         try:
+            if encoding != MAP_ENCODING_LIST and encoding in MAP_ENCODINGS:
+                return MapData(
+                    grid = None,
+                    width = self.width,
+                    height = self.height,
+                    encoding = encoding,
+                    data = self.encode_grid(encoding=encoding)
+                )
             return MapData(
                 grid = self.grid.tolist(),
                 width = self.width,
@@ -245,6 +360,19 @@ class Map:
                 height = self.height
             )
         
+    def encode_grid(self, encoding: str) -> str | list[int]:
+        """Компактная форма grid в кодировке rle, base64 или zlib"""
+        cells = np.ascontiguousarray(self.grid, dtype=np.int8).ravel()
+        if encoding == MAP_ENCODING_RLE:
+            starts = np.flatnonzero(np.diff(cells)) + 1
+            starts = np.concatenate(([0], starts))
+            lengths = np.diff(np.concatenate((starts, [cells.size])))
+            return np.column_stack((cells[starts], lengths)).ravel().tolist()
+        buffer = cells.tobytes()
+        if encoding == MAP_ENCODING_ZLIB:
+            buffer = zlib.compress(buffer)
+        return base64.b64encode(buffer).decode("ascii")
+
     def clear_changes(self) -> None:
         """Очищает список отслеживаемых изменений"""
         try:
@@ -255,7 +383,7 @@ class Map:
             logger.error(f"Error clearing map changes: {e}", exc_info=True)
             self.changed_cells = []
         
-    def get_changes(self) -> list[MapUpdate]:
+    def get_changes(self) -> list[dict]:
         """Возвращает список изменённых ячеек и очищает его"""
         try:
             changes = self.changed_cells.copy()
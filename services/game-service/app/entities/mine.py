@@ -10,6 +10,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 class Mine(Weapon):
+    __slots__ = ()
     weapon_type: WeaponType = WeaponType.MINE
     scale_size = 0.8
 
@@ -36,15 +37,11 @@ class Mine(Weapon):
         logger.debug(f"Mine created: position=({x}, {y}), owner={owner_id}")
 
 
-    def activate(self, **kwargs) -> None:
-        """Активировать взрыв мины"""
-        super().activate(**kwargs)
+    def detonate(self) -> None:
+        """Взорвать мину"""
+        super().detonate()
         logger.info(f"Mine {self.id} exploded!")
 
-    
-    def update(self, **kwargs) -> None:
-        """Обновить состояние мины"""
-        super().update(**kwargs)
 
 
     def get_damage_area(self) -> set[tuple[int, int]]:
@@ -1,10 +1,12 @@
 import time
 from abc import ABC
+from collections import deque
 from enum import Enum
 from typing import TYPE_CHECKING, TypedDict, NotRequired
 
 from .entity import Entity
 from .weapon import WeaponType
+from app.config import settings as service_settings
 import logging
 
 if TYPE_CHECKING:
@@ -36,14 +38,46 @@ class PlayerUpdate(TypedDict):
     invulnerable: NotRequired[bool]
     color: NotRequired[str]
     unit_type: NotRequired[UnitType]
+    input_seq: NotRequired[int | None]
 
 class Player(Entity, ABC):
+    __slots__ = (
+        "team_id",
+        "disconnected_time",
+        "disconnected",
+        "primary_weapon",
+        "primary_weapon_max_count",
+        "primary_weapon_power",
+        "secondary_weapon",
+        "secondary_weapon_max_count",
+        "secondary_weapon_power",
+        "inputs",
+        "input_queue",
+        "input_seq",
+    )
     # Colors for different players
     COLORS: list[str] = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
     # Input state
 
     scale_size = 0.8
     unit_type: UnitType = None
+    change_fields = (
+        "name",
+        "team_id",
+        "x",
+        "y",
+        "lives",
+        "primary_weapon",
+        "primary_weapon_max_count",
+        "primary_weapon_power",
+        "secondary_weapon",
+        "secondary_weapon_max_count",
+        "secondary_weapon_power",
+        "invulnerable",
+        "color",
+        "unit_type",
+        "input_seq",
+    )
 
     def __init__(
             self,
@@ -90,6 +124,10 @@ class Player(Entity, ABC):
                 'action1': False,
                 'weapon2': False
             }
+            # Кольцевой буфер (seq, inputs) от клиента, разбирается один раз в начале тика (apply_queued_inputs)
+            self.input_queue: deque[tuple[int | None, dict]] = deque(maxlen=service_settings.GAME_INPUT_BUFFER_SIZE)
+            # Номер последнего применённого ввода клиента, возвращается в обновлениях для согласования
+            self.input_seq: int | None = None
             
             logger.info(f"Player created: id={id}, unit_type={self.unit_type.value}")
         except Exception as e:
@@ -119,6 +157,35 @@ class Player(Entity, ABC):
             self.disconnected = False
         logger.debug("Updated player connection status: connected={self.connected}, disconnected_time={self.disconnected_time}")
 
+    def queue_inputs(self, inputs: dict, seq: int | None = None) -> None:
+        """Поставить ввод клиента в очередь до следующего тика; повтор последнего состояния только сдвигает seq"""
+        queue = self.input_queue
+        if queue and queue[-1][1] == inputs:
+            queue[-1] = (seq if seq is not None else queue[-1][0], queue[-1][1])
+        elif not queue and all(self.inputs.get(key) == value for key, value in inputs.items()):
+            if seq is not None:
+                queue.append((seq, {}))
+        else:
+            queue.append((seq, inputs))
+
+    def apply_queued_inputs(self) -> tuple[dict, int | None] | None:
+        """Применить накопленный с прошлого тика ввод одним set_inputs; возвращает применённый ввод и seq"""
+        queue = self.input_queue
+        if not queue:
+            return None
+        inputs = {}
+        seq = None
+        for input_seq, queued_inputs in queue:
+            inputs.update(queued_inputs)
+            if input_seq is not None:
+                seq = input_seq
+        queue.clear()
+        if inputs:
+            self.set_inputs(inputs)
+        if seq is not None:
+            self.input_seq = seq
+        return inputs, seq
+
     def set_inputs(self, inputs: "Inputs") -> None:
         """Update player inputs"""
         try:
@@ -140,6 +207,7 @@ class Player(Entity, ABC):
                 self.direction = (1, 0)
             
             if changed_inputs:
+                self.wake()
                 logger.debug(f"Player {self.id} inputs updated: {', '.join(changed_inputs)}")
         except Exception as e:
             logger.error(f"Error setting inputs for player {self.id}: {e}", exc_info=True)
@@ -162,6 +230,13 @@ class Player(Entity, ABC):
         return (dx, dy)
 
 
+    def is_idle(self) -> bool:
+        """Игрок без AI стоит, пока не нажата клавиша движения и нет нового ввода"""
+        if self.ai or self.input_queue:
+            return False
+        return not (self.inputs.get('up') or self.inputs.get('down') or self.inputs.get('left') or self.inputs.get('right'))
+
+
     def set_team(self, team_id: str) -> None:
         """Назначить игрока в команду"""
         self.team_id = team_id
@@ -186,29 +261,5 @@ class Player(Entity, ABC):
             self.lives = self.settings.player_max_lives
 
 
-    def get_changes(self, full_state: bool = False) -> PlayerUpdate:
-        previous_state = {} if full_state else getattr(self, "_state", {})
-        current_state = {
-            "name": self.name,
-            "team_id": self.team_id,
-            "x": self.x,
-            "y": self.y,
-            "lives": self.lives,
-            "primary_weapon": self.primary_weapon,
-            "primary_weapon_max_count": self.primary_weapon_max_count,
-            "primary_weapon_power": self.primary_weapon_power,
-            "secondary_weapon": self.secondary_weapon,
-            "secondary_weapon_max_count": self.secondary_weapon_max_count,
-            "secondary_weapon_power": self.secondary_weapon_power,
-            "invulnerable": self.invulnerable,
-            "color": self.color,
-            "unit_type": self.unit_type,
-        }
-        changes = {
-            "player_id": self.id
-        }
-        for key, value in current_state.items():
-            if key not in previous_state or previous_state[key] != value:
-                changes[key] = value
-        self._state = current_state
-        return changes
\ No newline at end of file
+    def get_changes(self, full_state: bool = False) -> PlayerUpdate | None:
+        return self._collect_changes(id_field="player_id", full_state=full_state)
\ No newline at end of file
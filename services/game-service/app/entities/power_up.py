@@ -35,7 +35,10 @@ class PowerUpUpdate(TypedDict):
 
 
 class PowerUp(Entity):
+    __slots__ = ("type",)
     scale_size = 0.7
+    change_fields = ("x", "y", "type")
+
     def __init__(
             self,
             x: float,
@@ -88,18 +91,5 @@ class PowerUp(Entity):
         except Exception as e:
             logger.error(f"Error applying powerup {self.type.name} to player {player.id}: {e}", exc_info=True)
 
-    def get_changes(self, full_state: bool = False) -> PowerUpUpdate:
-        previous_state = {} if full_state else getattr(self, "_state", {})
-        current_state = {
-            "x": self.x,
-            "y": self.y,
-            "type": self.type
-        }
-        changes = {
-            "entity_id": self.id
-        }
-        for key, value in current_state.items():
-            if key not in previous_state or previous_state[key] != value:
-                changes[key] = value
-        self._state = current_state
-        return PowerUpUpdate(**changes)
\ No newline at end of file
+    def get_changes(self, full_state: bool = False) -> PowerUpUpdate | None:
+        return self._collect_changes(id_field="entity_id", full_state=full_state)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import logging
+import math
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .entity import Entity
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpatialHash:
+    """
+    Равномерная сетка бакетов размером cell_size для broad-phase поиска сущностей.
+
+    Сущность регистрируется во всех бакетах, которые пересекает её AABB, поэтому
+    запрос по прямоугольнику или по клеткам карты возвращает только соседей,
+    которых затем нужно проверить точной проверкой коллизии.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        self.cell_size: float = cell_size
+        self.buckets: dict[tuple[int, int], dict[str, "Entity"]] = {}
+        # entity_id -> (min_cell_x, min_cell_y, max_cell_x, max_cell_y)
+        self._bounds: dict[str, tuple[int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._bounds
+
+    def _get_bounds(self, x: float, y: float, width: float, height: float) -> tuple[int, int, int, int]:
+        return (
+            math.floor(x / self.cell_size),
+            math.floor(y / self.cell_size),
+            math.floor((x + width) / self.cell_size),
+            math.floor((y + height) / self.cell_size),
+        )
+
+    def _add_to_buckets(self, entity: "Entity", bounds: tuple[int, int, int, int]) -> None:
+        min_x, min_y, max_x, max_y = bounds
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = self.buckets.get((cell_x, cell_y))
+                if bucket is None:
+                    bucket = self.buckets[(cell_x, cell_y)] = {}
+                bucket[entity.id] = entity
+
+    def _remove_from_buckets(self, entity_id: str, bounds: tuple[int, int, int, int]) -> None:
+        min_x, min_y, max_x, max_y = bounds
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = self.buckets.get((cell_x, cell_y))
+                if bucket is None:
+                    continue
+                bucket.pop(entity_id, None)
+                if not bucket:
+                    del self.buckets[(cell_x, cell_y)]
+
+    def update(self, entity: "Entity") -> None:
+        """Добавить сущность или перенести её в бакеты по текущей позиции"""
+        bounds = self._get_bounds(entity.x, entity.y, entity.width, entity.height)
+        previous = self._bounds.get(entity.id)
+        if previous == bounds:
+            return
+        if previous is not None:
+            self._remove_from_buckets(entity.id, previous)
+        self._add_to_buckets(entity, bounds)
+        self._bounds[entity.id] = bounds
+
+    def remove(self, entity_id: str) -> None:
+        bounds = self._bounds.pop(entity_id, None)
+        if bounds is not None:
+            self._remove_from_buckets(entity_id, bounds)
+
+    def sync(self, entities: dict[str, "Entity"]) -> None:
+        """Привести индекс к содержимому словаря сущностей игрового режима и их текущим позициям"""
+        try:
+            if len(self._bounds) != len(entities) or self._bounds.keys() != entities.keys():
+                for entity_id in [entity_id for entity_id in self._bounds if entity_id not in entities]:
+                    self.remove(entity_id)
+            cell_size: float = self.cell_size
+            floor = math.floor
+            for entity_id, entity in entities.items():
+                x: float = entity.x
+                y: float = entity.y
+                bounds = (
+                    floor(x / cell_size),
+                    floor(y / cell_size),
+                    floor((x + entity.width) / cell_size),
+                    floor((y + entity.height) / cell_size),
+                )
+                # Большинство сущностей за тик не покидают свои бакеты
+                previous = self._bounds.get(entity_id)
+                if previous == bounds:
+                    continue
+                if previous is not None:
+                    self._remove_from_buckets(entity_id, previous)
+                self._add_to_buckets(entity, bounds)
+                self._bounds[entity_id] = bounds
+        except Exception as e:
+            logger.error(f"Error syncing spatial hash: {e}", exc_info=True)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self._bounds.clear()
+
+    def query(self, x: float, y: float, width: float, height: float) -> list["Entity"]:
+        """Вернуть сущности из бакетов, пересекаемых прямоугольником"""
+        min_x, min_y, max_x, max_y = self._get_bounds(x, y, width, height)
+        if min_x == max_x and min_y == max_y:
+            bucket = self.buckets.get((min_x, min_y))
+            return list(bucket.values()) if bucket else []
+        found: dict[str, "Entity"] = {}
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = self.buckets.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return list(found.values())
+
+    def query_entity(self, entity: "Entity") -> list["Entity"]:
+        """Вернуть соседей сущности (саму сущность исключаем)"""
+        return [
+            other for other in self.query(entity.x, entity.y, entity.width, entity.height)
+            if other.id != entity.id
+        ]
+
+    def query_cells(self, cells: Iterable[tuple[int, int]]) -> list["Entity"]:
+        """Вернуть сущности, пересекающие хотя бы одну из клеток карты"""
+        found: dict[str, "Entity"] = {}
+        for cell_x, cell_y in cells:
+            bucket = self.buckets.get((cell_x, cell_y))
+            if bucket:
+                found.update(bucket)
+        return list(found.values())
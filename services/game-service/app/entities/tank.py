@@ -14,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 
 class Tank(Player):
+    __slots__ = ()
     scale_size = 0.8
     unit_type: UnitType = UnitType.TANK
 
@@ -0,0 +1,78 @@
+import logging
+import math
+from enum import Enum
+
+
+logger = logging.getLogger(__name__)
+
+# Допуск на погрешность float при переводе секунд в тики
+TICK_EPSILON: float = 1e-9
+
+
+class TimerEvent(Enum):
+    # Взрыв установленного оружия по таймеру (bomb_timer)
+    WEAPON_FUSE = "WEAPON_FUSE"
+    # Конец взрыва: оружие убирается с карты (bomb_explosion_duration)
+    WEAPON_CLEAR = "WEAPON_CLEAR"
+    # Конец бессмертия после попадания
+    INVULNERABILITY_END = "INVULNERABILITY_END"
+    # Удаление уничтоженного врага после анимации (destroy_animation_time)
+    ENEMY_REMOVE = "ENEMY_REMOVE"
+
+
+class TimerWheel:
+    """
+    Хешированное колесо таймеров игры с ключом по тику.
+
+    Событие кладётся в слот tick % size и хранит тик срабатывания, поэтому события дальше
+    одного оборота колеса лежат в том же слоте до своего тика. За тик просматривается только
+    слот этого тика: сущности, у которых ничего не происходит, не стоят ничего.
+
+    Время копится в секундах (delta_time тика бывает разным), тик - целая часть time / tick_duration.
+    События не отменяются: обработчик сам проверяет, что сущность ещё существует и событие актуально.
+    """
+
+    def __init__(self, tick_duration: float, size: int = 256) -> None:
+        self.tick_duration: float = tick_duration
+        self.size: int = size
+        self.tick: int = 0
+        self.time: float = 0.0
+        # Записи слота: (тик срабатывания, порядковый номер, событие, id сущности)
+        self._slots: list[list[tuple[int, int, TimerEvent, str]]] = [[] for _ in range(size)]
+        self._sequence: int = 0
+        self.pending: int = 0
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def schedule(self, delay: float, event: TimerEvent, entity_id: str) -> int:
+        """Запланировать событие через delay секунд, не раньше следующего тика. Возвращает тик срабатывания"""
+        fire_tick: int = max(self.tick + 1, math.ceil((self.time + delay) / self.tick_duration - TICK_EPSILON))
+        self._slots[fire_tick % self.size].append((fire_tick, self._sequence, event, entity_id))
+        self._sequence += 1
+        self.pending += 1
+        return fire_tick
+
+    def advance(self, delta_time: float) -> list[tuple[TimerEvent, str]]:
+        """Продвинуть время и вернуть сработавшие события в порядке тика и планирования"""
+        self.time += delta_time
+        target_tick: int = int(self.time / self.tick_duration + TICK_EPSILON)
+        fired: list[tuple[int, int, TimerEvent, str]] = []
+        if target_tick <= self.tick:
+            return []
+        try:
+            # Больше оборота за раз - каждый слот просматривается один раз
+            for tick in range(self.tick + 1, self.tick + 1 + min(target_tick - self.tick, self.size)):
+                slot = self._slots[tick % self.size]
+                if not slot:
+                    continue
+                due = [entry for entry in slot if entry[0] <= target_tick]
+                if due:
+                    slot[:] = [entry for entry in slot if entry[0] > target_tick]
+                    fired.extend(due)
+        except Exception as e:
+            logger.error(f"Error advancing timer wheel: {e}", exc_info=True)
+        self.tick = target_tick
+        self.pending -= len(fired)
+        fired.sort(key=lambda entry: (entry[0], entry[1]))
+        return [(event, entity_id) for _, _, event, entity_id in fired]
@@ -38,8 +38,28 @@ class WeaponUpdate(TypedDict):
 
 class Weapon(Entity, ABC):
     """Базовый класс для всех видов оружия"""
+    __slots__ = (
+        "power",
+        "owner_id",
+        "activated",
+        "exploded",
+        "explosion_cells_grid",
+        "destroyed_blocks",
+        "_blast_zone_cells",
+    )
     weapon_type: WeaponType = None
     scale_size = 0.8
+    # "explosion_cells" — не обычный атрибут, его изменения отмечаются явно
+    change_fields = (
+        "x",
+        "y",
+        "weapon_type",
+        "direction",
+        "activated",
+        "exploded",
+        "explosion_cells",
+        "owner_id",
+    )
 
 
     def __init__(
@@ -67,48 +87,64 @@ class Weapon(Entity, ABC):
         self.owner_id: str = owner_id
 
         self.activated: bool = False
-        # self.exploded: bool = False
-
-        self.timer: float = 0#self.settings.bomb_timer # По умолчанию таймер для бомбы, может быть переопределен в другом оружии
-        # self.exploded: bool = False
-        self.activated_timer: float = 0
-
-        # Explosion cells will be populated when the bomb explodes (or pre-filled in Bomb/Mine __init__)
-        self.explosion_cells_grid: set[tuple[int, int]] = set()
-        # Blocks destroyed by this explosion (filled in activate() when iterating explosion_cells_grid)
-        self.destroyed_blocks: list[tuple[int, int]] = []
+        # Выставляется по окончании взрыва (событие WEAPON_CLEAR таймерного колеса игры)
+        self.exploded: bool = False
+
+        # Оружие из пула (reinit) очищает свои контейнеры вместо создания новых
+        if hasattr(self, "explosion_cells_grid"):
+            self.explosion_cells_grid.clear()
+            self.destroyed_blocks.clear()
+            self._blast_zone_cells.clear()
+        else:
+            # Клетки взрыва заполняются при взрыве (или заранее в __init__ Bomb/Mine)
+            self.explosion_cells_grid: set[tuple[int, int]] = set()
+            # Блоки, разрушенные этим взрывом (заполняются в activate() при обходе explosion_cells_grid)
+            self.destroyed_blocks: list[tuple[int, int]] = []
+            # Клетки explosion_cells_grid, уже учтённые в map.blast_layer
+            self._blast_zone_cells: set[tuple[int, int]] = set()
 
         logger.debug(f"Weapon created: type={self.weapon_type.value}, position=({x}, {y}), owner={owner_id}")
 
 
     def activate(self, **kwargs) -> bool:
-        """Activate weapon (explosion, shot, etc.). Explosion geometry must already be in explosion_cells_grid
-        (filled by _fill_explosion_area_geometry in Bomb/Mine __init__, or by subclass before super().activate()).
-        Destroys breakable blocks for each cell in explosion_cells_grid, then marks activated and runs handler.
+        """Активировать оружие (взрыв, выстрел и т.д.). Геометрия взрыва уже должна быть в explosion_cells_grid
+        (её заполняет _fill_explosion_area_geometry в __init__ Bomb/Mine или подкласс в detonate()).
+        Оружие отмечается взорванным и передаётся в handle_weapon_explosion, который отвечает за разрушение
+        блоков и проверку попаданий (режим игры обрабатывает их пачкой за тик). Без обработчика оружие
+        само разрушает блоки в своей зоне.
         """
         if not self.activated:
             handle_weapon_explosion: Callable = kwargs.get('handle_weapon_explosion')
-            # Destroy breakable blocks for each cell in pre-filled explosion area (no geometry calc here)
-            for cell_x, cell_y in self.explosion_cells_grid:
-                if self.map.is_breakable_block(cell_x, cell_y):
-                    if self.map.destroy_block(cell_x, cell_y):
-                        self.destroyed_blocks.append((cell_x, cell_y))
-            self.activated = True
+            self.detonate()
             if handle_weapon_explosion:
                 handle_weapon_explosion(self)
+            else:
+                self.destroy_blocks()
             return True
         return False
 
 
-    def update(self, **kwargs) -> None:
-        """Обновить состояние оружия, по умолчанию бомбы"""
-        # handle_weapon_explosion: Callable = kwargs.get('handle_weapon_explosion')
-        self.timer += kwargs['delta_time']
+    def detonate(self) -> None:
+        """Отметить оружие взорванным без обработки последствий (используется при цепной реакции)"""
+        self.register_blast_zone()
+        self.activated = True
+
+
+    def destroy_blocks(self) -> None:
+        """Разрушить разрушаемые блоки в заранее заполненной зоне взрыва (без расчёта геометрии)"""
+        for cell_x, cell_y in self.explosion_cells_grid:
+            if self.map.destroy_block(cell_x, cell_y):
+                self.destroyed_blocks.append((cell_x, cell_y))
 
-        if not self.activated and self.timer >= self.settings.bomb_timer:
-            self.activate(**kwargs)
-        elif self.activated:
-            self.activated_timer += kwargs.get("delta_time", 0)
+
+    def get_fuse_time(self) -> float | None:
+        """Секунды от установки до взрыва; None для движущегося оружия, которое обновляется каждый тик"""
+        return self.settings.bomb_timer
+
+
+    def update(self, **kwargs) -> None:
+        """Установленное оружие не обновляется каждый тик: взрыв и его окончание — события таймерного колеса игры"""
+        pass
 
     
     def get_damage_area(self) -> set[tuple[int, int]]:
@@ -145,6 +181,24 @@ class Weapon(Entity, ABC):
                 if self.map.is_breakable_block(check_x, check_y):
                     break
 
+        self.register_blast_zone()
+
+
+    def register_blast_zone(self) -> None:
+        """Добавить explosion_cells_grid в blast_layer карты (только ещё не учтённые клетки)"""
+        new_cells: set[tuple[int, int]] = self.explosion_cells_grid - self._blast_zone_cells
+        if new_cells:
+            self.map.add_blast_zone(new_cells)
+            self._blast_zone_cells |= new_cells
+            self.mark_changed("explosion_cells")
+
+
+    def release_blast_zone(self) -> None:
+        """Убрать клетки оружия из blast_layer карты; вызывается при удалении оружия из игры"""
+        if self._blast_zone_cells:
+            self.map.remove_blast_zone(self._blast_zone_cells)
+            self._blast_zone_cells.clear()
+
 
     def is_entity_in_blast_zone(self, entity_x: float, entity_y: float) -> bool:
         """Check if entity at (entity_x, entity_y) is inside this weapon's blast zone (grid cell)."""
@@ -155,27 +209,12 @@ class Weapon(Entity, ABC):
 
 
     def is_exploded(self) -> bool:
-        if self.activated and self.activated_timer >= self.settings.bomb_explosion_duration:
-            return True
-        return False
+        return self.exploded
+
+    def get_change_value(self, field: str):
+        if field == "explosion_cells":
+            return self.explosion_cells_grid.copy()
+        return super().get_change_value(field)
 
-    def get_changes(self, full_state: bool = False) -> WeaponUpdate:
-        previous_state = {} if full_state else getattr(self, "_state", {})
-        current_state = {
-            "x": self.x,
-            "y": self.y,
-            "weapon_type": self.weapon_type,
-            "direction": self.direction,
-            "activated": self.activated,
-            "exploded": self.is_exploded(),
-            "explosion_cells": self.explosion_cells_grid.copy(),
-            "owner_id": self.owner_id
-        }
-        changes = {
-            "entity_id": self.id
-        }
-        for key, value in current_state.items():
-            if key not in previous_state or previous_state[key] != value:
-                changes[key] = value
-        self._state = current_state
-        return WeaponUpdate(**changes)
\ No newline at end of file
+    def get_changes(self, full_state: bool = False) -> WeaponUpdate | None:
+        return self._collect_changes(id_field="entity_id", full_state=full_state)
\ No newline at end of file
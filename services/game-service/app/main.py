@@ -91,6 +91,7 @@ async def lifespan(app: FastAPI):
     try:
         logger.info("Shutting down Game service")
 
+        game_coordinator.stop_workers()
         await stop_grpc(grpc_server)
         await ai_inference_service.disconnect()
 
@@ -11,7 +11,7 @@ from app.entities.game_mode import GameModeType
 from app.entities.player import UnitType, PlayerUpdate
 from app.entities.power_up import PowerUpUpdate
 from app.entities.weapon import WeaponUpdate
-from app.models.map_models import MapUpdate, PlayerState
+from app.models.map_models import MapData, MapUpdate, PlayerState
 from app.models.team_models import TeamModeSettings
 
 
@@ -21,14 +21,34 @@ class GameUpdateEvent(BaseModel):
     error: bool = False
     message: Optional[str] = None
     map_update: list[MapUpdate] = None
+    # Карта целиком (в кодировке GAME_MAP_ENCODING), если она заменена - например, при переходе на новый уровень
+    map: Optional[MapData] = None
     players_update: dict[str, PlayerUpdate] = None
     enemies_update: dict[str, EnemyUpdate] = None
     weapons_update: dict[str, WeaponUpdate] = None
     power_ups_update: dict[str, PowerUpUpdate] = None
+    # Сущности, пропавшие с прошлого обновления (неизменившиеся сущности в *_update не передаются)
+    players_removed: list[str] = None
+    enemies_removed: list[str] = None
+    weapons_removed: list[str] = None
+    power_ups_removed: list[str] = None
     #TODO Добавить teams
     game_id: str = None
+    # Номер тика игры (монотонно растёт, в том числе между пропущенными пустыми тиками)
+    tick: Optional[int] = None
+    # Номер опубликованного обновления игры (растёт на 1, пропуск означает потерянное обновление)
+    seq: Optional[int] = None
     # Оставшееся время обратного отсчёта (None = таймер не активен)
     time_remaining: Optional[float] = None
+    # Клетки [x, y] сущностей из *_update (только при interest_radius) для фильтрации по области интереса
+    entity_cells: Optional[dict[str, list[int]]] = None
+
+
+# Поля обновления тика: игровой цикл собирает обновление словарём с этими ключами без валидации pydantic,
+# GameUpdateEvent остаётся схемой этого словаря
+GAME_UPDATE_FIELDS: tuple[str, ...] = tuple(GameUpdateEvent.model_fields)
+# Поля heartbeat - обновления тика без изменений (seq добавляется при публикации)
+GAME_HEARTBEAT_FIELDS: tuple[str, ...] = ("game_id", "tick", "time_remaining")
 
 
 # class GamePlayerInfo(BaseModel):
@@ -134,6 +154,11 @@ class GameSettingsUpdate(BaseModel):
     time_limit: Optional[int] = 300  # в секундах
     score_limit: Optional[int] = 10
     rounds_count: Optional[int] = 15
+    # Квантование обновлений тика: координаты целыми шагами клетки, таймеры в мс, направления индексами
+    quantize_updates: bool = False
+    position_precision: int = Field(64, ge=1)  # шагов координаты на клетку
+    # Радиус области интереса в клетках: webapi отправляет игроку только сущности рядом с ним (0 = выключено)
+    interest_radius: int = Field(0, ge=0)
 
 
 class GameCreateSettings(GameSettingsUpdate):
@@ -174,6 +199,17 @@ class GameSettings(BaseModel):
     enemy_count_multiplier: float = 1.0
     enemy_invulnerable_time: float = 2.0
     enemy_ai_controlled: bool = True
+    vectorized_movement: bool = True  # Пакетное движение врагов через EntityStore (False - по объектам)
+    vectorized_movement_min_enemies: int = 32  # Ниже этого количества накладные расходы numpy больше выигрыша
+    # Враги без AI преследуют ближайшего игрока по общему полю FlowField (GHOST - сквозь разрушаемые блоки)
+    enemy_chase_players: bool = False
+    # Уровни детализации врагов по расстоянию (в клетках) до ближайшего игрока: дальние обновляются реже.
+    # Действует только при interest_radius (клиенты без интерполяции не должны видеть редких шагов)
+    enemy_lod: bool = False
+    enemy_lod_near_distance: int = 8  # не дальше - каждый тик (не меньше interest_radius)
+    enemy_lod_far_distance: int = 16  # не ближе - раз в enemy_lod_far_interval тиков и без запросов к ai-service
+    enemy_lod_mid_interval: int = 2
+    enemy_lod_far_interval: int = 6
 
     # Настройки очков
     block_destroy_score: int = 50
@@ -198,6 +234,8 @@ class GameSettings(BaseModel):
     enemy_hit_score: int = 500
     game_over_score: int = -500# не учитываем если игра проиграна после player destroyed
     in_blast_zone_score: int = -5
+    # Добавлять в наблюдение AI канал зон взрыва (map.blast_layer), меняет размер grid наблюдения
+    ai_danger_channel: bool = False
     compensation_move_toward_enemy_score: int = 2
 
 
@@ -233,6 +271,12 @@ class GameSettings(BaseModel):
     time_limit: Optional[int] = 300  # в секундах
     score_limit: Optional[int] = 10
     rounds_count: Optional[int] = 15
+    # Квантование обновлений тика: координаты целыми шагами клетки, таймеры в мс, направления индексами
+    quantize_updates: bool = False
+    position_precision: int = 64  # шагов координаты на клетку (шаг cell_size / position_precision пикселей)
+    # Радиус области интереса в клетках: обновления помечаются клетками сущностей (entity_cells),
+    # webapi отправляет игроку только сущности в этом радиусе от него (0 = выключено)
+    interest_radius: int = 0
 
     @computed_field(return_type=TeamModeSettings)
     @property
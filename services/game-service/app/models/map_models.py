@@ -252,6 +252,7 @@ class PlayerState(BaseModel):
     invulnerable: bool
     color: str
     unit_type: UnitType
+    input_seq: Optional[int] = None
 
 
 class EnemyState(BaseModel):
@@ -287,6 +288,9 @@ class MapData(BaseModel):
     grid: list | None
     width: int
     height: int
+    # Компактная кодировка карты (Map.get_map): при ней grid = None, а ячейки записаны в data
+    encoding: str | None = None
+    data: str | list[int] | None = None
 
 
 class MapState(BaseModel):
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+from enum import Enum
 from typing import Optional
 import nats
 import numpy as np
@@ -13,7 +14,12 @@ logger = logging.getLogger(__name__)
 
 class NumpyAwareEncoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, np.integer):
+        # Enum и множества приходят из обновлений тика, которые собираются без model_dump
+        if isinstance(obj, Enum):
+            return obj.value
+        elif isinstance(obj, (set, frozenset)):
+            return list(obj)
+        elif isinstance(obj, np.integer):
             return int(obj)
         elif isinstance(obj, np.floating):
             return float(obj)
@@ -61,7 +67,14 @@ class NatsRepository:
             return False
         return await self._send_event_with_reconnect(subject=subject, payload_bytes=payload_bytes)
 
-    async def _send_event_with_reconnect(self, subject: str, payload_bytes: bytes, max_retries: int = 3, retry_delay: float = 1.0) -> bool:
+    async def _send_event_with_reconnect(
+            self,
+            subject: str,
+            payload_bytes: bytes,
+            max_retries: int = 3,
+            retry_delay: float = 1.0,
+            headers: Optional[dict[str, str]] = None,
+    ) -> bool:
         """
         Send an event to NATS with reconnect logic.
         Returns True if successful, False otherwise.
@@ -77,7 +90,7 @@ class NatsRepository:
                     attempt += 1
                     continue
 
-                await nc.publish(subject=subject, payload=payload_bytes)
+                await nc.publish(subject=subject, payload=payload_bytes, headers=headers)
                 logger.debug(f"Successfully published to NATS subject: {subject}")
                 return True
             except nats.errors.ConnectionClosedError as e:
@@ -122,6 +135,16 @@ class NatsRepository:
         payload_bytes = json.dumps(payload, cls=NumpyAwareEncoder).encode()
         return await self._send_event_with_reconnect(subject=subject, payload_bytes=payload_bytes)
 
+    async def publish_bytes(self, subject: str, payload_bytes: bytes, content_type: str) -> bool:
+        """
+        Публикация уже сериализованных данных с заголовком Content-Type
+        """
+        return await self._send_event_with_reconnect(
+            subject=subject,
+            payload_bytes=payload_bytes,
+            headers={"Content-Type": content_type}
+        )
+
     async def subscribe(self, subject: str, callback) -> None:
         """
         Подписка на события NATS
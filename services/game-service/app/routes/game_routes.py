@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 from fastapi import APIRouter, HTTPException, Depends, Query
 from app.auth import get_current_user
+from app.coordinators.game_worker_pool import forward_to_game_worker
 from app.dependenties import game_coordinator
 from app.models.game_models import (
     GameInfo, GameListItem, GameFilter, GameSettingsUpdate,
@@ -37,7 +38,19 @@ async def get_games(
 ):
     """Получить список игр с фильтрацией"""
     coordinator = get_game_coordinator()
-    
+    if coordinator.worker_pool is None:
+        all_games = await filter_games(filter=filter, coordinator=coordinator)
+    else:
+        # Игры распределены по воркерам: каждый фильтрует свои без пагинации, страница выбирается после объединения
+        all_games = await coordinator.worker_pool.call_route(route=filter_games, filter=filter)
+
+    # Применяем пагинацию
+    total_games = all_games[filter.offset:filter.offset + filter.limit]
+    return total_games
+
+
+async def filter_games(filter: GameFilter, coordinator: "GameCoordinator") -> List[GameListItem]:
+    """Игры координатора, подходящие под фильтр, без пагинации (при GAME_WORKERS выполняется в каждом воркере)"""
     # Получаем все активные игры
     all_games = []
     logger.info(f"coordinator.games: {coordinator.games}")
@@ -80,12 +93,11 @@ async def get_games(
             logger.error(f"Exception: {e}")
             continue
     logger.info(f"all_games: {all_games}")
-    # Применяем пагинацию
-    total_games = all_games[filter.offset:filter.offset + filter.limit]
-    return total_games
+    return all_games
 
 
 @router.get("/{game_id}", response_model=GameInfo)
+@forward_to_game_worker(get_game_coordinator)
 async def get_game(
     game_id: str,
     current_user: dict = Depends(get_current_user)
@@ -193,6 +205,7 @@ async def get_game(
 
 
 @router.put("/{game_id}/settings", response_model=StandardResponse)
+@forward_to_game_worker(get_game_coordinator)
 async def update_game_settings(
     game_id: str,
     settings_update: GameSettingsUpdate,
@@ -228,6 +241,7 @@ async def update_game_settings(
 
 
 @router.put("/{game_id}/status", response_model=StandardResponse)
+@forward_to_game_worker(get_game_coordinator)
 async def update_game_status(
     game_id: str,
     status_update: GameStatusUpdate,
@@ -247,6 +261,7 @@ async def update_game_status(
                 if game_service.status != GameStatus.PENDING:
                     raise HTTPException(status_code=400, detail="Game can only be started from PENDING status")
                 game_service.start_game()
+                coordinator.wake_game(game_id=game_id)
                 message = "Game started successfully"
             
             case "pause":
@@ -259,6 +274,7 @@ async def update_game_status(
                 if game_service.status != GameStatus.PAUSED:
                     raise HTTPException(status_code=400, detail="Only paused games can be resumed")
                 game_service.resume_game()
+                coordinator.wake_game(game_id=game_id)
                 message = "Game resumed successfully"
             
             case _:
@@ -276,6 +292,7 @@ async def update_game_status(
 
 
 @router.post("/{game_id}/players", response_model=StandardResponse)
+@forward_to_game_worker(get_game_coordinator)
 async def add_player_to_game(
     game_id: str,
     player_action: PlayerAction,
@@ -314,6 +331,7 @@ async def add_player_to_game(
 
 
 @router.delete("/{game_id}/players/{player_id}", response_model=StandardResponse)
+@forward_to_game_worker(get_game_coordinator)
 async def remove_player_from_game(
     game_id: str,
     player_id: str,
@@ -347,6 +365,7 @@ async def remove_player_from_game(
 
 
 @router.delete("/{game_id}", response_model=StandardResponse)
+@forward_to_game_worker(get_game_coordinator)
 async def delete_game(
     game_id: str,
     current_user: dict = Depends(get_current_user)
@@ -366,6 +385,7 @@ async def delete_game(
     
     try:
         # Удаляем игру из координатора
+        game_service.close_replay()
         del coordinator.games[game_id]
         
         return StandardResponse(
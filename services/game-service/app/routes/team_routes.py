@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 
 from app.auth import get_current_user
 from app.coordinators.game_coordinator import GameCoordinator
+from app.coordinators.game_worker_pool import forward_to_game_worker
 from app.models.team_models import Team, TeamCreate, TeamUpdate, PlayerTeamAction, TeamDistributionRequest
 
 from app.entities.game_status import GameStatus
@@ -19,6 +20,7 @@ def get_game_coordinator() -> GameCoordinator:
 
 
 @router.get("/{game_id}", response_model=List[Team])
+@forward_to_game_worker(get_game_coordinator)
 async def get_teams(
     game_id: str,
     current_user: dict = Depends(get_current_user),
@@ -37,6 +39,7 @@ async def get_teams(
 
 
 @router.post("/{game_id}", response_model=Team, status_code=status.HTTP_201_CREATED)
+@forward_to_game_worker(get_game_coordinator)
 async def create_team(
     game_id: str,
     team_data: TeamCreate,
@@ -68,6 +71,7 @@ async def create_team(
 
 
 @router.put("/{game_id}/{team_id}", response_model=Team)
+@forward_to_game_worker(get_game_coordinator)
 async def update_team(
     game_id: str,
     team_id: str,
@@ -100,6 +104,7 @@ async def update_team(
 
 
 @router.delete("/{game_id}/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
+@forward_to_game_worker(get_game_coordinator)
 async def delete_team(
     game_id: str,
     team_id: str,
@@ -128,6 +133,7 @@ async def delete_team(
 
 
 @router.post("/{game_id}/{team_id}/players", response_model=Team)
+@forward_to_game_worker(get_game_coordinator)
 async def add_player_to_team(
     game_id: str,
     team_id: str,
@@ -178,6 +184,7 @@ async def add_player_to_team(
 
 
 @router.delete("/{game_id}/{team_id}/players/{player_id}", response_model=Team)
+@forward_to_game_worker(get_game_coordinator)
 async def remove_player_from_team(
     game_id: str,
     team_id: str,
@@ -215,6 +222,7 @@ async def remove_player_from_team(
 
 
 @router.post("/{game_id}/distribute", response_model=List[Team])
+@forward_to_game_worker(get_game_coordinator)
 async def distribute_players(
     game_id: str,
     request: TeamDistributionRequest,
@@ -252,6 +260,7 @@ async def distribute_players(
 
 
 @router.get("/{game_id}/validate")
+@forward_to_game_worker(get_game_coordinator)
 async def validate_teams(
     game_id: str,
     current_user: dict = Depends(get_current_user),
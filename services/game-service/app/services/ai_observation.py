@@ -19,10 +19,13 @@ CELL_TERRAIN: dict[int, float] = {
 DEFAULT_WINDOW_SIZE: int = 7
 GRID_PLAYER_INFERENCE_CHANNELS: int = 6
 GRID_ENEMY_INFERENCE_CHANNELS: int = 4
+# опциональный канал зон взрыва (map.blast_layer), добавляется последним
+GRID_DANGER_CHANNELS: int = 1
 # closest_enemy, lives, enemies, bombs_left, invuln, in_blast_zone, time_left
 STATS_SIZE: int = 7
 GRID_ENEMY_INFERENCE_SIZE: int = GRID_ENEMY_INFERENCE_CHANNELS * DEFAULT_WINDOW_SIZE * DEFAULT_WINDOW_SIZE
 GRID_PLAYER_INFERENCE_SIZE: int = GRID_PLAYER_INFERENCE_CHANNELS * DEFAULT_WINDOW_SIZE * DEFAULT_WINDOW_SIZE
+GRID_DANGER_SIZE: int = GRID_DANGER_CHANNELS * DEFAULT_WINDOW_SIZE * DEFAULT_WINDOW_SIZE
 
 
 @dataclass
@@ -153,6 +156,7 @@ def build_observation(
     weapons_positions: list[tuple[float, float]],
     power_ups_positions: list[tuple[float, float]],
     window_size: int = DEFAULT_WINDOW_SIZE,
+    danger_grid: np.ndarray | None = None,
 ) -> ObservationData:
     width_cells: int = max(1, map_width)
     height_cells: int = max(1, map_height)
@@ -242,15 +246,21 @@ def build_observation(
             window_size=window_size,
         )
     if is_player:
-        grid: np.ndarray = np.stack(
-            [terrain_window, ch_self, ch_players, ch_weapons, ch_enemies, ch_powerups],
-            axis=0,
-        )
+        channels: list[np.ndarray] = [terrain_window, ch_self, ch_players, ch_weapons, ch_enemies, ch_powerups]
     else:
-        grid: np.ndarray = np.stack(
-            [terrain_window, ch_self, ch_players, ch_weapons],
-            axis=0,
-        )
+        channels = [terrain_window, ch_self, ch_players, ch_weapons]
+
+    if danger_grid is not None:
+        # Клетки, покрытые хотя бы одной зоной взрыва; за пределами карты опасности нет
+        ch_danger: np.ndarray = np.zeros((window_size, window_size), dtype=np.float32)
+        danger_window: np.ndarray = danger_grid[
+            start_y:start_y + window_size,
+            start_x:start_x + window_size,
+        ]
+        ch_danger[:danger_window.shape[0], :danger_window.shape[1]] = danger_window > 0
+        channels.append(ch_danger)
+
+    grid: np.ndarray = np.stack(channels, axis=0)
 
     lives_norm: float = float(lives) / float(max(1, max_lives))
     enemy_norm: float = float(enemy_count) / float(max(1, max_enemies))
@@ -6,6 +6,7 @@ from typing import Dict, Any, Callable, TYPE_CHECKING
 from nats.aio.msg import Msg
 
 from ..config import settings
+from .update_codec import MSGPACK_CONTENT_TYPE
 
 if TYPE_CHECKING:
     from ..repositories.nats_repository import NatsRepository
@@ -88,6 +89,22 @@ class EventService:
             specific_suffix=data.get("game_id")
         )
 
+    async def send_game_update_packed(self, game_id: str, payload: bytes) -> bool:
+        """Отправка обновления игры, закодированного в msgpack"""
+        return await self.nats_repository.publish_bytes(
+            subject=f"game.update.{game_id}",
+            payload_bytes=payload,
+            content_type=MSGPACK_CONTENT_TYPE
+        )
+
+    async def send_game_keyframe(self, data: dict) -> bool:
+        """Отправка снимка состояния игры для resync клиентов"""
+        return await self.nats_repository.publish_event(
+            subject_base="game.keyframe",
+            payload=data,
+            specific_suffix=data.get("game_id")
+        )
+
     async def send_game_over(self, game_id: str) -> bool:
         """Отправка события окончания игры"""
         return await self.nats_repository.publish_event(
@@ -1,28 +1,39 @@
 import asyncio
+import math
 import random
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+
+import numpy as np
 
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 
 from .team_service import TeamService
 from .ai_inference_service import AIInferenceService
 from .ai_action_mapper import action_to_inputs, action_to_direction
 from .ai_observation import build_observation, get_closest_enemy_distance
 from ..entities import Entity
-from ..entities.map import Map
+from ..entities.map import MAP_ENCODING_LIST, Map
 from ..entities.player import Player, PlayerUpdate
-from ..entities.enemy import Enemy, EnemyUpdate
-from ..entities.weapon import Weapon, WeaponType, WeaponUpdate, WeaponAction
+from ..entities.enemy import Enemy, EnemyLod, EnemyUpdate
+from ..entities.entity_store import EntityStore
+from ..entities.flow_field import FlowField
+from ..entities.spatial_hash import SpatialHash
+from ..entities.timer_wheel import TimerEvent, TimerWheel
+from ..entities.weapon import Weapon, WeaponType, WeaponAction
 from ..entities.bomb import Bomb
 from ..entities.bullet import Bullet
 from ..entities.mine import Mine
 from ..entities.power_up import PowerUp, PowerUpType
 from ..models.game_models import GameSettings
 from ..services.map_service import MapService
+from ..services.replay_log import ReplayIds
+from ..services.tick_profiler import TickSample
+from ..services.update_quantizer import UpdateQuantizer
 from ..models.map_models import MapState, PlayerState, EnemyState, WeaponState, PowerUpState, MapData
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -36,11 +47,17 @@ class GameModeService(ABC):
         map_service: MapService,
         team_service: TeamService = None,
         ai_inference_service: AIInferenceService | None = None,
+        rng: random.Random | None = None,
+        replay_ids: ReplayIds | None = None,
     ):
         self.settings: GameSettings = game_settings
         self.map_service: MapService = map_service
         self.team_service = team_service  # TeamService injection
         self.ai_inference_service: AIInferenceService | None = ai_inference_service
+        # random игры (GameService.rng): спавн, выпадение усилений, random врагов
+        self.rng: random.Random = rng if rng is not None else random.Random()
+        # id новых врагов, оружия и усилений в игре с повтором (см. ReplayIds)
+        self.replay_ids: ReplayIds | None = replay_ids
         
         # Состояние игры
         self.players: Dict[str, Player] = {}
@@ -52,8 +69,52 @@ class GameModeService(ABC):
         self.game_over: bool = False
         self.last_update_time: float = time.time()
         self._ai_pending_tasks: dict[str, asyncio.Task] = {}
+        # Повтор игры (GameService): действия AI, применённые на шаге при записи, и действия шага при воспроизведении
+        self.recorded_ai_actions: list[tuple[str, int]] | None = None
+        self.replay_ai_actions: dict[str, int] | None = None
+        # Колоночное хранилище координат врагов для пакетного движения
+        self.entity_store: EntityStore = EntityStore(settings=self.settings)
+        # Поле преследования игроков, общее для врагов игры (GameSettings.enemy_chase_players)
+        self.flow_field: FlowField = FlowField()
+        # Счётчик тиков для разнесения обновлений средних и дальних врагов (GameSettings.enemy_lod)
+        self._lod_tick: int = 0
+        # Spatial hash (бакеты по cell_size) для broad-phase проверки коллизий между сущностями
+        self.players_index: SpatialHash = SpatialHash(cell_size=self.settings.cell_size)
+        self.enemies_index: SpatialHash = SpatialHash(cell_size=self.settings.cell_size)
+        self.power_ups_index: SpatialHash = SpatialHash(cell_size=self.settings.cell_size)
+        # Свободные объекты оружия и усилений по классу: удалённые из игры переинициализируются для новых
+        self._entity_pool: dict[type[Entity], list[Entity]] = defaultdict(list)
+        # Сколько объектов оружия и усилений взято из пула и сколько создано заново
+        self.pool_stats: dict[str, int] = {
+            "weapons_pooled": 0,
+            "weapons_created": 0,
+            "power_ups_pooled": 0,
+            "power_ups_created": 0,
+        }
+        # Оружие, взорвавшееся за текущий тик, обрабатывается одной фазой детонации
+        self._pending_explosions: list[Weapon] = []
+        # Колесо таймеров: взрыв и конец взрыва оружия, конец бессмертия, удаление уничтоженных врагов
+        self.timer_wheel: TimerWheel = TimerWheel(tick_duration=1 / settings.GAME_UPDATE_FPS)
+        # События оружия, сработавшие в начале тика, обрабатываются в фазе оружия
+        self._weapon_events: list[tuple[TimerEvent, str]] = []
+        # Оружие, которое обновляется каждый тик (летящие пули), остальное трогают только события колеса
+        self.moving_weapons: Dict[str, Weapon] = {}
+        # Оружие, изменения которого нужно отдать в текущем тике (новое и с сработавшими событиями)
+        self._touched_weapons: Dict[str, Weapon] = {}
+        # Идентификаторы сущностей, видимых клиентам после прошлого тика (для *_removed)
+        self._visible_ids: dict[str, set[str]] = {"players": set(), "enemies": set(), "weapons": set(), "power_ups": set()}
         # Обратный отсчёт времени игры (0 = таймер отключён)
         self.time_remaining: float = float(self.settings.time_limit or 0)
+        # Секунда таймера, отправленная клиентам последней (клиент показывает целые секунды)
+        self._reported_seconds: int = math.ceil(self.time_remaining)
+        # Были ли в последнем update изменения для клиентов (пустые тики координатор не публикует)
+        self.changed: bool = False
+        # Замер текущего тика профилировщиком (None, если тик не попал в выборку)
+        self.tick_sample: TickSample | None = None
+        # Квантование координат и таймеров в обновлениях (None - обновления передаются как есть)
+        self.update_quantizer: UpdateQuantizer | None = (
+            UpdateQuantizer(settings=self.settings) if self.settings.quantize_updates else None
+        )
     
     async def initialize_map(self) -> None:
         """Инициализировать карту для игры"""
@@ -119,7 +180,7 @@ class GameModeService(ABC):
             
             # Рандомизируем spawn позиции если включена настройка (для шаблонов карт)
             if self.settings.randomize_spawn_positions:
-                random.shuffle(spawn_positions)
+                self.rng.shuffle(spawn_positions)
             
             # Найдем свободную позицию
             used_positions = set()
@@ -136,7 +197,7 @@ class GameModeService(ABC):
             
             # Назначаем позицию (рандомно или первую доступную в зависимости от настройки)
             if self.settings.randomize_spawn_assignment:
-                x, y = random.choice(available_positions)
+                x, y = self.rng.choice(available_positions)
             else:
                 x, y = available_positions[0]
             #TODO вынести логику рассчета относительных координат в саму карту,
@@ -210,36 +271,70 @@ class GameModeService(ABC):
             # Пропускаем обновление если игра окончена
             if self.game_over:
                 logger.debug("Game is over, skipping update")
+                self.changed = False
                 return {}
 
             result = defaultdict(dict)
+            sample = self.tick_sample
+            if sample:
+                sample.start_phase()
+            self.advance_timers(delta_time=delta_time)
+            self.wake_entities_near_changed_cells()
 
             # Обновляем врагов если включены
             if self.settings.enable_enemies:
-                for enemy in list(self.enemies.values()):
-                    result["enemies_update"].update({enemy.id: self.update_enemy(enemy=enemy, delta_time=delta_time)})
+                if self.settings.enemy_chase_players:
+                    self.update_flow_field()
+                if (
+                    self.settings.vectorized_movement
+                    and len(self.enemies) >= self.settings.vectorized_movement_min_enemies
+                ):
+                    self.update_enemies_batched(delta_time=delta_time, result=result)
+                else:
+                    for enemy, enemy_delta_time in self.get_enemy_steps(delta_time=delta_time):
+                        self.add_entity_changes(result, "enemies_update", enemy.id, self.update_enemy(enemy=enemy, delta_time=enemy_delta_time))
+            self.enemies_index.sync(self.enemies)
+            self.power_ups_index.sync(self.power_ups)
+            self.wake_players_near_enemies()
+            if sample:
+                sample.end_phase("enemies")
 
             # Обновляем игроков
+            alive_players: set[str] = set()
             for player in list(self.players.values()):
                 if player.is_alive():
-                    result["players_update"].update({player.id: self.update_player(player=player, delta_time=delta_time)})
+                    alive_players.add(player.id)
+                    if not player.sleeping:
+                        self.add_entity_changes(result, "players_update", player.id, self.update_player(player=player, delta_time=delta_time))
+            self.players_index.sync(self.players)
+            if sample:
+                sample.end_phase("players")
 
             # Обновляем оружие
-            for weapon in list(self.weapons.values()):
-                result["weapons_update"].update({weapon.id: self.update_weapon(weapon=weapon, delta_time=delta_time)})
-
+            self.update_weapons(delta_time=delta_time, result=result)
+            if sample:
+                sample.end_phase("weapons")
+            self.resolve_explosions(result=result)
+            if sample:
+                sample.end_phase("explosions")
 
             for power_up in self.power_ups.values():
-                result["power_ups_update"].update({power_up.id: power_up.get_changes()})
+                self.add_entity_changes(result, "power_ups_update", power_up.id, power_up.get_changes())
+            self.collect_removed_entities(result=result, alive_players=alive_players)
+            if sample:
+                sample.end_phase("power_ups")
             
             # Передаём оставшееся время в результат обновления
             if self.time_remaining > 0 or (self.settings.time_limit and self.settings.time_limit > 0):
                 result["time_remaining"] = self.time_remaining
+            if self.update_quantizer is not None:
+                self.update_quantizer.apply(result)
 
             # Проверяем завершение игры
             if self.is_game_over():
                 await self.handle_game_over()
-            logger.debug(f"Game update event: {result}")
+            self.changed = self.has_changes(result)
+            logger.debug("Game update event: %s", result)
             return result
             
         except Exception as e:
@@ -252,10 +347,45 @@ class GameModeService(ABC):
         if task and not task.done():
             task.cancel()
 
+    def _ai_action_due(self, entity: Entity) -> bool:
+        """Может ли сущность получить действие AI; при воспроизведении повтора - есть ли у неё действие на этом шаге"""
+        if self.replay_ai_actions is not None:
+            return entity.id in self.replay_ai_actions
+        return entity.can_handle_ai_action()
+
+    def _apply_ai_action(self, *, entity: Entity, action: int, is_cooperative: bool = False):
+        entity_id = entity.id
+        if self.recorded_ai_actions is not None:
+            self.recorded_ai_actions.append((entity_id, action))
+        entity.ai_last_action_time = time.time()
+        logger.debug(
+            f"Applying AI action={action} to entity={entity_id} "
+            f"(is_cooperative={is_cooperative}), current pos=({entity.x:.1f}, {entity.y:.1f})"
+        )
+        if isinstance(entity, Player):
+            if action == 5:
+                is_placed_weapon = self.place_weapon(player=entity, weapon_action=WeaponAction.PLACEWEAPON1)
+                entity.set_inputs(inputs=action_to_inputs(action=0))
+            else:
+                entity.set_inputs(inputs=action_to_inputs(action=action))
+            #TODO Доработать под 2 других действия активировать 1 weapon и применить 2 weapon после того как они будут вообще имплементированы
+        else:
+            entity.direction = action_to_direction(action=action, current=entity.direction)
+            entity.move_timer = 0
+            logger.debug(
+                f"Enemy {entity_id} direction set to {entity.direction}, "
+                f"target cells reset"
+            )
+
     def _handle_ai_action(self, *, entity: Entity, is_cooperative: bool = False):
         entity_id = entity.id
         is_player = isinstance(entity, Player)
 
+        if self.replay_ai_actions is not None:
+            # Воспроизведение повтора: действие из записи вместо запроса инференса
+            self._apply_ai_action(entity=entity, action=self.replay_ai_actions.pop(entity_id), is_cooperative=is_cooperative)
+            return
+
         if entity_id in self._ai_pending_tasks:
             task = self._ai_pending_tasks[entity_id]
             if task.done():
@@ -266,26 +396,9 @@ class GameModeService(ABC):
                     action = 0
 
                 if action is not None:
-                    entity.ai_last_action_time = time.time()
-                    logger.debug(
-                        f"Applying AI action={action} to entity={entity_id} "
-                        f"(is_cooperative={is_cooperative}), current pos=({entity.x:.1f}, {entity.y:.1f})"
-                    )
-                    if is_player:
-                        if action == 5:
-                            is_placed_weapon = self.place_weapon(player=entity, weapon_action=WeaponAction.PLACEWEAPON1)
-                            entity.set_inputs(inputs=action_to_inputs(action=0))
-                        else:
-                            entity.set_inputs(inputs=action_to_inputs(action=action))
-                        #TODO Доработать под 2 других действия активировать 1 weapon и применить 2 weapon после того как они будут вообще имплементированы
-                    else:
-                        entity.direction = action_to_direction(action=action, current=entity.direction)
-                        entity.move_timer = 0
-                        logger.debug(
-                            f"Enemy {entity_id} direction set to {entity.direction}, "
-                            f"target cells reset"
-                        )
+                    self._apply_ai_action(entity=entity, action=action, is_cooperative=is_cooperative)
             return
+        observation_started_at: float | None = time.perf_counter() if self.tick_sample else None
         players_positions: list[tuple[float, float]] = []
         max_enemies: int = 0
         if is_player:
@@ -358,7 +471,11 @@ class GameModeService(ABC):
             players_positions=players_positions,
             weapons_positions=weapons_positions,
             power_ups_positions=power_ups_positions,
+            danger_grid=self.map.blast_layer if self.settings.ai_danger_channel else None,
         )
+        if observation_started_at is not None:
+            # Входит в фазы enemies/players, но выводится отдельно
+            self.tick_sample.add("ai_observation", time.perf_counter() - observation_started_at)
         # Use game_id as session_id to track episodes per game
         # This allows LSTM states to be reset when a new game starts
         game_id: str | None = getattr(self.settings, 'game_id', None)
@@ -383,10 +500,8 @@ class GameModeService(ABC):
 
     def is_entity_in_any_blast_zone(self, entity_x: float, entity_y: float) -> bool:
         """Check if entity at (entity_x, entity_y) is inside any active weapon's blast zone."""
-        for weapon in self.weapons.values():
-            if weapon.is_entity_in_blast_zone(entity_x=entity_x, entity_y=entity_y):
-                return True
-        return False
+        cell_size: int = self.settings.cell_size
+        return self.map.is_in_blast_zone(round(entity_x / cell_size), round(entity_y / cell_size))
 
     def update_player(self, player: Player, delta_time: float) -> PlayerUpdate | None:
         """Обновить одного игрока"""
@@ -396,24 +511,26 @@ class GameModeService(ABC):
             #     # self.players.pop(player.id)
             #     return player.get_changes()
 
-            if player.ai and player.can_handle_ai_action():
+            if player.ai and self._ai_action_due(player):
                 self._handle_ai_action(entity=player, is_cooperative=False)
 
             player.update(delta_time=delta_time)
 
             # Проверка коллизии с усилениями
-            for power_up in list(self.power_ups.values()):
+            for power_up in self.power_ups_index.query_entity(player):
                 if self.check_entity_collision(entity1=player, entity2=power_up):
                     logger.info(f"Player {player.id} collected powerup {power_up.type.name}")
                     self.apply_power_up(player, power_up)
 
             # Проверка коллизии с врагами
             if not player.invulnerable and self.settings.enable_enemies:
-                for enemy in self.enemies.values():
+                for enemy in self.enemies_index.query_entity(player):
                     if not enemy.destroyed and self.check_entity_collision(entity1=player, entity2=enemy):
                         logger.info(f"Player {player.id} hit by enemy {enemy.type.value}")
                         self.handle_player_hit(player=player)
-            return player.get_changes()
+            changes = player.get_changes()
+            self.try_sleep(entity=player)
+            return changes
                         
         except Exception as e:
             logger.error(f"Error updating player {player.id}: {e}", exc_info=True)
@@ -422,35 +539,225 @@ class GameModeService(ABC):
         """Обновить одного врага"""
         try:
             if enemy.destroyed:
+                # Врага удалит событие ENEMY_REMOVE после анимации уничтожения
                 self._cancel_ai_task(enemy.id)
-                enemy.destroy_animation_timer += delta_time
-                if enemy.destroy_animation_timer >= self.settings.destroy_animation_time:
-                    self.enemies.pop(enemy.id)
-                return enemy.get_changes()
+                changes = enemy.get_changes()
+                self.try_sleep(entity=enemy)
+                return changes
 
-            if enemy.ai and enemy.can_handle_ai_action():
+            # Дальние враги (enemy_lod) не запрашивают действия у ai-service
+            if enemy.ai and enemy.lod_tier != EnemyLod.FAR and self._ai_action_due(enemy):
                 self._handle_ai_action(entity=enemy, is_cooperative=False)
 
             enemy.update(delta_time=delta_time)
-            return enemy.get_changes()
+            changes = enemy.get_changes()
+            self.try_sleep(entity=enemy)
+            return changes
 
         except Exception as e:
             logger.error(f"Error updating enemy {enemy.id}: {e}", exc_info=True)
 
 
-    def update_weapon(self, weapon: Weapon, delta_time: float) -> WeaponUpdate | None:
-        """Обновить оружие"""
+    def update_enemies_batched(self, delta_time: float, result: dict) -> None:
+        """Обновить всех врагов за один проход по EntityStore вместо поштучного enemy.update"""
+        try:
+            # Враги с одинаковым шагом времени двигаются одним вызовом advance (шаг отличается только с enemy_lod)
+            groups: dict[float, tuple[list[Enemy], list[Enemy], list[Enemy]]] = {}
+            for enemy, enemy_delta_time in self.get_enemy_steps(delta_time=delta_time):
+                if enemy.destroyed:
+                    self.add_entity_changes(result, "enemies_update", enemy.id, self.update_enemy(enemy=enemy, delta_time=enemy_delta_time))
+                    continue
+                continuous, grid_based, chasing = groups.setdefault(enemy_delta_time, ([], [], []))
+                if enemy.ai:
+                    if enemy.lod_tier != EnemyLod.FAR and self._ai_action_due(enemy):
+                        self._handle_ai_action(entity=enemy, is_cooperative=False)
+                    grid_based.append(enemy)
+                elif enemy.flow_field is not None:
+                    chasing.append(enemy)
+                else:
+                    continuous.append(enemy)
+
+            for group_delta_time, (continuous, grid_based, chasing) in groups.items():
+                self.entity_store.advance(
+                    game_map=self.map,
+                    continuous=continuous,
+                    grid_based=grid_based,
+                    chasing=chasing,
+                    flow_field=self.flow_field,
+                    delta_time=group_delta_time,
+                )
+                for enemy in continuous + grid_based + chasing:
+                    self.add_entity_changes(result, "enemies_update", enemy.id, enemy.get_changes())
+                    self.try_sleep(entity=enemy)
+
+        except Exception as e:
+            logger.error(f"Error in batched enemy update: {e}", exc_info=True)
+
+    def get_enemy_steps(self, delta_time: float) -> list[tuple[Enemy, float]]:
+        """
+        Враги, обновляемые в этом тике, и их шаг времени (с GameSettings.enemy_lod - накопленный за пропущенные тики).
+        Без interest_radius клиенты получают всех врагов и без интерполяции увидели бы их скачки - enemy_lod не действует.
+        """
+        enemies: list[Enemy] = [enemy for enemy in self.enemies.values() if not enemy.sleeping]
+        if not self.settings.enemy_lod or not self.settings.interest_radius or not enemies:
+            return [(enemy, delta_time) for enemy in enemies]
+        try:
+            return self._select_enemies_by_lod(enemies=enemies, delta_time=delta_time)
+        except Exception as e:
+            logger.error(f"Error selecting enemies by level of detail: {e}", exc_info=True)
+            return [(enemy, delta_time) for enemy in enemies]
+
+    def _select_enemies_by_lod(self, enemies: list[Enemy], delta_time: float) -> list[tuple[Enemy, float]]:
+        """
+        Уровень детализации врага - по расстоянию (в клетках, как у interest_radius) до ближайшего живого игрока.
+        Ближние обновляются каждый тик, средние и дальние - в каждый свой интервал тиков одним шагом за время
+        с прошлого обновления врага. Ближняя граница не меньше interest_radius: враги в области интереса живого игрока
+        обновляются каждый тик, крупные шаги остальных видят только клиенты выбывших игроков (им видна вся игра).
+        """
+        settings = self.settings
+        cell_size = settings.cell_size
+        self._lod_tick += 1
+        near_distance: int = max(settings.enemy_lod_near_distance, settings.interest_radius)
+        far_distance: int = max(settings.enemy_lod_far_distance, near_distance + 1)
+
+        targets: np.ndarray = np.array(
+            [self._get_center_cell(player) for player in self.players.values() if not player.destroyed],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        count: int = len(enemies)
+        if len(targets):
+            cell_x: np.ndarray = np.fromiter((enemy.x + enemy.width / 2 for enemy in enemies), np.float64, count) // cell_size
+            cell_y: np.ndarray = np.fromiter((enemy.y + enemy.height / 2 for enemy in enemies), np.float64, count) // cell_size
+            distances: np.ndarray = np.maximum(
+                np.abs(cell_x[:, None] - targets[None, :, 0]),
+                np.abs(cell_y[:, None] - targets[None, :, 1]),
+            ).min(axis=1)
+        else:
+            distances = np.full(count, far_distance)
+        tiers: np.ndarray = np.where(distances <= near_distance, 0, np.where(distances < far_distance, 1, 2))
+
+        # Тики обновления уровней одинаковы для всех врагов уровня: враги с одним шагом двигаются одним вызовом advance
+        due: np.ndarray = tiers == 0
+        if self._lod_tick % max(settings.enemy_lod_mid_interval, 1) == 0:
+            due |= tiers == 1
+        if self._lod_tick % max(settings.enemy_lod_far_interval, 1) == 0:
+            due |= tiers == 2
+
+        now: float = self.timer_wheel.time
+        lod_tiers: tuple[EnemyLod, ...] = (EnemyLod.NEAR, EnemyLod.MID, EnemyLod.FAR)
+        steps: list[tuple[Enemy, float]] = []
+        for index in np.flatnonzero(due).tolist():
+            enemy = enemies[index]
+            enemy.lod_tier = lod_tiers[tiers[index]]
+            updated_at = enemy.lod_updated_at
+            steps.append((enemy, delta_time if updated_at is None else now - updated_at))
+            enemy.lod_updated_at = now
+        return steps
+
+    def try_sleep(self, entity: Entity) -> None:
+        """Усыпить стоящую сущность; игрок рядом с живым врагом не засыпает (столкновение с врагом проверяет игрок)"""
+        if entity.is_idle() and not (isinstance(entity, Player) and self._has_enemy_nearby(player=entity)):
+            entity.sleep()
+
+    def _has_enemy_nearby(self, player: Player) -> bool:
+        return self.settings.enable_enemies and any(
+            not enemy.destroyed for enemy in self.enemies_index.query_entity(player)
+        )
+
+    def wake_players_near_enemies(self) -> None:
+        """Разбудить спящих игроков, к которым подошёл враг"""
+        for player in self.players.values():
+            if player.sleeping and self._has_enemy_nearby(player=player):
+                player.wake()
+
+    def wake_entities_near_changed_cells(self) -> None:
+        """Разбудить сущности в клетках вокруг изменившихся клеток карты (разрушенный блок, поставленная или взорванная бомба)"""
+        try:
+            if self.map is None or not self.map.wake_cells:
+                return
+            cells: set[tuple[int, int]] = {
+                (x + dx, y + dy) for x, y in self.map.wake_cells for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            }
+            self.map.wake_cells.clear()
+            for entity in self.players_index.query_cells(cells) + self.enemies_index.query_cells(cells):
+                entity.wake()
+        except Exception as e:
+            logger.error(f"Error waking entities near changed cells: {e}", exc_info=True)
+
+    def update_flow_field(self) -> None:
+        """Пересчитать поле преследования, если изменились твёрдые клетки карты или клетки живых игроков"""
+        try:
+            if self.map is None:
+                return
+            self.flow_field.update(
+                game_map=self.map,
+                targets=[self._get_center_cell(player) for player in self.players.values() if not player.destroyed],
+            )
+        except Exception as e:
+            logger.error(f"Error updating flow field: {e}", exc_info=True)
+
+    def advance_timers(self, delta_time: float) -> None:
+        """Продвинуть колесо таймеров и обработать сработавшие события (события оружия - в фазе оружия)"""
+        try:
+            for event, entity_id in self.timer_wheel.advance(delta_time=delta_time):
+                if event == TimerEvent.INVULNERABILITY_END:
+                    entity = self.players.get(entity_id) or self.enemies.get(entity_id)
+                    if entity is not None and entity.invulnerable:
+                        logger.debug(f"Entity {entity.id} ({entity.name}) is no longer invulnerable")
+                        entity.invulnerable = False
+                        entity.invulnerable_timer = 0
+                elif event == TimerEvent.ENEMY_REMOVE:
+                    enemy = self.enemies.get(entity_id)
+                    if enemy is not None and enemy.destroyed:
+                        self._cancel_ai_task(enemy.id)
+                        self.enemies.pop(enemy.id)
+                else:
+                    self._weapon_events.append((event, entity_id))
+        except Exception as e:
+            logger.error(f"Error advancing game timers: {e}", exc_info=True)
+
+    def update_weapons(self, delta_time: float, result: dict) -> None:
+        """Обновить летящее оружие и оружие со сработавшими событиями колеса таймеров"""
         try:
-            weapon.update(delta_time=delta_time, handle_weapon_explosion=self.handle_weapon_explosion)
-            if weapon.is_exploded():
-                #здесь оружие взорвалось и взрыв завершен
-                self.weapons.pop(weapon.id)
-                return weapon.get_changes()
-            return weapon.get_changes()
+            for weapon in list(self.moving_weapons.values()):
+                weapon.update(delta_time=delta_time, handle_weapon_explosion=self.handle_weapon_explosion)
+                if weapon.activated:
+                    self.moving_weapons.pop(weapon.id)
+                self._touched_weapons[weapon.id] = weapon
+
+            for event, weapon_id in self._weapon_events:
+                weapon = self.weapons.get(weapon_id)
+                if weapon is None:
+                    continue
+                if event == TimerEvent.WEAPON_FUSE:
+                    # Оружие, взорванное раньше цепной реакцией, повторно не взрывается
+                    weapon.activate(handle_weapon_explosion=self.handle_weapon_explosion)
+                    self._touched_weapons[weapon.id] = weapon
+                elif event == TimerEvent.WEAPON_CLEAR:
+                    #здесь оружие взорвалось и взрыв завершен
+                    self.weapons.pop(weapon.id)
+                    self._touched_weapons.pop(weapon.id, None)
+                    weapon.release_blast_zone()
+                    weapon.exploded = True
+                    self.add_entity_changes(result, "weapons_update", weapon.id, weapon.get_changes())
+                    self._release_to_pool(entity=weapon)
+            self._weapon_events.clear()
+
+            for weapon in self._touched_weapons.values():
+                self.add_entity_changes(result, "weapons_update", weapon.id, weapon.get_changes())
+            self._touched_weapons.clear()
 
         except Exception as e:
-            logger.error(f"Error updating weapon {weapon.id}: {e}", exc_info=True)
+            logger.error(f"Error updating weapons: {e}", exc_info=True)
 
+    def reset_weapons_and_power_ups(self) -> None:
+        """Убрать всё оружие и усиления (смена уровня); их события в колесе таймеров будут пропущены"""
+        self.weapons = {}
+        self.power_ups = {}
+        self.moving_weapons = {}
+        self._touched_weapons = {}
+        self._weapon_events.clear()
+        self._pending_explosions.clear()
 
     def place_weapon(self, player: Player, weapon_action: WeaponAction) -> bool:
         """Применить оружие игрока"""
@@ -490,7 +797,9 @@ class GameModeService(ABC):
                     return False
 
             if weapon_type == WeaponType.BOMB:
-                weapon = Bomb(
+                weapon = self._acquire_from_pool(
+                    entity_class=Bomb,
+                    kind="weapons",
                     x=grid_x * self.settings.cell_size,
                     y=grid_y * self.settings.cell_size,
                     size=self.settings.cell_size,
@@ -501,7 +810,9 @@ class GameModeService(ABC):
 
                 )
             elif weapon_type == WeaponType.BULLET:
-                weapon = Bullet(
+                weapon = self._acquire_from_pool(
+                    entity_class=Bullet,
+                    kind="weapons",
                     x=grid_x * self.settings.cell_size,
                     y=grid_y * self.settings.cell_size,
                     size=self.settings.cell_size,
@@ -512,7 +823,9 @@ class GameModeService(ABC):
                     settings=self.settings
                 )
             elif weapon_type == WeaponType.MINE:
-                weapon = Mine(
+                weapon = self._acquire_from_pool(
+                    entity_class=Mine,
+                    kind="weapons",
                     x=grid_x * self.settings.cell_size,
                     y=grid_y * self.settings.cell_size,
                     size=self.settings.cell_size,
@@ -524,6 +837,12 @@ class GameModeService(ABC):
                 return False
             
             self.weapons[weapon.id] = weapon
+            self._touched_weapons[weapon.id] = weapon
+            fuse_time: float | None = weapon.get_fuse_time()
+            if fuse_time is None:
+                self.moving_weapons[weapon.id] = weapon
+            else:
+                self.timer_wheel.schedule(delay=fuse_time, event=TimerEvent.WEAPON_FUSE, entity_id=weapon.id)
             return True
             
         except Exception as e:
@@ -532,35 +851,142 @@ class GameModeService(ABC):
 
 
     def handle_weapon_explosion(self, weapon: Weapon) -> None:
-        """Обработать взрыв бомбы"""
+        """Поставить взорвавшееся оружие в очередь фазы детонации"""
+        self._pending_explosions.append(weapon)
+
+
+    def resolve_explosions(self, result: dict | None = None) -> None:
+        """
+        Фаза детонации: разрешить все взрывы тика вместе с цепной реакцией.
+
+        Цепочка обходится в ширину по индексу "клетка -> оружие", затем клетки всех взрывов
+        объединяются, и разрушение блоков и проверки попаданий выполняются один раз
+        по общей области. Клетка приписывается первому в цепочке оружию (очки и атакующий).
+        """
+        if not self._pending_explosions:
+            return
         try:
-            #если есть разрушенные блоки, то начисляем очки и генерируем бонусы
-            for x, y in weapon.get_destroyed_blocks():
-                # Начисляем очки команде владельца бомбы
-                self.team_service.add_score_to_player_team(weapon.owner_id, self.settings.block_destroy_score)
-                # Шанс появления усиления
-                if random.random() < self.settings.powerup_drop_chance:
-                    self.spawn_power_up(x=x * self.settings.cell_size , y=y * self.settings.cell_size)
+            cell_size = self.settings.cell_size
+            queue: deque[Weapon] = deque(self._pending_explosions)
+            self._pending_explosions.clear()
+
+            # Неактивированное оружие по клетке его центра
+            weapons_by_cell: dict[tuple[int, int], list[Weapon]] = defaultdict(list)
+            for other_weapon in self.weapons.values():
+                if not other_weapon.activated:
+                    weapons_by_cell[(
+                        int((other_weapon.x + other_weapon.width / 2) / cell_size),
+                        int((other_weapon.y + other_weapon.height / 2) / cell_size),
+                    )].append(other_weapon)
+
+            blast_area: dict[tuple[int, int], Weapon] = {}
+            chained: list[Weapon] = []
+            while queue:
+                weapon = queue.popleft()
+                # Оружие уберётся с карты по окончании взрыва
+                self.timer_wheel.schedule(
+                    delay=self.settings.bomb_explosion_duration,
+                    event=TimerEvent.WEAPON_CLEAR,
+                    entity_id=weapon.id,
+                )
+                for cell in weapon.get_damage_area():
+                    blast_area.setdefault(cell, weapon)
+                    for other_weapon in weapons_by_cell.pop(cell, ()):
+                        if not other_weapon.activated:
+                            other_weapon.detonate()
+                            chained.append(other_weapon)
+                            queue.append(other_weapon)
+
+            # Разрушение блоков по объединённой области взрыва
+            for (x, y), weapon in blast_area.items():
+                if self.map.destroy_block(x, y):
+                    weapon.destroyed_blocks.append((x, y))
+                    # Начисляем очки команде владельца оружия
+                    self.team_service.add_score_to_player_team(weapon.owner_id, self.settings.block_destroy_score)
+                    # Шанс появления усиления
+                    if self.rng.random() < self.settings.powerup_drop_chance:
+                        self.spawn_power_up(x=x * cell_size, y=y * cell_size)
 
             # Проверка коллизии с игроками
-            for player in list(self.players.values()):
-                if not player.invulnerable and self.check_explosion_collision(weapon=weapon, entity=player):
+            for player in self.players_index.query_cells(blast_area):
+                player.wake()
+                weapon = blast_area.get(self._get_center_cell(player))
+                if weapon is not None and not player.invulnerable:
                     self.handle_player_hit(player=player, attacker_id=weapon.owner_id)
 
             # Проверка коллизии с врагами
             if self.settings.enable_enemies:
-                for enemy in list(self.enemies.values()):
-                    if not enemy.destroyed and not enemy.invulnerable and self.check_explosion_collision(weapon=weapon, entity=enemy):
+                for enemy in self.enemies_index.query_cells(blast_area):
+                    enemy.wake()
+                    weapon = blast_area.get(self._get_center_cell(enemy))
+                    if weapon is not None and not enemy.destroyed and not enemy.invulnerable:
                         self.handle_enemy_hit(enemy=enemy, attacker_id=weapon.owner_id)
 
-            # Проверка коллизии с другим оружием (цепная реакция)
-            for other_weapon in self.weapons.values():
-                if not other_weapon.activated:
-                    if self.check_explosion_collision(weapon=weapon, entity=other_weapon):
-                        other_weapon.activate(handle_weapon_explosion=self.handle_weapon_explosion)
+            # Оружие, взорванное цепной реакцией, уже отдало изменения в этом тике
+            if result is not None:
+                for other_weapon in chained:
+                    changes = other_weapon.get_changes()
+                    if changes:
+                        previous = result["weapons_update"].get(other_weapon.id) or {}
+                        result["weapons_update"][other_weapon.id] = {**previous, **changes}
 
         except Exception as e:
-            logger.error(f"Error handling bomb explosion: {e}", exc_info=True)
+            logger.error(f"Error resolving explosions: {e}", exc_info=True)
+
+
+    def has_changes(self, result: dict) -> bool:
+        """
+        Есть ли в результате тика изменения для клиентов.
+        Оставшееся время считается изменением только при смене отображаемой секунды.
+        """
+        seconds: int = math.ceil(self.time_remaining)
+        timer_changed: bool = seconds != self._reported_seconds
+        self._reported_seconds = seconds
+        return timer_changed or any(value for key, value in result.items() if key != "time_remaining")
+
+    @staticmethod
+    def add_entity_changes(result: dict, key: str, entity_id: str, changes: dict | None) -> None:
+        """Добавить изменения сущности в обновление; неизменившиеся сущности в обновление не попадают"""
+        if changes:
+            result[key][entity_id] = changes
+
+    def collect_removed_entities(self, result: dict, alive_players: set[str]) -> None:
+        """
+        Записать в result["<тип>_removed"] сущности, которые клиенты видели после прошлого тика, а теперь нет.
+        Неизменившиеся сущности в *_update не передаются, поэтому клиент удаляет сущность только по этому списку.
+        """
+        try:
+            visible_ids: dict[str, set[str]] = {
+                "players": alive_players,
+                "enemies": set(self.enemies) if self.settings.enable_enemies else set(),
+                "weapons": set(self.weapons),
+                "power_ups": set(self.power_ups),
+            }
+            for kind, ids in visible_ids.items():
+                # Сущность, удалённая в этом тике вместе с последними изменениями, пропадает у клиента в следующем
+                updates = result.get(f"{kind}_update")
+                if updates:
+                    ids.update(updates)
+                removed = self._visible_ids[kind] - ids
+                self._visible_ids[kind] = ids
+                if not removed:
+                    continue
+                result[f"{kind}_removed"] = list(removed)
+                entities: dict[str, Entity] = getattr(self, kind)
+                for entity_id in removed:
+                    entity = entities.get(entity_id)
+                    if entity is not None:
+                        # Вернувшаяся сущность (например, возрождённый игрок) должна прийти полным состоянием
+                        entity.reset_changes()
+        except Exception as e:
+            logger.error(f"Error collecting removed entities: {e}", exc_info=True)
+
+    def _get_center_cell(self, entity: Entity) -> tuple[int, int]:
+        """Клетка карты, в которой находится центр сущности"""
+        return (
+            int((entity.x + entity.width / 2) / self.settings.cell_size),
+            int((entity.y + entity.height / 2) / self.settings.cell_size),
+        )
 
 
     def check_entity_collision(self, entity1: Entity, entity2: Entity) -> bool:
@@ -577,23 +1003,34 @@ class GameModeService(ABC):
     def check_explosion_collision(self, weapon: Weapon, entity: Entity) -> bool:
         """Проверить попадание сущности во взрыв"""
         try:
-            entity_grid_x: int = int((entity.x + entity.width/2) / self.settings.cell_size)
-            entity_grid_y: int = int((entity.y + entity.height/2) / self.settings.cell_size)
-            
-            for cell_x, cell_y in weapon.get_damage_area():
-                if entity_grid_x == cell_x and entity_grid_y == cell_y:
-                    return True
-            
-            return False
+            return self._get_center_cell(entity) in weapon.get_damage_area()
         except Exception as e:
             logger.error(f"Error checking explosion collision: {e}", exc_info=True)
             return False
 
 
+    def set_entity_hit(self, entity: Entity) -> bool:
+        """Засчитать попадание в сущность и запланировать конец бессмертия (и удаление уничтоженного врага)"""
+        is_hit: bool = entity.set_hit()
+        if is_hit:
+            self.timer_wheel.schedule(
+                delay=entity.invulnerable_timer,
+                event=TimerEvent.INVULNERABILITY_END,
+                entity_id=entity.id,
+            )
+            if entity.destroyed and entity.id in self.enemies:
+                self.timer_wheel.schedule(
+                    delay=self.settings.destroy_animation_time,
+                    event=TimerEvent.ENEMY_REMOVE,
+                    entity_id=entity.id,
+                )
+        return is_hit
+
+
     def handle_player_hit(self, player: Player, attacker_id: str = None) -> None:
         """Обработать попадание в игрока"""
         try:
-            player.set_hit()
+            self.set_entity_hit(entity=player)
             if player.destroyed:
                 # Начисляем очки команде атакующего игрока
                 if attacker_id:
@@ -606,13 +1043,13 @@ class GameModeService(ABC):
     def handle_enemy_hit(self, enemy: Enemy, attacker_id: str = None) -> None:
         """Обработать попадание во врага"""
         try:
-            is_hit = enemy.set_hit()
+            is_hit = self.set_entity_hit(entity=enemy)
             if is_hit:
                 if enemy.destroyed:
                     # Начисляем очки команде атакующего игрока за уничтожение врага
                     self.team_service.add_score_to_player_team(attacker_id, self.settings.enemy_destroy_score)
                     # Шанс появления бонуса
-                    if random.random() < self.settings.enemy_powerup_drop_chance:
+                    if self.rng.random() < self.settings.enemy_powerup_drop_chance:
                         self.spawn_power_up(round(enemy.x), round(enemy.y))
                 else:
                     # Начисляем очки команде атакующего игрока за попадение во врага
@@ -625,8 +1062,10 @@ class GameModeService(ABC):
     def spawn_power_up(self, x: float, y: float) -> None:
         """Создать усиление в указанной позиции"""
         try:
-            power_type: PowerUpType = random.choice(list(PowerUpType))
-            power_up = PowerUp(
+            power_type: PowerUpType = self.rng.choice(list(PowerUpType))
+            power_up = self._acquire_from_pool(
+                entity_class=PowerUp,
+                kind="power_ups",
                 x=x,
                 y=y,
                 size=self.settings.cell_size,
@@ -635,6 +1074,10 @@ class GameModeService(ABC):
                 settings=self.settings
             )
             self.power_ups[power_up.id] = power_up
+            self.power_ups_index.update(power_up)
+            # Спящий игрок на месте усиления должен его подобрать
+            for player in self.players_index.query_entity(power_up):
+                player.wake()
         except Exception as e:
             logger.error(f"Error spawning power-up at ({x}, {y}): {e}", exc_info=True)
     
@@ -646,6 +1089,8 @@ class GameModeService(ABC):
             # Начисляем очки команде игрока
             self.team_service.add_score_to_player_team(player.id, self.settings.powerup_collect_score)
             self.power_ups.pop(power_up.id)
+            self.power_ups_index.remove(power_up.id)
+            self._release_to_pool(entity=power_up)
                 
         except Exception as e:
             logger.error(f"Error applying power-up {power_up.type.name} to player {player.id}: {e}", exc_info=True)
@@ -669,8 +1114,12 @@ class GameModeService(ABC):
                     enemy_type=enemy_data['type'],
                     map=self.map,
                     settings=self.settings,
-                    ai=ai_enemies
+                    ai=ai_enemies,
+                    rng=random.Random(self.rng.getrandbits(64)),
                 )
+                self._assign_replay_id(enemy)
+                if self.settings.enemy_chase_players and not ai_enemies:
+                    enemy.flow_field = self.flow_field
                 self.enemies.update({enemy.id:enemy})
             
             logger.info(f"Created {len(self.enemies)} enemies for level {self.level}")
@@ -678,6 +1127,39 @@ class GameModeService(ABC):
         except Exception as e:
             logger.error(f"Error creating enemies for level {self.level}: {e}", exc_info=True)
 
+    def _acquire_from_pool(self, entity_class: type[Entity], kind: str, **kwargs) -> Entity:
+        """Взять свободный объект entity_class из пула игры и переинициализировать его или создать новый"""
+        pool = self._entity_pool[entity_class]
+        if pool:
+            entity = pool.pop()
+            entity.reinit(**kwargs)
+            self.pool_stats[f"{kind}_pooled"] += 1
+        else:
+            entity = entity_class(**kwargs)
+            self.pool_stats[f"{kind}_created"] += 1
+        self._assign_replay_id(entity)
+        return entity
+
+    def _assign_replay_id(self, entity: Entity) -> None:
+        """В игре с повтором id новой сущности запоминается для записи или берётся из воспроизводимой записи"""
+        if self.replay_ids is not None:
+            entity.id = self.replay_ids.assign(entity.id)
+
+    def _release_to_pool(self, entity: Entity) -> None:
+        """Вернуть удалённое из игры оружие или усиление в пул (ссылок на объект в игре больше нет)"""
+        pool = self._entity_pool[type(entity)]
+        if len(pool) < settings.GAME_ENTITY_POOL_SIZE:
+            pool.append(entity)
+
+    def get_entity_counts(self) -> dict[str, int]:
+        """Количество сущностей игры по типам (для метрик)"""
+        return {
+            "players": len(self.players),
+            "enemies": len(self.enemies),
+            "weapons": len(self.weapons),
+            "power_ups": len(self.power_ups),
+        }
+
     def is_alive(self):
         if time.time() - self.last_update_time <= self.settings.destroy_inactive_time:
             return True
@@ -691,7 +1173,7 @@ class GameModeService(ABC):
             logger.error(f"Error checking if game is active: {e}", exc_info=True)
             return False
     
-    def get_state(self) -> MapState:
+    def get_state(self, map_encoding: str = MAP_ENCODING_LIST) -> MapState:
         """Получить полное состояние игры"""
         try:
             players_data: dict[str, PlayerState] = {}
@@ -711,7 +1193,7 @@ class GameModeService(ABC):
             for power_up in self.power_ups.values():
                 power_ups_data[power_up.id] = PowerUpState(**power_up.get_changes(full_state=True))
 
-            map_data = self.map.get_map() if self.map else {'grid': None, 'width': 0, 'height': 0}
+            map_data = self.map.get_map(encoding=map_encoding) if self.map else {'grid': None, 'width': 0, 'height': 0}
 
             return MapState(
                 players=players_data,
@@ -736,6 +1218,55 @@ class GameModeService(ABC):
                 teams=None
             )
     
+    def get_entity_cells(self, entity_ids: Iterable[str]) -> dict[str, list[int]]:
+        """Клетки [x, y] центров сущностей для фильтрации обновлений по области интереса (interest_radius)"""
+        cell_size = self.settings.cell_size
+        cells: dict[str, list[int]] = {}
+        for entity_id in entity_ids:
+            entity = (
+                self.players.get(entity_id) or self.enemies.get(entity_id)
+                or self.weapons.get(entity_id) or self.power_ups.get(entity_id)
+            )
+            if entity is not None:
+                cells[entity_id] = [
+                    int((entity.x + entity.width / 2) // cell_size),
+                    int((entity.y + entity.height / 2) // cell_size),
+                ]
+        return cells
+
+    def get_keyframe(self) -> dict:
+        """
+        Снимок состояния как в get_state, но словарями без валидации pydantic.
+        Содержит те же сущности, что видны клиентам в обновлениях (только живые игроки).
+        """
+        try:
+            return {
+                "players": {
+                    player_id: player.get_changes(full_state=True)
+                    for player_id, player in self.players.items() if player.is_alive()
+                },
+                "enemies": {
+                    enemy_id: enemy.get_changes(full_state=True) for enemy_id, enemy in self.enemies.items()
+                } if self.settings.enable_enemies else {},
+                "weapons": {weapon_id: weapon.get_changes(full_state=True) for weapon_id, weapon in self.weapons.items()},
+                "power_ups": {
+                    power_up_id: power_up.get_changes(full_state=True) for power_up_id, power_up in self.power_ups.items()
+                },
+                "map": (
+                    self.map.get_map(encoding=settings.GAME_MAP_ENCODING).model_dump()
+                    if self.map else {"grid": None, "width": 0, "height": 0}
+                ),
+                "level": self.level,
+                "time_remaining": (
+                    self.time_remaining
+                    if self.time_remaining > 0 or (self.settings.time_limit and self.settings.time_limit > 0)
+                    else None
+                ),
+            }
+        except Exception as e:
+            logger.error(f"Error getting game keyframe: {e}", exc_info=True)
+            return {}
+
     # Абстрактные методы для переопределения в конкретных режимах
     @abstractmethod
     def is_game_over(self) -> bool:
@@ -1,4 +1,5 @@
 import logging
+import random
 import time
 from typing import Dict, Optional, Any
 
@@ -6,7 +7,8 @@ from .modes.training_ai_mode import TrainingAiMode
 from ..entities.bomberman import Bomberman
 from ..entities.player import Player, UnitType
 from ..entities.tank import Tank
-from ..models.game_models import GameSettings, GameTeamInfo, GameUpdateEvent
+from ..entities.map import MAP_ENCODING_LIST
+from ..models.game_models import GAME_UPDATE_FIELDS, GameSettings, GameTeamInfo
 from ..entities.game_mode import GameModeType
 from ..entities.weapon import WeaponType, WeaponAction
 from ..entities.game_status import GameStatus
@@ -18,6 +20,8 @@ from ..services.team_service import TeamService
 from ..services.modes.campaign_mode import CampaignMode
 from ..services.modes.free_for_all_mode import FreeForAllMode
 from ..services.modes.capture_flag_mode import CaptureFlagMode
+from ..services.update_codec import ENTITY_KINDS, EntityHandles
+from ..services.replay_log import ReplayIds, ReplayRecord, ReplayRecorder, state_checksum
 from ..config import settings
 from datetime import datetime
 
@@ -35,6 +39,9 @@ class GameService:
         game_settings: GameSettings,
         map_service: MapService,
         ai_inference_service: AIInferenceService,
+        replay_recorder: ReplayRecorder | None = None,
+        replay_seed: int | None = None,
+        replay_checksum_interval: int = 0,
     ):
         try:
             self.settings: GameSettings = game_settings
@@ -43,16 +50,60 @@ class GameService:
             self.status: GameStatus = GameStatus.PENDING
             self.created_at: datetime = datetime.utcnow()
             self.updated_at: datetime = datetime.utcnow()
+            # Накопитель времени для фиксированного шага симуляции
+            self._time_accumulator: float = 0.0
+            self._last_tick_time: float | None = None
+            # Счётчик тиков и признак изменений последнего тика (пустые тики координатор не публикует)
+            self.tick: int = 0
+            self.has_changes: bool = False
+            # Номер последнего опубликованного обновления и тик последнего снимка состояния (keyframe)
+            self.update_seq: int = 0
+            self.keyframe_tick: int | None = None
+            # Хэндлы сущностей для бинарного формата обновлений (GAME_UPDATE_FORMAT=msgpack)
+            self.entity_handles: EntityHandles = EntityHandles()
+            # Повтор игры: запись (replay_recorder) или воспроизведение (replay_seed без записи).
+            # Перед каждым записываемым действием и шагом симуляции random игры засевается
+            # от seed и номера записи, а id новых сущностей пишутся в запись (ReplayIds),
+            # поэтому воспроизведение повторяет игру без живых клиентов
+            self.replay_recorder: ReplayRecorder | None = replay_recorder
+            self.replay_seed: int | None = replay_recorder.seed if replay_recorder else replay_seed
+            self.replay_ids: ReplayIds | None = ReplayIds() if self.replay_seed is not None else None
+            # Собственный random игры: генерация карты, спавн, блуждание врагов, распределение по командам.
+            # Общий random процесса игра не трогает, поэтому игры одного процесса не влияют друг на друга
+            self.rng: random.Random = random.Random(self.replay_seed)
+            self.map_service.rng = self.rng
+            self.replay_checksum_interval: int = (
+                replay_recorder.checksum_interval if replay_recorder else replay_checksum_interval
+            )
+            self.replay_checksum: tuple[int, int] | None = None
+            self._replay_records: int = 0
+            self._replay_tick: dict | None = None
+            self._replay_steps: list[float | None] = []
+            self._replay_ai_actions: list[list] = []
             
             # Инициализируем сервис команд
-            self.team_service: TeamService = TeamService(team_mode_settings=self.settings.team_mode_settings)
+            self.team_service: TeamService = TeamService(
+                team_mode_settings=self.settings.team_mode_settings,
+                rng=self.rng,
+                replay_ids=self.replay_ids,
+            )
             
             # Создаем игровой режим в зависимости от настроек
             self.game_mode: GameModeService = self._create_game_mode()
+            self._record_replay(
+                ReplayRecord.HEADER,
+                game_id=self.settings.game_id,
+                seed=self.replay_seed,
+                checksum_interval=self.replay_checksum_interval,
+                settings=self.settings.model_dump(mode="json"),
+            )
             
             logger.info(f"Game service initialized with mode: {self.settings.game_mode}")
         except Exception as e:
             logger.error(f"Error initializing game service: {e}", exc_info=True)
+            # Игра не создана: файл повтора закрывается здесь, иначе его никто не закроет
+            if replay_recorder is not None:
+                replay_recorder.close()
             raise
 
 
@@ -65,6 +116,8 @@ class GameService:
                     map_service=self.map_service,
                     team_service=self.team_service,
                     ai_inference_service=self.ai_inference_service,
+                    rng=self.rng,
+                    replay_ids=self.replay_ids,
                 )
 
             case GameModeType.FREE_FOR_ALL:
@@ -73,6 +126,8 @@ class GameService:
                     map_service=self.map_service,
                     team_service=self.team_service,
                     ai_inference_service=self.ai_inference_service,
+                    rng=self.rng,
+                    replay_ids=self.replay_ids,
                 )
 
             case GameModeType.CAPTURE_THE_FLAG:
@@ -81,6 +136,8 @@ class GameService:
                     map_service=self.map_service,
                     team_service=self.team_service,
                     ai_inference_service=self.ai_inference_service,
+                    rng=self.rng,
+                    replay_ids=self.replay_ids,
                 )
             case GameModeType.TRAINING_IA:
                 return TrainingAiMode(
@@ -88,6 +145,8 @@ class GameService:
                     map_service=self.map_service,
                     team_service=self.team_service,
                     ai_inference_service=self.ai_inference_service,
+                    rng=self.rng,
+                    replay_ids=self.replay_ids,
                 )
 
             case _:
@@ -97,6 +156,8 @@ class GameService:
                     map_service=self.map_service,
                     team_service=self.team_service,
                     ai_inference_service=self.ai_inference_service,
+                    rng=self.rng,
+                    replay_ids=self.replay_ids,
                 )
 
 
@@ -104,14 +165,20 @@ class GameService:
         """Инициализировать игру"""
         try:
             # Настраиваем команды по умолчанию для режима
+            self._seed_replay_random()
             self.team_service.setup_default_teams()
             
             await self.game_mode.initialize_map()
+            # Начальную карту клиенты получают в состоянии игры при присоединении
+            self.game_mode.map.replaced = False
+            game_map = self.game_mode.map
+            self._record_replay(ReplayRecord.MAP, width=game_map.width, height=game_map.height, grid=game_map.grid.tobytes())
             self.status = GameStatus.PENDING
             self.updated_at = datetime.utcnow()
             logger.info("Game initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing game: {e}", exc_info=True)
+            self.close_replay()
             raise
 
 
@@ -126,6 +193,7 @@ class GameService:
                     "message": message
                 }
 
+            self._seed_replay_random()
             match unit_type:
                 case UnitType.BOMBERMAN:
                     player = Bomberman(
@@ -163,6 +231,7 @@ class GameService:
                     player.set_team(team.id)
                 
                 self.updated_at = datetime.utcnow()
+                self._record_replay(ReplayRecord.ADD_PLAYER, player_id=player.id, unit_type=unit_type, ai_player=ai_player)
                 logger.info(f"Player {player_id} added with unit type {unit_type.value}")
                 return {
                     "success": True,
@@ -188,6 +257,7 @@ class GameService:
     def remove_player(self, player_id: str) -> dict:
         """Удалить игрока из игры"""
         try:
+            self._seed_replay_random()
             # Удаляем игрока из команд
             self.team_service.remove_player_from_team(player_id)
             
@@ -199,6 +269,7 @@ class GameService:
                     self.status = GameStatus.FINISHED
                     logger.info("Game marked as finished due to no players")
                 self.updated_at = datetime.utcnow()
+                self._record_replay(ReplayRecord.REMOVE_PLAYER, player_id=player_id)
                 return {
                     "success": True,
                     "message": f"Player {player_id} removed"
@@ -253,6 +324,7 @@ class GameService:
             
             self.status = GameStatus.ACTIVE
             self.updated_at = datetime.utcnow()
+            self._record_replay(ReplayRecord.STATUS, action="start")
             logger.info("Game started successfully")
             return {
                 "success": True,
@@ -279,6 +351,7 @@ class GameService:
 
             self.status = GameStatus.PAUSED
             self.updated_at = datetime.utcnow()
+            self._record_replay(ReplayRecord.STATUS, action="pause")
             logger.info("Game paused")
             return {"success": True, "message": "Game paused successfully"}
         except Exception as e:
@@ -296,6 +369,7 @@ class GameService:
 
             self.status = GameStatus.ACTIVE
             self.updated_at = datetime.utcnow()
+            self._record_replay(ReplayRecord.STATUS, action="resume")
             logger.info("Game resumed")
             return {"success": True, "message": "Game resumed successfully"}
         except Exception as e:
@@ -303,44 +377,238 @@ class GameService:
             logger.error(message, exc_info=True)
             return {"success": False, "message": message}
 
-    async def update(self, *, delta_seconds: float | None = None) -> GameUpdateEvent:
-        """Обновить состояние игры"""
+    async def update(self, *, delta_seconds: float | None = None) -> dict:
+        """Обновить состояние игры; обновление тика возвращается словарём с полями GameUpdateEvent"""
         try:
             if not self.is_active():
                 logger.debug("game is not active yet.")
-                return GameUpdateEvent(
-                    game_id=self.settings.game_id,
-                    status=self.status,
-                    is_active=False,
-                )
+                self._last_tick_time = None
+                # Неактивная игра не меняется: публикацию раз в интервал берёт на себя heartbeat координатора
+                self.has_changes = False
+                return self._make_update(is_active=False)
             
             # Делегируем обновление игровому режиму
-            status_update = await self.game_mode.update(delta_time=delta_seconds)
-            state = GameUpdateEvent(
-                game_id=self.settings.game_id,
-                map_update=self.game_mode.map.get_changes(),
-                status=self.status,
+            self.tick += 1
+            sample = self.game_mode.tick_sample
+            replay_tick = self._replay_tick
+            if replay_tick is not None:
+                for player_id, (seq, inputs) in replay_tick["inputs"].items():
+                    player = self.game_mode.players.get(player_id)
+                    if player:
+                        player.queue_inputs(inputs=inputs, seq=seq)
+            # Ввод клиентов, накопленный с прошлого тика, применяется один раз до шагов симуляции
+            applied_inputs = {}
+            for player in self.game_mode.players.values():
+                applied = player.apply_queued_inputs()
+                if applied is not None:
+                    applied_inputs[player.id] = applied
+            if replay_tick is not None:
+                status_update = await self._update_steps(steps=replay_tick["steps"])
+            elif delta_seconds is None and settings.GAME_FIXED_TIMESTEP:
+                status_update = await self._update_fixed_steps()
+            else:
+                status_update = await self._step(delta_time=delta_seconds)
+                self.has_changes = self.game_mode.changed
+            if self.replay_seed is not None:
+                self._record_replay(
+                    ReplayRecord.TICK,
+                    tick=self.tick,
+                    steps=self._replay_steps,
+                    inputs={player_id: [seq, inputs] for player_id, (inputs, seq) in applied_inputs.items()},
+                    ai=self._replay_ai_actions,
+                )
+                self._replay_steps = []
+                self._replay_ai_actions = []
+            if sample:
+                sample.start_phase()
+            game_map = self.game_mode.map
+            map_update = game_map.get_changes()
+            map_data = None
+            if game_map.replaced:
+                # Карта заменена (новый уровень): отправляем её целиком вместо отдельных ячеек
+                map_data = game_map.get_map(encoding=settings.GAME_MAP_ENCODING).model_dump()
+                map_update = None
+                game_map.replaced = False
+            state = self._make_update(
                 is_active=self.is_active(),
-                **status_update
+                changes=status_update,
+                map_update=map_update,
+                map_data=map_data,
             )
+            if self.settings.interest_radius:
+                state["entity_cells"] = self.game_mode.get_entity_cells(
+                    entity_id for update_key, _, _ in ENTITY_KINDS for entity_id in state[update_key] or ()
+                )
+            if sample:
+                sample.end_phase("build_event")
+            if map_update or map_data:
+                self.has_changes = True
 
             # Проверяем завершение игры
             if self.game_mode.game_over:
                 self.status = GameStatus.FINISHED
+                self.has_changes = True
                 logger.info("Game finished")
 
             self.updated_at = datetime.utcnow()
+            if self.replay_checksum_interval and self.tick % self.replay_checksum_interval == 0:
+                self.replay_checksum = (self.tick, state_checksum(self._get_replay_state()))
+                self._record_replay(ReplayRecord.CHECKSUM, tick=self.tick, checksum=self.replay_checksum[1])
             
             return state
         except Exception as e:
             logger.error(f"Error in game update: {e}", exc_info=True)
-            return GameUpdateEvent(
-                game_id=self.settings.game_id,
-                status=self.status,
-                is_active=False,
-                error=True,
-                message=f"Error in game update: {e}"
+            self.has_changes = True
+            return self._make_update(is_active=False, error=True, message=f"Error in game update: {e}")
+
+    def _make_update(
+            self,
+            is_active: bool,
+            changes: dict | None = None,
+            map_update: list[dict] | None = None,
+            map_data: dict | None = None,
+            error: bool = False,
+            message: str | None = None,
+    ) -> dict:
+        """
+        Собрать обновление тика без валидации pydantic: ключи GAME_UPDATE_FIELDS, значения сущностей как есть.
+        Enum, numpy-числа и множества приводятся к JSON при сериализации (NumpyAwareEncoder, update_codec).
+        """
+        update = dict.fromkeys(GAME_UPDATE_FIELDS)
+        if changes:
+            update.update(changes)
+        update["game_id"] = self.settings.game_id
+        update["status"] = self.status
+        update["is_active"] = is_active
+        update["error"] = error
+        update["message"] = message
+        update["map_update"] = map_update
+        update["map"] = map_data
+        update["tick"] = self.tick
+        return update
+
+    async def _update_fixed_steps(self) -> dict:
+        """Прогнать накопленное время фиксированными шагами и объединить их изменения"""
+        step: float = 1 / settings.GAME_UPDATE_FPS
+        current_time: float = time.perf_counter()
+        if self._last_tick_time is None:
+            # Первый тик после старта или паузы
+            self._time_accumulator = step
+        else:
+            self._time_accumulator += current_time - self._last_tick_time
+        self._last_tick_time = current_time
+
+        steps: int = int(self._time_accumulator / step)
+        if steps > settings.GAME_MAX_CATCH_UP_STEPS:
+            # Цикл не успевает: отбрасываем лишнее время вместо больших шагов
+            logger.debug(
+                f"Game {self.settings.game_id} is {steps} steps behind, "
+                f"running {settings.GAME_MAX_CATCH_UP_STEPS}"
             )
+            steps = settings.GAME_MAX_CATCH_UP_STEPS
+            self._time_accumulator = steps * step
+        self._time_accumulator -= steps * step
+        return await self._update_steps(steps=[step] * steps)
+
+    async def _update_steps(self, steps: list[float | None]) -> dict:
+        """Выполнить шаги симуляции и объединить их изменения"""
+        status_update: dict = {}
+        self.has_changes = False
+        for step in steps:
+            self._merge_status_update(status_update, await self._step(delta_time=step))
+            self.has_changes = self.has_changes or self.game_mode.changed
+            if self.game_mode.game_over:
+                break
+        return status_update
+
+    async def _step(self, delta_time: float | None) -> dict:
+        """Шаг симуляции; при записи и воспроизведении повтора - с засеянным random и действиями AI шага"""
+        if self.replay_seed is None:
+            return await self.game_mode.update(delta_time=delta_time)
+
+        step_index = len(self._replay_steps)
+        self._replay_steps.append(delta_time)
+        self._seed_replay_random(step=step_index)
+        game_mode = self.game_mode
+        if self._replay_tick is not None:
+            game_mode.replay_ai_actions = {
+                entity_id: action for index, entity_id, action in self._replay_tick["ai"] if index == step_index
+            }
+        else:
+            game_mode.recorded_ai_actions = []
+        try:
+            return await game_mode.update(delta_time=delta_time)
+        finally:
+            if game_mode.recorded_ai_actions:
+                self._replay_ai_actions.extend(
+                    [step_index, entity_id, action] for entity_id, action in game_mode.recorded_ai_actions
+                )
+            game_mode.recorded_ai_actions = None
+            game_mode.replay_ai_actions = None
+
+    async def replay_update(self, tick_record: dict) -> dict:
+        """Тик воспроизведения повтора: шаги, ввод игроков и действия AI из записи TICK"""
+        self._replay_tick = tick_record
+        try:
+            return await self.update()
+        finally:
+            self._replay_tick = None
+
+    def _seed_replay_random(self, step: int = 0) -> None:
+        """Засеять random игры перед записываемым действием или шагом (только для игр с повтором)"""
+        if self.replay_seed is None:
+            return
+        self.rng.seed((self.replay_seed + (self._replay_records << 4) + step) & 0xFFFFFFFF)
+
+    def _record_replay(self, kind: ReplayRecord, **payload) -> None:
+        """
+        Дописать запись в повтор вместе с id сущностей, созданных после прошлой записи;
+        при воспроизведении только сдвигает номер записи для seed
+        """
+        if self.replay_seed is None:
+            return
+        self._replay_records += 1
+        ids = self.replay_ids.take()
+        if self.replay_recorder is not None:
+            if ids:
+                payload["ids"] = ids
+            self.replay_recorder.write(kind, payload)
+
+    def _get_replay_state(self) -> dict:
+        """Состояние для контрольной суммы повтора: без seq публикации и кодировки карты, зависящих от окружения"""
+        state = self.game_mode.get_keyframe()
+        state["map"] = self.game_mode.map.grid.tobytes()
+        state["tick"] = self.tick
+        state["status"] = self.status
+        state["teams"] = self.team_service.get_teams_state()
+        return state
+
+    def close_replay(self) -> None:
+        if self.replay_recorder is not None:
+            self.replay_recorder.close()
+
+    @staticmethod
+    def _merge_status_update(target: dict, update: dict) -> None:
+        """Объединить изменения очередного шага с изменениями предыдущих шагов"""
+        for key, value in update.items():
+            if isinstance(value, dict):
+                entities = target.setdefault(key, {})
+                # Сущность, удалённая на прошлом шаге и вернувшаяся на этом, больше не удалена
+                removed = target.get(key.replace("_update", "_removed"))
+                for entity_id, changes in value.items():
+                    previous = entities.get(entity_id)
+                    entities[entity_id] = {**previous, **changes} if previous and changes else changes or previous
+                    if removed and entity_id in removed:
+                        removed.remove(entity_id)
+            elif key.endswith("_removed"):
+                # Изменения удалённой сущности с прошлых шагов клиенту уже не нужны
+                entities = target.get(key.replace("_removed", "_update"))
+                if entities:
+                    for entity_id in value:
+                        entities.pop(entity_id, None)
+                target[key] = target.get(key, []) + value
+            else:
+                target[key] = value
 
     
     def place_weapon(self, player_id: str, weapon_action: WeaponAction) -> bool:
@@ -357,9 +625,11 @@ class GameService:
                 logger.warning(message)
                 return False
             
+            self._seed_replay_random()
             result = self.game_mode.place_weapon(player, weapon_action)
             if result:
                 self.updated_at = datetime.utcnow()
+                self._record_replay(ReplayRecord.PLACE_WEAPON, player_id=player_id, weapon_action=weapon_action)
                 logger.debug({"message": "Weapon applied successfully"})
                 return True
             else:
@@ -384,10 +654,10 @@ class GameService:
             logger.error(f"Error checking if game is active: {e}", exc_info=True)
             return False
     
-    def get_state(self) -> MapState:
-        """Получить состояние игры"""
+    def get_state(self, map_encoding: str = MAP_ENCODING_LIST) -> MapState:
+        """Получить состояние игры (map_encoding - кодировка карты, см. Map.get_map)"""
         try:
-            state = self.game_mode.get_state()
+            state = self.game_mode.get_state(map_encoding=map_encoding)
             state.status = self.status
             state.is_active = self.is_active()
 
@@ -405,4 +675,24 @@ class GameService:
                 level=0,
                 error=True,
                 is_active=False
-            )
\ No newline at end of file
+            )
+
+    def get_keyframe(self) -> dict:
+        """
+        Снимок состояния игры (game.keyframe.*) после опубликованного обновления с номером seq.
+        По снимку и обновлениям после него webapi восстанавливает поток клиента без запроса get_state.
+        """
+        keyframe = {
+            "game_id": self.settings.game_id,
+            "seq": self.update_seq,
+            "tick": self.tick,
+            "status": self.status,
+            "is_active": self.is_active(),
+            **self.game_mode.get_keyframe(),
+            "teams": self.team_service.get_teams_state(),
+        }
+        if self.settings.interest_radius:
+            keyframe["entity_cells"] = self.game_mode.get_entity_cells(
+                entity_id for kind in ("players", "enemies", "weapons", "power_ups") for entity_id in keyframe.get(kind, ())
+            )
+        return keyframe
\ No newline at end of file
@@ -16,9 +16,11 @@ logger = logging.getLogger(__name__)
 class MapService:
     """Сервис для управления картами, их генерацией и наполнением"""
     
-    def __init__(self, map_repository: MapRepository, game_settings: GameSettings):
+    def __init__(self, map_repository: MapRepository, game_settings: GameSettings, rng: random.Random | None = None):
         self.map_repository = map_repository
         self.game_settings = game_settings
+        # random генерации карт и врагов; GameService заменяет его на random игры
+        self.rng: random.Random = rng if rng is not None else random.Random()
         self.enemy_count = 0
         
     async def create_map_from_template(self, template_id: str, map_instance: Map | None = None) -> Optional[Map]:
@@ -73,7 +75,7 @@ class MapService:
                 return None
                 
             # Выбираем случайную карту из группы
-            template_id = random.choice(group.map_ids)
+            template_id = self.rng.choice(group.map_ids)
             return await self.create_map_from_template(template_id=template_id, map_instance=map_instance)
             
         except Exception as e:
@@ -97,6 +99,9 @@ class MapService:
                 self._add_snake_walls(game_map)
             else:
                 self._add_internal_walls(game_map)
+
+            # Стены записываются напрямую в grid, пересчитываем слои карты
+            game_map.rebuild_layers()
             
             # Добавляем стартовые позиции игроков
             self._add_player_spawns(game_map)
@@ -228,12 +233,12 @@ class MapService:
                 remaining_cells = [cell for cell in empty_cells if cell not in priority_positions]
                 if remaining_cells:
                     needed = count - len(priority_positions)
-                    random.shuffle(remaining_cells)
+                    self.rng.shuffle(remaining_cells)
                     priority_positions.extend(remaining_cells[:needed])
             
             # Рандомизируем позиции если включена настройка
             if self.game_settings.randomize_spawn_positions:
-                random.shuffle(priority_positions)
+                self.rng.shuffle(priority_positions)
             
             # Возвращаем только нужное количество
             return priority_positions[:count]
@@ -286,7 +291,7 @@ class MapService:
             
             # Размещаем блоки случайным образом
             for x, y in empty_cells:
-                if random.random() < block_probability:
+                if self.rng.random() < block_probability:
                     game_map.set_cell_type(x, y, CellType.BREAKABLE_BLOCK)
             
             logger.debug(f"Added breakable blocks with probability {block_probability:.2f}")
@@ -313,7 +318,7 @@ class MapService:
             
             # Размещаем точки спавна врагов
             if empty_cells:
-                spawn_positions = random.sample(
+                spawn_positions = self.rng.sample(
                     empty_cells, 
                     min(spawn_count, len(empty_cells))
                 )
@@ -361,15 +366,15 @@ class MapService:
                 return []
             
             # Выбираем случайные позиции
-            chosen_positions = random.sample(enemy_spawns, self.enemy_count)
+            chosen_positions = self.rng.sample(enemy_spawns, self.enemy_count)
             
             # Генерируем врагов
             enemies_data = []
             enemy_types = list(EnemyType)
             
             for x, y in chosen_positions:
-                enemy_type = random.choice(enemy_types)
-                speed = 1.0 + random.random() * 0.5
+                enemy_type = self.rng.choice(enemy_types)
+                speed = 1.0 + self.rng.random() * 0.5
                 
                 # Усложнение врагов на высоких уровнях
                 if level > 5:
@@ -4,6 +4,7 @@ from ..game_mode_service import GameModeService
 from ..ai_inference_service import AIInferenceService
 from ...models.game_models import GameSettings
 from ...services.map_service import MapService
+from ...services.replay_log import ReplayIds
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +17,16 @@ class CampaignMode(GameModeService):
         map_service: MapService,
         team_service=None,
         ai_inference_service: AIInferenceService | None = None,
+        rng: random.Random | None = None,
+        replay_ids: ReplayIds | None = None,
     ):
         super().__init__(
             game_settings=game_settings,
             map_service=map_service,
             team_service=team_service,
             ai_inference_service=ai_inference_service,
+            rng=rng,
+            replay_ids=replay_ids,
         )
         self.setup_teams()
     
@@ -96,8 +101,7 @@ class CampaignMode(GameModeService):
             await self.initialize_map()
             
             # Очистка оружия и усилений
-            self.weapons = {}
-            self.power_ups = {}
+            self.reset_weapons_and_power_ups()
             
             # Сброс позиций игроков
             # Если разрешен спавн на пустых клетках, включаем их в список доступных позиций
@@ -109,13 +113,13 @@ class CampaignMode(GameModeService):
             
             # Рандомизируем spawn позиции если включена настройка
             if self.settings.randomize_spawn_positions:
-                random.shuffle(spawn_positions)
+                self.rng.shuffle(spawn_positions)
             
             # Распределяем игроков по spawn позициям
             players_list = list(self.players.values())
             if self.settings.randomize_spawn_assignment:
                 # Рандомно перемешиваем игроков для случайного распределения
-                random.shuffle(players_list)
+                self.rng.shuffle(players_list)
             
             for i, player in enumerate(players_list):
                 if i < len(spawn_positions):
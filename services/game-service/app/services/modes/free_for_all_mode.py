@@ -1,9 +1,11 @@
 import logging
+import random
 from ..game_mode_service import GameModeService
 from ..ai_inference_service import AIInferenceService
 from ...entities import Player
 from ...models.game_models import GameSettings
 from ...services.map_service import MapService
+from ...services.replay_log import ReplayIds
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +18,16 @@ class FreeForAllMode(GameModeService):
         map_service: MapService,
         team_service=None,
         ai_inference_service: AIInferenceService | None = None,
+        rng: random.Random | None = None,
+        replay_ids: ReplayIds | None = None,
     ):
         super().__init__(
             game_settings=game_settings,
             map_service=map_service,
             team_service=team_service,
             ai_inference_service=ai_inference_service,
+            rng=rng,
+            replay_ids=replay_ids,
         )
         
         # Отключаем врагов в режиме FFA
@@ -7,9 +7,10 @@ from ..ai_inference_service import AIInferenceService
 from ...entities import Enemy, Player, Entity, Map
 from ...entities.enemy import EnemyUpdate, EnemyType
 from ...entities.player import PlayerUpdate
-from ...entities.weapon import Weapon, WeaponUpdate, WeaponAction
+from ...entities.weapon import WeaponAction
 from ...models.game_models import GameSettings
 from ...services.map_service import MapService
+from ...services.replay_log import ReplayIds
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,16 @@ class TrainingAiMode(GameModeService):
         map_service: MapService,
         team_service=None,
         ai_inference_service: AIInferenceService | None = None,
+        rng: random.Random | None = None,
+        replay_ids: ReplayIds | None = None,
     ):
         super().__init__(
             game_settings=game_settings,
             map_service=map_service,
             team_service=team_service,
             ai_inference_service=ai_inference_service,
+            rng=rng,
+            replay_ids=replay_ids,
         )
         self.setup_teams()
 
@@ -59,7 +64,7 @@ class TrainingAiMode(GameModeService):
 
             # Рандомизируем spawn позиции если включена настройка (для шаблонов карт)
             if self.settings.randomize_spawn_positions:
-                random.shuffle(spawn_positions)
+                self.rng.shuffle(spawn_positions)
 
             used_positions = set()
             # Найдем свободную позицию
@@ -82,7 +87,7 @@ class TrainingAiMode(GameModeService):
 
             # Назначаем позицию (рандомно или первую доступную в зависимости от настройки)
             if self.settings.randomize_spawn_assignment:
-                x, y = random.choice(available_positions)
+                x, y = self.rng.choice(available_positions)
             else:
                 x, y = available_positions[0]
 
@@ -124,8 +129,10 @@ class TrainingAiMode(GameModeService):
                     enemy_type=enemy_data['type'],
                     map=self.map,
                     settings=self.settings,
-                    ai=ai_enemies
+                    ai=ai_enemies,
+                    rng=random.Random(self.rng.getrandbits(64)),
                 )
+                self._assign_replay_id(enemy)
                 self.enemies.update({enemy.id:enemy})
 
             logger.info(f"Created {len(self.enemies)} enemies for level {self.level}")
@@ -187,34 +194,49 @@ class TrainingAiMode(GameModeService):
             # Пропускаем обновление если игра окончена
             if self.game_over:
                 logger.debug("Game is over, skipping update")
+                self.changed = False
                 return {}
 
             result = defaultdict(dict)
+            self.advance_timers(delta_time=delta_time)
+            self.wake_entities_near_changed_cells()
             # Обновляем врагов если включены
             if self.settings.enable_enemies:
                 for enemy in list(self.enemies.values()):
-                    result["enemies_update"].update({enemy.id: self.update_enemy(enemy=enemy, delta_time=delta_time)})
+                    if not enemy.sleeping:
+                        self.add_entity_changes(result, "enemies_update", enemy.id, self.update_enemy(enemy=enemy, delta_time=delta_time))
+            self.enemies_index.sync(self.enemies)
+            self.power_ups_index.sync(self.power_ups)
+            self.wake_players_near_enemies()
 
             # Обновляем игроков
+            alive_players: set[str] = set()
             for player in list(self.players.values()):
                 if player.is_alive():
-                    result["players_update"].update({player.id: self.update_player(player=player, delta_time=delta_time)})
+                    alive_players.add(player.id)
+                    if not player.sleeping:
+                        self.add_entity_changes(result, "players_update", player.id, self.update_player(player=player, delta_time=delta_time))
+            self.players_index.sync(self.players)
 
             # Обновляем оружие
-            for weapon in list(self.weapons.values()):
-                result["weapons_update"].update({weapon.id: self.update_weapon(weapon=weapon, delta_time=delta_time)})
+            self.update_weapons(delta_time=delta_time, result=result)
+            self.resolve_explosions(result=result)
 
             for power_up in self.power_ups.values():
-                result["power_ups_update"].update({power_up.id: power_up.get_changes()})
+                self.add_entity_changes(result, "power_ups_update", power_up.id, power_up.get_changes())
+            self.collect_removed_entities(result=result, alive_players=alive_players)
 
             # Передаём оставшееся время в результат обновления
             if self.time_remaining > 0 or (self.settings.time_limit and self.settings.time_limit > 0):
                 result["time_remaining"] = self.time_remaining
+            if self.update_quantizer is not None:
+                self.update_quantizer.apply(result)
 
             # Проверяем завершение игры
             if self.is_game_over():
                 await self.handle_game_over()
-            logger.debug(f"Game update event: {result}")
+            self.changed = self.has_changes(result)
+            logger.debug("Game update event: %s", result)
             return result
 
         except Exception as e:
@@ -227,7 +249,7 @@ class TrainingAiMode(GameModeService):
             if not player.is_alive():
                 return player.get_changes()
 
-            if player.ai and player.can_handle_ai_action():
+            if player.ai and self._ai_action_due(player):
                 self._handle_ai_action(entity=player, is_cooperative=False)
 
             is_player_moved: bool = player.update(delta_time=delta_time)
@@ -237,14 +259,14 @@ class TrainingAiMode(GameModeService):
             )
 
             # Проверка коллизии с усилениями
-            for power_up in list(self.power_ups.values()):
+            for power_up in self.power_ups_index.query_entity(player):
                 if self.check_entity_collision(entity1=player, entity2=power_up):
                     logger.info(f"Player {player.id} collected powerup {power_up.type.name}")
                     self.apply_power_up(player, power_up)
 
             # Проверка коллизии с врагами
             if not player.invulnerable and self.settings.enable_enemies:
-                for enemy in self.enemies.values():
+                for enemy in self.enemies_index.query_entity(player):
                     if not enemy.destroyed and self.check_entity_collision(entity1=player, entity2=enemy):
                         logger.info(f"Player {player.id} hit by enemy {enemy.type.value}")
                         self.handle_player_hit(player=player, attacker_id=enemy.id)
@@ -256,7 +278,7 @@ class TrainingAiMode(GameModeService):
     def handle_player_hit(self, player: Player, attacker_id: str = None) -> None:
         """Обработать попадание в игрока"""
         try:
-            is_hit = player.set_hit()
+            is_hit = self.set_entity_hit(entity=player)
             if is_hit:
                 if player.id == attacker_id:
                     #если икрок и атакующий одно и тоже, то самострел
@@ -278,15 +300,15 @@ class TrainingAiMode(GameModeService):
         """Обновить одного врага"""
         try:
             if enemy.destroyed:
-                enemy.destroy_animation_timer += delta_time
-                if enemy.destroy_animation_timer >= self.settings.destroy_animation_time:
-                    self.enemies.pop(enemy.id)
-                return enemy.get_changes()
+                # Врага удалит событие ENEMY_REMOVE после анимации уничтожения
+                changes = enemy.get_changes()
+                self.try_sleep(entity=enemy)
+                return changes
 
             # если мы не включаем для enemy AI, то они будут двигаться рандомно, если включаем,
             # то будет обратный запрос к ai-service для инференса что делает медленнее обучение
             # и требует настроенной модели для enemy
-            if enemy.ai and enemy.can_handle_ai_action():
+            if enemy.ai and self._ai_action_due(enemy):
                 self._handle_ai_action(entity=enemy, is_cooperative=False)
 
             is_enemy_moved = enemy.update(delta_time=delta_time)
@@ -294,59 +316,16 @@ class TrainingAiMode(GameModeService):
                 player_id=enemy.id,
                 points=self.settings.player_moved_score if is_enemy_moved else self.settings.played_did_not_moved_score
             )
+            # Очки за движение начисляются каждый тик, поэтому в обучении засыпают только уничтоженные враги
             return enemy.get_changes()
 
         except Exception as e:
             logger.error(f"Error updating enemy {enemy.id}: {e}", exc_info=True)
 
-    def update_weapon(self, weapon: Weapon, delta_time: float) -> WeaponUpdate | None:
-        """Обновить оружие"""
-        try:
-            weapon.update(delta_time=delta_time, handle_weapon_explosion=self.handle_weapon_explosion)
-            if weapon.is_exploded():
-                #здесь оружие взорвалось и взрыв завершен
-                self.weapons.pop(weapon.id)
-                return weapon.get_changes()
-            return weapon.get_changes()
-
-        except Exception as e:
-            logger.error(f"Error updating weapon {weapon.id}: {e}", exc_info=True)
-
-    def handle_weapon_explosion(self, weapon: Weapon) -> None:
-        """Обработать взрыв бомбы"""
-        try:
-            #если есть разрушенные блоки, то начисляем очки и генерируем бонусы
-            for x, y in weapon.get_destroyed_blocks():
-                # Начисляем очки команде владельца бомбы
-                self.team_service.add_score_to_player_team(weapon.owner_id, self.settings.block_destroy_score)
-                # Шанс появления усиления
-                if random.random() < self.settings.powerup_drop_chance:
-                    self.spawn_power_up(x=x * self.settings.cell_size , y=y * self.settings.cell_size)
-
-            # Проверка коллизии с игроками
-            for player in list(self.players.values()):
-                if not player.invulnerable and self.check_explosion_collision(weapon=weapon, entity=player):
-                    self.handle_player_hit(player=player, attacker_id=weapon.owner_id)
-
-            # Проверка коллизии с врагами
-            if self.settings.enable_enemies:
-                for enemy in list(self.enemies.values()):
-                    if not enemy.destroyed and not enemy.invulnerable and self.check_explosion_collision(weapon=weapon, entity=enemy):
-                        self.handle_enemy_hit(enemy=enemy, attacker_id=weapon.owner_id)
-
-            # Проверка коллизии с другим оружием (цепная реакция)
-            for other_weapon in self.weapons.values():
-                if not other_weapon.activated:
-                    if self.check_explosion_collision(weapon=weapon, entity=other_weapon):
-                        other_weapon.activate(handle_weapon_explosion=self.handle_weapon_explosion)
-
-        except Exception as e:
-            logger.error(f"Error handling bomb explosion: {e}", exc_info=True)
-
     def handle_enemy_hit(self, enemy: Enemy, attacker_id: str = None) -> None:
         """Обработать попадание во врага"""
         try:
-            is_hit = enemy.set_hit()
+            is_hit = self.set_entity_hit(entity=enemy)
             if is_hit:
                 if enemy.destroyed:
                     # Начисляем очки команде атакующего игрока за уничтожение врага
@@ -354,7 +333,7 @@ class TrainingAiMode(GameModeService):
                     # начисляем очки enemy для режиме его обучения
                     self.team_service.add_score_to_player_team(enemy.id, self.settings.killed_by_enemy_score)
                     # Шанс появления бонуса
-                    if random.random() < self.settings.enemy_powerup_drop_chance:
+                    if self.rng.random() < self.settings.enemy_powerup_drop_chance:
                         self.spawn_power_up(round(enemy.x), round(enemy.y))
                 else:
                     # Начисляем очки команде атакующего игрока за попадение во врага
@@ -461,8 +440,7 @@ class TrainingAiMode(GameModeService):
             await self.initialize_map()
             
             # Очистка оружия и усилений
-            self.weapons = {}
-            self.power_ups = {}
+            self.reset_weapons_and_power_ups()
             
             # Сброс позиций игроков
             spawn_positions = self.map.get_player_spawn_positions(include_empty_cells=True)
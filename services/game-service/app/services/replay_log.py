@@ -0,0 +1,203 @@
+import logging
+import mmap
+import os
+import random
+import struct
+import zlib
+from collections import deque
+from enum import Enum, IntEnum
+from typing import Any, BinaryIO, Iterable, Iterator
+
+import msgpack
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+REPLAY_MAGIC: bytes = b"BMRP"
+REPLAY_VERSION: int = 1
+# Заголовок файла: сигнатура и версия формата
+_FILE_HEADER = struct.Struct("<4sH")
+# Заголовок записи: тип записи и длина тела msgpack
+_RECORD_HEADER = struct.Struct("<BI")
+
+
+class ReplayRecord(IntEnum):
+    """Типы записей файла повтора"""
+    HEADER = 1         # настройки игры, seed, интервал контрольных сумм
+    MAP = 2            # начальная карта после initialize_game
+    ADD_PLAYER = 3
+    REMOVE_PLAYER = 4
+    STATUS = 5         # start / pause / resume
+    PLACE_WEAPON = 6
+    TICK = 7           # шаги тика, применённый ввод игроков и действия AI
+    CHECKSUM = 8       # контрольная сумма состояния после тика
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+class ReplayIds:
+    """
+    id врагов, оружия, усилений и команд, созданных игрой с повтором.
+
+    id остаются uuid4. При записи новые id копятся и уходят в следующую запись повтора (поле ids),
+    при воспроизведении созданным сущностям по порядку назначаются id из записей.
+    """
+
+    def __init__(self) -> None:
+        self._created: list[str] = []
+        self._replayed: deque[str] = deque()
+
+    def assign(self, entity_id: str) -> str:
+        """id новой сущности: записанный, если идёт воспроизведение, иначе её собственный entity_id"""
+        if self._replayed:
+            entity_id = self._replayed.popleft()
+        self._created.append(entity_id)
+        return entity_id
+
+    def take(self) -> list[str]:
+        """id, созданные после прошлой записи повтора"""
+        created, self._created = self._created, []
+        return created
+
+    def replay(self, ids: Iterable[str]) -> None:
+        """Добавить id из записи повтора перед её воспроизведением"""
+        self._replayed.extend(ids)
+
+
+class ReplayRecorder:
+    """
+    Запись повтора игры в append-only бинарный файл.
+
+    Файл - сигнатура с версией и последовательность записей [тип u8][длина u32][msgpack].
+    Запись только дописывается в конец, поэтому файл, оборванный падением сервиса,
+    читается до последней целой записи.
+    """
+
+    def __init__(self, path: str, game_id: str, checksum_interval: int, seed: int | None = None) -> None:
+        self.path: str = path
+        self.game_id: str = game_id
+        self.seed: int = seed if seed is not None else random.SystemRandom().getrandbits(32)
+        self.checksum_interval: int = checksum_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: BinaryIO | None = open(path, "xb")
+        try:
+            self._file.write(_FILE_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION))
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Recording replay of game {game_id} to {path}")
+
+    @classmethod
+    def for_game(cls, directory: str, game_id: str, checksum_interval: int) -> "ReplayRecorder":
+        return cls(
+            path=os.path.join(directory, f"{game_id}.replay"),
+            game_id=game_id,
+            checksum_interval=checksum_interval,
+        )
+
+    def __enter__(self) -> "ReplayRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def write(self, kind: ReplayRecord, payload: dict) -> None:
+        if self._file is None:
+            return
+        try:
+            data = msgpack.packb(payload, use_bin_type=True, default=_default)
+            self._file.write(_RECORD_HEADER.pack(kind, len(data)))
+            self._file.write(data)
+            if kind == ReplayRecord.CHECKSUM:
+                # Контрольные точки сбрасываются на диск: при падении повтор доступен до последней из них
+                self._file.flush()
+        except Exception as e:
+            logger.error(f"Error writing replay of game {self.game_id}, recording stopped: {e}", exc_info=True)
+            self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                logger.error(f"Error closing replay of game {self.game_id}: {e}", exc_info=True)
+            self._file = None
+
+
+class ReplayReader:
+    """
+    Чтение файла повтора через mmap: записи разбираются прямо из отображённой памяти,
+    без чтения файла целиком. Неполная запись в конце файла (запись оборвалась) пропускается.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._file: BinaryIO = open(path, "rb")
+        self._mmap: mmap.mmap | None = None
+        try:
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise ValueError(f"Replay file {path} is empty") from e
+            try:
+                magic, version = _FILE_HEADER.unpack_from(self._mmap, 0)
+            except struct.error as e:
+                raise ValueError(f"{path} is not a replay file") from e
+            if magic != REPLAY_MAGIC:
+                raise ValueError(f"{path} is not a replay file")
+            if version != REPLAY_VERSION:
+                raise ValueError(f"Unsupported replay version {version} in {path}")
+        except Exception:
+            # Файл и mmap не должны пережить неудачное открытие
+            self.close()
+            raise
+        self.version: int = version
+
+    def __enter__(self) -> "ReplayReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[tuple[ReplayRecord, dict]]:
+        buffer = memoryview(self._mmap)
+        size = len(buffer)
+        offset = _FILE_HEADER.size
+        try:
+            while offset + _RECORD_HEADER.size <= size:
+                kind, length = _RECORD_HEADER.unpack_from(buffer, offset)
+                offset += _RECORD_HEADER.size
+                if offset + length > size:
+                    logger.warning(f"Replay {self.path} ends with a truncated record")
+                    break
+                yield ReplayRecord(kind), msgpack.unpackb(buffer[offset:offset + length], raw=False)
+                offset += length
+        finally:
+            buffer.release()
+
+    def close(self) -> None:
+        if self._mmap is not None and not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+
+def state_checksum(state: dict) -> int:
+    """CRC32 снимка состояния игры (GameService.get_keyframe) для сверки повтора с записью"""
+    return zlib.crc32(msgpack.packb(state, use_bin_type=True, default=_default))
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import typer
+
+from ..entities.player import UnitType
+from ..entities.weapon import WeaponAction
+from ..models.game_models import GameSettings
+from .game_service import GameService
+from .map_service import MapService
+from .replay_log import ReplayReader, ReplayRecord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayResult:
+    """Итог воспроизведения повтора"""
+    game_id: str
+    ticks: int = 0
+    duration: float = 0.0
+    # Длительности тиков (GameService.update) в секундах
+    tick_durations: list[float] = field(default_factory=list)
+    checksums: int = 0
+    # Тики, на которых состояние разошлось с записью
+    checksum_mismatches: list[int] = field(default_factory=list)
+    map_mismatch: bool = False
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.duration if self.duration > 0 else 0.0
+
+    def to_summary(self) -> dict:
+        durations = np.array(self.tick_durations or [0.0]) * 1000
+        return {
+            "game_id": self.game_id,
+            "ticks": self.ticks,
+            "duration": round(self.duration, 3),
+            "ticks_per_second": round(self.ticks_per_second, 1),
+            "tick_ms": {
+                "mean": round(float(durations.mean()), 3),
+                "p99": round(float(np.percentile(durations, 99)), 3),
+                "max": round(float(durations.max()), 3),
+            },
+            "checksums": self.checksums,
+            "checksum_mismatches": self.checksum_mismatches,
+            "map_mismatch": self.map_mismatch,
+        }
+
+
+async def replay_game(path: str, on_tick: Callable[[GameService, dict], None] | None = None) -> ReplayResult:
+    """
+    Воспроизвести записанную игру без клиентов, NATS и ai-service с максимальной скоростью.
+
+    Действия между тиками (игроки, статус, оружие) повторяются вызовами GameService, тики -
+    GameService.replay_update с шагами, вводом и действиями AI из записи. Контрольные суммы
+    состояния сверяются с записанными. on_tick получает игру и обновление каждого тика.
+    """
+    game: GameService | None = None
+    result: ReplayResult | None = None
+    started_at = time.perf_counter()
+    with ReplayReader(path) as reader:
+        for kind, payload in reader:
+            if kind == ReplayRecord.HEADER:
+                game_settings = GameSettings(**payload["settings"])
+                game = GameService(
+                    game_settings=game_settings,
+                    # Карты из шаблонов не загружаются: начальная карта берётся из записи MAP
+                    map_service=MapService(map_repository=None, game_settings=game_settings),
+                    ai_inference_service=None,
+                    replay_seed=payload["seed"],
+                    replay_checksum_interval=payload["checksum_interval"],
+                )
+                result = ReplayResult(game_id=payload["game_id"])
+                continue
+            if game is None:
+                raise ValueError(f"Replay {path} does not start with a header")
+
+            # Сущности, созданные при воспроизведении записи, получают записанные в ней id
+            game.replay_ids.replay(payload.get("ids", ()))
+            match kind:
+                case ReplayRecord.MAP:
+                    await game.initialize_game()
+                    game_map = game.game_mode.map
+                    grid = np.frombuffer(payload["grid"], dtype=game_map.grid.dtype).reshape(payload["height"], payload["width"])
+                    if not np.array_equal(game_map.grid, grid):
+                        logger.warning(f"Replay {path}: generated map differs from the recorded one, using the recorded map")
+                        result.map_mismatch = True
+                        game_map.grid[:] = grid
+                case ReplayRecord.ADD_PLAYER:
+                    game.add_player(
+                        player_id=payload["player_id"],
+                        unit_type=UnitType(payload["unit_type"]),
+                        ai_player=payload["ai_player"],
+                    )
+                case ReplayRecord.REMOVE_PLAYER:
+                    game.remove_player(player_id=payload["player_id"])
+                case ReplayRecord.STATUS:
+                    match payload["action"]:
+                        case "start":
+                            game.start_game()
+                        case "pause":
+                            game.pause_game()
+                        case "resume":
+                            game.resume_game()
+                case ReplayRecord.PLACE_WEAPON:
+                    game.place_weapon(player_id=payload["player_id"], weapon_action=WeaponAction(payload["weapon_action"]))
+                case ReplayRecord.TICK:
+                    tick_started_at = time.perf_counter()
+                    update = await game.replay_update(tick_record=payload)
+                    result.tick_durations.append(time.perf_counter() - tick_started_at)
+                    result.ticks += 1
+                    if on_tick is not None:
+                        on_tick(game, update)
+                case ReplayRecord.CHECKSUM:
+                    result.checksums += 1
+                    if game.replay_checksum != (payload["tick"], payload["checksum"]):
+                        logger.warning(f"Replay {path}: state diverged from the recording at tick {payload['tick']}")
+                        result.checksum_mismatches.append(payload["tick"])
+
+    if result is None:
+        raise ValueError(f"Replay {path} has no records")
+    result.duration = time.perf_counter() - started_at
+    return result
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def replay(path: str, repeat: int = 1):
+    """Воспроизвести файл повтора repeat раз и вывести сводку по тикам"""
+    for _ in range(repeat):
+        print(asyncio.run(replay_game(path)).to_summary())
+
+
+if __name__ == "__main__":
+    cli()
@@ -6,14 +6,24 @@ from app.entities.team import Team
 from app.models.team_models import TeamModeSettings
 from app.entities.game_mode import GameModeType
 from app.entities.player import Player
+from app.services.replay_log import ReplayIds
 
 
 class TeamService:
     """Сервис для управления командами в игровой сессии."""
     
-    def __init__(self, team_mode_settings: TeamModeSettings):
+    def __init__(
+        self,
+        team_mode_settings: TeamModeSettings,
+        rng: random.Random | None = None,
+        replay_ids: ReplayIds | None = None,
+    ):
         self.teams: Dict[str, Team] = {}
         self.mode_settings: TeamModeSettings = team_mode_settings
+        # random игры (GameService.rng) для распределения игроков
+        self.rng: random.Random = rng if rng is not None else random.Random()
+        # id команд в игре с повтором (GameService.replay_ids)
+        self.replay_ids: ReplayIds | None = replay_ids
     
     def create_team(self, team_name: str, team_id: str = None) -> Team:
         """Создает новую команду."""
@@ -21,6 +31,8 @@ class TeamService:
             raise ValueError(f"Превышен максимальный лимит команд: {self.mode_settings.max_team_count}")
         
         team = Team(team_id=team_id, name=team_name)
+        if self.replay_ids is not None and team_id is None:
+            team.id = self.replay_ids.assign(team.id)
         self.teams[team.id] = team
         return team
     
@@ -152,7 +164,7 @@ class TeamService:
             self.setup_default_teams()
         
         teams_list = list(self.teams.values())
-        random.shuffle(players)  # Перемешиваем для случайного распределения
+        self.rng.shuffle(players)  # Перемешиваем для случайного распределения
         
         for i, player in enumerate(players):
             team_index = i % len(teams_list)
@@ -0,0 +1,138 @@
+import json
+import logging
+import random
+import time
+from typing import Callable
+
+from aioprometheus import Counter, Gauge, Histogram
+
+from ..config import settings
+from ..repositories.nats_repository import NumpyAwareEncoder
+
+logger = logging.getLogger(__name__)
+
+
+# Метка game_id для агрегированных по всем играм рядов
+ALL_GAMES: str = "all"
+
+
+class TickSample:
+    """Замер одного тика игры: длительность фаз накапливается между вызовами start_phase/end_phase"""
+
+    __slots__ = ("game_id", "started_at", "phases", "entities", "_phase_started_at")
+
+    def __init__(self, game_id: str) -> None:
+        self.game_id: str = game_id
+        self.started_at: float = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.entities: dict[str, int] = {}
+        self._phase_started_at: float = self.started_at
+
+    def start_phase(self) -> None:
+        self._phase_started_at = time.perf_counter()
+
+    def end_phase(self, phase: str) -> None:
+        """Добавить время с начала фазы к фазе phase и начать следующую фазу"""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._phase_started_at
+        self._phase_started_at = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_summary(self) -> dict:
+        return {
+            "game_id": self.game_id,
+            "duration": time.perf_counter() - self.started_at,
+            "phases": self.phases,
+            "entities": self.entities,
+            "update_bytes": None,
+        }
+
+
+class TickProfiler:
+    """
+    Профилировщик тиков игрового цикла с экспортом в Prometheus (/metrics).
+
+    Замеряется только доля тиков GAME_PROFILER_SAMPLE_RATE, поэтому при выключенном семплировании
+    цена профилировщика - одна проверка на тик. Гистограммы и счётчик пишутся дважды: с game_id игры
+    и с game_id="all" для агрегата по всем играм процесса.
+    """
+
+    def __init__(self) -> None:
+        self.sample_rate: float = settings.GAME_PROFILER_SAMPLE_RATE
+        # В процессе-воркере замеры отправляются координатору вместо локальных метрик
+        self.sink: Callable[[str, dict], None] | None = None
+        self._init_metrics()
+
+    def _init_metrics(self) -> None:
+        try:
+            self.tick_duration = Histogram(
+                "game_tick_duration_seconds",
+                "Game tick duration in seconds",
+                buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25]
+            )
+            self.phase_duration = Histogram(
+                "game_tick_phase_seconds",
+                "Game tick phase duration in seconds",
+                buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05]
+            )
+            self.entity_count = Gauge(
+                "game_entities",
+                "Number of game entities by kind"
+            )
+            self.update_bytes = Histogram(
+                "game_update_bytes",
+                "Size of serialized game update in bytes",
+                buckets=[100, 500, 1000, 5000, 10000, 50000, 100000]
+            )
+            self.late_ticks = Counter(
+                "game_late_ticks_total",
+                "Number of game ticks started after the next tick deadline"
+            )
+            logger.debug("Tick profiler metrics initialized")
+        except Exception as e:
+            logger.error(f"Error initializing tick profiler metrics: {e}", exc_info=True)
+            raise
+
+    def begin_tick(self, game_id: str) -> TickSample | None:
+        """Начать замер тика игры, если тик попал в выборку"""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return None
+        return TickSample(game_id=game_id)
+
+    def end_tick(self, sample: TickSample, update: dict | bytes | None = None) -> None:
+        """Завершить замер тика; размер обновления считается уже после замера длительности"""
+        summary = sample.to_summary()
+        if isinstance(update, bytes):
+            summary["update_bytes"] = len(update)
+        elif update is not None:
+            summary["update_bytes"] = len(json.dumps(update, cls=NumpyAwareEncoder).encode())
+        self.observe("tick", summary)
+
+    def tick_late(self, game_id: str) -> None:
+        self.observe("late", {"game_id": game_id})
+
+    def observe(self, kind: str, summary: dict) -> None:
+        """Записать замер в метрики (или передать его в sink)"""
+        if self.sink is not None:
+            self.sink(kind, summary)
+            return
+        try:
+            for game_id in (summary["game_id"], ALL_GAMES):
+                labels = {"game_id": game_id}
+                if kind == "late":
+                    self.late_ticks.inc(labels)
+                    continue
+                self.tick_duration.observe(labels, summary["duration"])
+                for phase, seconds in summary["phases"].items():
+                    self.phase_duration.observe({"game_id": game_id, "phase": phase}, seconds)
+                if summary["update_bytes"] is not None:
+                    self.update_bytes.observe(labels, summary["update_bytes"])
+            for kind_name, count in summary.get("entities", {}).items():
+                self.entity_count.set({"game_id": summary["game_id"], "kind": kind_name}, count)
+        except Exception as e:
+            logger.error(f"Error recording tick profile: {e}", exc_info=True)
+
+
+tick_profiler = TickProfiler()
@@ -0,0 +1,113 @@
+import logging
+from enum import Enum
+from typing import Any
+
+import msgpack
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Форматы публикации game.update.* (GAME_UPDATE_FORMAT)
+UPDATE_FORMAT_JSON: str = "json"
+UPDATE_FORMAT_MSGPACK: str = "msgpack"
+# Значение заголовка Content-Type NATS, по которому webapi отличает бинарные обновления
+MSGPACK_CONTENT_TYPE: str = "application/msgpack"
+
+# (ключ изменений, ключ удалённых, поле идентификатора в словаре изменений)
+ENTITY_KINDS: tuple[tuple[str, str, str], ...] = (
+    ("players_update", "players_removed", "player_id"),
+    ("enemies_update", "enemies_removed", "entity_id"),
+    ("weapons_update", "weapons_removed", "entity_id"),
+    ("power_ups_update", "power_ups_removed", "entity_id"),
+)
+_SCALAR_FIELDS: tuple[str, ...] = ("game_id", "status", "is_active", "error", "message", "tick", "seq", "time_remaining")
+
+
+class EntityHandles:
+    """
+    Короткие целочисленные хэндлы сущностей игры, которыми бинарные обновления заменяют uuid.
+
+    Хэндл выдаётся при первом попадании сущности в обновление, и в этом обновлении рядом с хэндлом
+    передаётся id сущности. Новым клиентам таблица живых хэндлов отдаётся при присоединении к игре.
+    Хэндлы не переиспользуются, поэтому устаревшая запись таблицы не может указать на другую сущность.
+    """
+
+    def __init__(self) -> None:
+        self._handles: dict[str, int] = {}
+        self._next_handle: int = 1
+
+    def get(self, entity_id: str) -> tuple[int, bool]:
+        """Вернуть хэндл сущности и признак того, что он выдан только что"""
+        handle = self._handles.get(entity_id)
+        if handle is not None:
+            return handle, False
+        handle = self._next_handle
+        self._next_handle += 1
+        self._handles[entity_id] = handle
+        return handle, True
+
+    def release(self, entity_id: str) -> int | None:
+        return self._handles.pop(entity_id, None)
+
+    def table(self) -> dict[str, str]:
+        """Таблица хэндл -> id (ключи строками, чтобы таблица проходила через JSON)"""
+        return {str(handle): entity_id for entity_id, handle in self._handles.items()}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def pack_game_update(update: dict, handles: EntityHandles) -> bytes:
+    """
+    Закодировать обновление тика (словарь GameService.update) в msgpack.
+
+    Ключи совпадают с GameUpdateEvent (пустые поля не передаются), но словари *_update
+    индексируются хэндлами сущностей, а *_removed содержат хэндлы. Поле id
+    (player_id / entity_id) передаётся только вместе с новым хэндлом. Числа с плавающей
+    точкой кодируются float32.
+    """
+    data: dict[str, Any] = {}
+    for field in _SCALAR_FIELDS:
+        value = update.get(field)
+        if value is not None:
+            data[field] = value
+    if update.get("map_update"):
+        data["map_update"] = update["map_update"]
+    if update.get("map"):
+        data["map"] = update["map"]
+
+    for update_key, removed_key, id_field in ENTITY_KINDS:
+        updates = update.get(update_key)
+        if updates:
+            packed_updates: dict[int, dict] = {}
+            for entity_id, changes in updates.items():
+                handle, is_new = handles.get(entity_id)
+                fields = {field: value for field, value in changes.items() if field != id_field}
+                if is_new:
+                    fields[id_field] = entity_id
+                packed_updates[handle] = fields
+            data[update_key] = packed_updates
+        removed = update.get(removed_key)
+        if removed:
+            removed_handles = [handle for handle in map(handles.release, removed) if handle is not None]
+            if removed_handles:
+                data[removed_key] = removed_handles
+
+    entity_cells = update.get("entity_cells")
+    if entity_cells:
+        # Все сущности с клетками есть в *_update этого обновления, их хэндлы уже выданы
+        data["entity_cells"] = {handles.get(entity_id)[0]: cell for entity_id, cell in entity_cells.items()}
+
+    return msgpack.packb(data, use_single_float=True, default=_default)
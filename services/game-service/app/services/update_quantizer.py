@@ -0,0 +1,90 @@
+import logging
+from typing import Any
+
+from ..models.game_models import GameSettings
+
+logger = logging.getLogger(__name__)
+
+
+# Направления в обновлениях передаются индексом в этой таблице, (0, 0) - стоящая сущность
+DIRECTIONS: tuple[tuple[int, int], ...] = ((0, -1), (1, 0), (0, 1), (-1, 0), (0, 0))
+_DIRECTION_ORDINALS: dict[tuple[int, int], int] = {direction: index for index, direction in enumerate(DIRECTIONS)}
+# Таймеры (time_remaining и поля сущностей *_timer) в обновлениях передаются целыми миллисекундами
+TIME_SCALE: int = 1000
+TIMER_FIELD_SUFFIX: str = "_timer"
+
+# (ключ изменений, ключ удалённых)
+_ENTITY_KEYS: tuple[tuple[str, str], ...] = (
+    ("players_update", "players_removed"),
+    ("enemies_update", "enemies_removed"),
+    ("weapons_update", "weapons_removed"),
+    ("power_ups_update", "power_ups_removed"),
+)
+_POSITION_FIELDS: tuple[str, ...] = ("x", "y")
+_ID_FIELDS: frozenset[str] = frozenset(("player_id", "entity_id"))
+
+
+class UpdateQuantizer:
+    """
+    Квантование обновлений тика (GameSettings.quantize_updates).
+
+    Координаты передаются целым числом шагов cell_size / position_precision, время и таймеры сущностей -
+    миллисекундами, направление - индексом в DIRECTIONS. Квантованная координата сравнивается с последней отправленной
+    клиентам, и изменения меньше одного шага (дрожание позиции) в обновление не попадают.
+    """
+
+    def __init__(self, settings: GameSettings) -> None:
+        self.position_step: float = settings.cell_size / settings.position_precision
+        self._scale: float = settings.position_precision / settings.cell_size
+        # entity_id -> {поле: последнее отправленное квантованное значение}
+        self._sent: dict[str, dict[str, int]] = {}
+
+    def get_info(self) -> dict:
+        """Параметры квантования для клиента, который восстанавливает значения из обновлений"""
+        return {
+            "position_step": self.position_step,
+            "time_scale": TIME_SCALE,
+            "timer_suffix": TIMER_FIELD_SUFFIX,
+            "directions": [list(direction) for direction in DIRECTIONS],
+        }
+
+    def apply(self, result: dict) -> None:
+        """Квантовать изменения сущностей и таймер результата тика на месте"""
+        try:
+            for update_key, removed_key in _ENTITY_KEYS:
+                updates = result.get(update_key)
+                if updates:
+                    for entity_id in list(updates):
+                        if not self._quantize_changes(entity_id, updates[entity_id]):
+                            del updates[entity_id]
+                # Вернувшаяся сущность должна прийти полным состоянием, без сравнения с прошлыми значениями
+                for entity_id in result.get(removed_key) or ():
+                    self._sent.pop(entity_id, None)
+            time_remaining = result.get("time_remaining")
+            if time_remaining is not None:
+                result["time_remaining"] = round(time_remaining * TIME_SCALE)
+        except Exception as e:
+            logger.error(f"Error quantizing game update: {e}", exc_info=True)
+
+    def _quantize_changes(self, entity_id: str, changes: dict[str, Any]) -> bool:
+        """Квантовать изменения сущности; False, если после квантования изменений не осталось"""
+        sent = self._sent.get(entity_id)
+        if sent is None:
+            sent = self._sent[entity_id] = {}
+        for field in _POSITION_FIELDS:
+            value = changes.get(field)
+            if value is None:
+                continue
+            quantized = round(float(value) * self._scale)
+            if sent.get(field) == quantized:
+                del changes[field]
+            else:
+                changes[field] = sent[field] = quantized
+        for field, value in changes.items():
+            if value is not None and field.endswith(TIMER_FIELD_SUFFIX):
+                changes[field] = round(float(value) * TIME_SCALE)
+        direction = changes.get("direction")
+        if direction is not None:
+            # Направление вне таблицы передаётся как None: поле всегда индекс или null
+            changes["direction"] = _DIRECTION_ORDINALS.get(tuple(direction))
+        return any(field not in _ID_FIELDS for field in changes)
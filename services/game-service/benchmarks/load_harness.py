@@ -0,0 +1,236 @@
+"""
+Нагрузочный стенд игрового цикла без NATS, Redis, Postgres и ai-service.
+
+Создаёт игры каждого режима через GameCoordinator с подменами NatsRepository, MapRepository
+и AIInferenceService в памяти процесса, ведёт игроков по сценарию ввода и тикает игры
+с фиксированным шагом так быстро, как успевает процесс.
+
+    uv run python -m benchmarks.load_harness --games-per-mode 10 --players 4 --ticks 600
+"""
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+import typer
+
+from app.config import settings
+from app.coordinators.game_coordinator import GameCoordinator
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.repositories.nats_repository import NatsRepository
+from app.services.event_service import EventService
+
+logger = logging.getLogger(__name__)
+
+
+# TRAINING_IA работает без игрового цикла (шаги делает training_coordinator)
+LOOP_GAME_MODES: tuple[GameModeType, ...] = (
+    GameModeType.CAMPAIGN,
+    GameModeType.FREE_FOR_ALL,
+    GameModeType.CAPTURE_THE_FLAG,
+)
+INPUT_KEYS: tuple[str, ...] = ("up", "right", "down", "left")
+
+
+class InMemoryNatsRepository(NatsRepository):
+    """NatsRepository без сервера: сериализация как при публикации, счётчики сообщений и байт по subject"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.subscriptions: dict[str, object] = {}
+
+    async def _send_event_with_reconnect(self, subject: str, payload_bytes: bytes, **kwargs) -> bool:
+        # game.update.{game_id} -> game.update
+        subject_base = subject.rsplit(".", 1)[0]
+        self.messages[subject_base] += 1
+        self.bytes[subject_base] += len(payload_bytes)
+        return True
+
+    async def subscribe(self, subject: str, callback) -> None:
+        self.subscriptions[subject] = callback
+
+    async def disconnect(self) -> None:
+        pass
+
+
+class InMemoryMapRepository:
+    """Шаблоны, группы и цепочки карт в словарях (пустые - игры генерируют случайные карты)"""
+
+    def __init__(self) -> None:
+        self.templates: dict = {}
+        self.groups: dict = {}
+        self.chains: dict = {}
+
+    async def get_map_template(self, map_id: str):
+        return self.templates.get(map_id)
+
+    async def get_map_group(self, group_id: str):
+        return self.groups.get(group_id)
+
+    async def get_map_chain(self, chain_id: str):
+        return self.chains.get(chain_id)
+
+
+class ScriptedAIInference:
+    """Действия AI по кругу без gRPC; ответ приходит на следующей итерации цикла событий"""
+
+    def __init__(self) -> None:
+        self.actions = itertools.cycle([1, 2, 3, 4, 0, 5])
+        self.requests: int = 0
+
+    async def request_inference_action(self, **kwargs) -> int:
+        self.requests += 1
+        return next(self.actions)
+
+
+async def run_load(
+        games_per_mode: int,
+        players: int,
+        ticks: int,
+        input_interval: int,
+        weapon_interval: int,
+        alloc_ticks: int,
+        modes: tuple[GameModeType, ...] = LOOP_GAME_MODES,
+) -> dict:
+    nats_repository = InMemoryNatsRepository()
+    ai_inference = ScriptedAIInference()
+    coordinator = GameCoordinator(
+        notification_service=EventService(nats_repository=nats_repository),
+        map_repository=InMemoryMapRepository(),
+        ai_inference_service=ai_inference,
+    )
+    for mode in modes:
+        for index in range(games_per_mode):
+            game_id = f"{mode.value.lower()}-{index}"
+            result = await coordinator.game_create(game_id=game_id, game_mode=mode.value)
+            if not result["success"]:
+                raise RuntimeError(f"Failed to create game {game_id}: {result.get('message')}")
+            game = coordinator.games[game_id]
+            for player_index in range(players):
+                game.add_player(player_id=f"{game_id}-p{player_index}")
+            game.start_game()
+    games_created = len(coordinator.games)
+    step = 1 / settings.GAME_UPDATE_FPS
+
+    async def run_frame(frame: int, durations: list[float] | None, alloc_peaks: list[int] | None) -> None:
+        for game_id, game in list(coordinator.games.items()):
+            for player_index, player_id in enumerate(game.game_mode.players):
+                if frame % input_interval == 0:
+                    direction = INPUT_KEYS[(frame // input_interval + player_index) % len(INPUT_KEYS)]
+                    await coordinator.game_input(
+                        game_id=game_id,
+                        player_id=player_id,
+                        seq=frame,
+                        inputs={key: key == direction for key in INPUT_KEYS},
+                    )
+                if frame % weapon_interval == player_index % weapon_interval:
+                    await coordinator.game_place_weapon(
+                        game_id=game_id, player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1.value
+                    )
+            if alloc_peaks is not None:
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            started_at = time.perf_counter()
+            await coordinator._tick_game(game_id=game_id, game=game, delta_seconds=step)
+            if durations is not None:
+                durations.append(time.perf_counter() - started_at)
+            if alloc_peaks is not None:
+                alloc_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        # Ответы AI и прочие задачи игр выполняются между кадрами
+        await asyncio.sleep(0)
+
+    durations: list[float] = []
+    gc_collections = sum(stat["collections"] for stat in gc.get_stats())
+    blocks = sys.getallocatedblocks()
+    started_at = time.perf_counter()
+    for frame in range(ticks):
+        await run_frame(frame=frame, durations=durations, alloc_peaks=None)
+    duration = time.perf_counter() - started_at
+    blocks = sys.getallocatedblocks() - blocks
+    gc_collections = sum(stat["collections"] for stat in gc.get_stats()) - gc_collections
+
+    # Пиковые аллокации тика замеряются отдельным прогоном: tracemalloc заметно замедляет тики
+    alloc_peaks: list[int] = []
+    if alloc_ticks > 0:
+        tracemalloc.start()
+        for frame in range(ticks, ticks + alloc_ticks):
+            await run_frame(frame=frame, durations=None, alloc_peaks=alloc_peaks)
+        tracemalloc.stop()
+
+    # Выдача объектов оружия и усилений (из пула / новые) по играм, оставшимся к концу прогона
+    entity_pool: dict[str, int] = defaultdict(int)
+    for game in coordinator.games.values():
+        for key, value in game.game_mode.pool_stats.items():
+            entity_pool[key] += value
+
+    tick_ms = np.array(durations or [0.0]) * 1000
+    ticked = max(len(durations), 1)
+    return {
+        "games": games_created,
+        "games_finished": games_created - len(coordinator.games),
+        "players_per_game": players,
+        "update_format": settings.GAME_UPDATE_FORMAT,
+        "game_ticks": len(durations),
+        "duration": round(duration, 3),
+        "ticks_per_second": round(len(durations) / duration, 1) if duration > 0 else 0.0,
+        "tick_ms": {
+            "p50": round(float(np.percentile(tick_ms, 50)), 3),
+            "p99": round(float(np.percentile(tick_ms, 99)), 3),
+            "max": round(float(tick_ms.max()), 3),
+        },
+        "published": {
+            subject: {"messages": nats_repository.messages[subject], "bytes": nats_repository.bytes[subject]}
+            for subject in sorted(nats_repository.messages)
+        },
+        "bytes_per_tick": round(sum(nats_repository.bytes.values()) / ticked, 1),
+        "ai_requests": ai_inference.requests,
+        "allocations": {
+            "peak_kib_per_tick": round(float(np.mean(alloc_peaks)) / 1024, 1) if alloc_peaks else None,
+            "retained_blocks_per_tick": round(blocks / ticked, 2),
+            "gc_collections_per_tick": round(gc_collections / ticked, 3),
+        },
+        "entity_pool": dict(entity_pool),
+    }
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def run(
+        games_per_mode: int = 10,
+        players: int = 4,
+        ticks: int = 600,
+        input_interval: int = 15,
+        weapon_interval: int = 90,
+        alloc_ticks: int = 30,
+        update_format: str = "",
+        modes: str = ",".join(mode.value for mode in LOOP_GAME_MODES),
+):
+    """Прогнать игры каждого режима ticks кадров и вывести сводку в JSON"""
+    logging.basicConfig(level=logging.WARNING)
+    if update_format:
+        settings.GAME_UPDATE_FORMAT = update_format
+    summary = asyncio.run(run_load(
+        games_per_mode=games_per_mode,
+        players=players,
+        ticks=ticks,
+        input_interval=input_interval,
+        weapon_interval=weapon_interval,
+        alloc_ticks=alloc_ticks,
+        modes=tuple(GameModeType(mode) for mode in modes.split(",")),
+    ))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = ROOT_DIR / "app"
+
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+import json
+from typing import Awaitable, Callable
+
+import pytest
+
+from app.coordinators.game_coordinator import GameCoordinator
+from app.entities.game_mode import GameModeType
+from app.repositories.nats_repository import NumpyAwareEncoder
+from app.services.game_service import GameService
+
+
+class FakeNotificationService:
+    """Уведомления игр без NATS: обновления сохраняются в том виде, в каком их сериализует NatsRepository"""
+
+    def __init__(self) -> None:
+        self.updates: list[dict] = []
+        self.keyframes: list[dict] = []
+        self.game_overs: list[str] = []
+
+    async def send_game_update(self, data: dict) -> bool:
+        self.updates.append(json.loads(json.dumps(data, cls=NumpyAwareEncoder)))
+        return True
+
+    async def send_game_keyframe(self, data: dict) -> bool:
+        self.keyframes.append(json.loads(json.dumps(data, cls=NumpyAwareEncoder)))
+        return True
+
+    async def send_game_over(self, game_id: str) -> bool:
+        self.game_overs.append(game_id)
+        return True
+
+
+class FakeAIInference:
+    async def request_inference_action(self, **kwargs) -> int:
+        return 0
+
+
+@pytest.fixture
+def notification_service() -> FakeNotificationService:
+    return FakeNotificationService()
+
+
+@pytest.fixture
+def ai_inference_service() -> FakeAIInference:
+    return FakeAIInference()
+
+
+@pytest.fixture
+def make_coordinator(notification_service, ai_inference_service) -> Callable[[], GameCoordinator]:
+    """Фабрика координаторов без репозитория карт (карты генерируются)"""
+    def make() -> GameCoordinator:
+        return GameCoordinator(
+            notification_service=notification_service,
+            map_repository=None,
+            ai_inference_service=ai_inference_service,
+        )
+    return make
+
+
+@pytest.fixture
+def coordinator(make_coordinator) -> GameCoordinator:
+    return make_coordinator()
+
+
+@pytest.fixture
+def create_game(coordinator) -> Callable[..., Awaitable[GameService]]:
+    """Создать игру координатора, добавить игроков и запустить её (без игроков игра остаётся в ожидании)"""
+    async def create(
+        game_mode: GameModeType,
+        players: tuple[str, ...] = (),
+        game_id: str = "g1",
+        **game_settings,
+    ) -> GameService:
+        await coordinator.game_create(game_id=game_id, game_mode=game_mode.value, **game_settings)
+        game = coordinator.games[game_id]
+        for player_id in players:
+            game.add_player(player_id=player_id)
+        if players:
+            game.start_game()
+        return game
+    return create
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.entities.cell_type import CellType
+from app.entities.enemy import Enemy, EnemyLod, EnemyType
+from app.entities.game_mode import GameModeType
+
+
+async def create_game_with_enemies(create_game, ai: bool, cells: list[tuple[int, int]], interest_radius: int = 3):
+    game = await create_game(GameModeType.CAMPAIGN, players=("p1",))
+    game_mode = game.game_mode
+    settings = game_mode.settings
+    settings.enemy_lod = True
+    settings.interest_radius = interest_radius
+    settings.enemy_lod_near_distance = 3
+    settings.enemy_lod_far_distance = 10
+    settings.enemy_lod_mid_interval = 2
+    settings.enemy_lod_far_interval = 4
+
+    game_mode.map.grid[1:-1, 1:-1] = CellType.EMPTY.value
+    game_mode.map.rebuild_layers()
+    player = game_mode.players["p1"]
+    player.x, player.y = settings.cell_size * 1, settings.cell_size * 1
+    player.invulnerable = True
+    enemies = [
+        Enemy(
+            x=settings.cell_size * cell_x,
+            y=settings.cell_size * cell_y,
+            size=settings.cell_size,
+            speed=1.0,
+            enemy_type=EnemyType.COIN,
+            map=game_mode.map,
+            settings=settings,
+            ai=ai,
+        )
+        for cell_x, cell_y in cells
+    ]
+    game_mode.enemies = {enemy.id: enemy for enemy in enemies}
+    return game, enemies
+
+
+def test_far_enemies_step_less_often_with_accumulated_time(create_game) -> None:
+    async def play() -> None:
+        game, (near, mid, far) = await create_game_with_enemies(create_game, ai=False, cells=[(2, 1), (7, 1), (15, 15)])
+        game_mode = game.game_mode
+        updates = {enemy.id: [] for enemy in (near, mid, far)}
+        for _ in range(12):
+            game_mode.advance_timers(delta_time=1 / 30)
+            for enemy, delta_time in game_mode.get_enemy_steps(delta_time=1 / 30):
+                updates[enemy.id].append(delta_time)
+
+        assert (near.lod_tier, mid.lod_tier, far.lod_tier) == (EnemyLod.NEAR, EnemyLod.MID, EnemyLod.FAR)
+        assert updates[near.id] == pytest.approx([1 / 30] * 12)
+        assert len(updates[mid.id]) == 6 and len(updates[far.id]) == 3
+        # Шаг равен времени с прошлого обновления врага: пропущенные тики не теряются
+        assert updates[mid.id][1:] == pytest.approx([2 / 30] * 5)
+        assert updates[far.id][1:] == pytest.approx([4 / 30] * 2)
+
+    asyncio.run(play())
+
+
+def test_far_ai_enemies_do_not_request_inference(create_game) -> None:
+    async def play() -> None:
+        game, (near, far) = await create_game_with_enemies(create_game, ai=True, cells=[(2, 1), (15, 15)])
+        game_mode = game.game_mode
+        for _ in range(4):
+            await game.update(delta_seconds=1 / 30)
+
+        assert near.id in game_mode._ai_pending_tasks
+        assert far.lod_tier == EnemyLod.FAR
+        assert far.id not in game_mode._ai_pending_tasks
+
+    asyncio.run(play())
+
+
+def collect_enemy_steps(game_mode, ticks: int) -> dict[str, list[float]]:
+    steps: dict[str, list[float]] = {enemy_id: [] for enemy_id in game_mode.enemies}
+    for _ in range(ticks):
+        game_mode.advance_timers(delta_time=1 / 30)
+        for enemy, delta_time in game_mode.get_enemy_steps(delta_time=1 / 30):
+            steps[enemy.id].append(delta_time)
+    return steps
+
+
+def test_enemy_lod_is_disabled_without_interest_radius(create_game) -> None:
+    async def play() -> None:
+        game, enemies = await create_game_with_enemies(create_game, ai=False, cells=[(2, 1), (7, 1), (15, 15)], interest_radius=0)
+        steps = collect_enemy_steps(game.game_mode, ticks=8)
+
+        # Без области интереса клиенты видят всех врагов: каждый обновляется каждый тик
+        for enemy in enemies:
+            assert enemy.lod_tier == EnemyLod.NEAR
+            assert steps[enemy.id] == pytest.approx([1 / 30] * 8)
+
+    asyncio.run(play())
+
+
+def test_enemies_inside_interest_radius_are_near(create_game) -> None:
+    async def play() -> None:
+        game, (inside, mid, far) = await create_game_with_enemies(
+            create_game, ai=False, cells=[(7, 1), (9, 1), (12, 12)], interest_radius=6,
+        )
+        steps = collect_enemy_steps(game.game_mode, ticks=8)
+
+        # Ближняя граница (3) поднята до interest_radius, дальняя (10) остаётся за ней
+        assert (inside.lod_tier, mid.lod_tier, far.lod_tier) == (EnemyLod.NEAR, EnemyLod.MID, EnemyLod.FAR)
+        assert steps[inside.id] == pytest.approx([1 / 30] * 8)
+        assert steps[mid.id][1:] == pytest.approx([2 / 30] * 3)
+        assert steps[far.id][1:] == pytest.approx([4 / 30])
+
+    asyncio.run(play())
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.services.update_codec import ENTITY_KINDS
+
+
+def test_updates_are_tagged_with_entity_cells(coordinator, create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p0", "p1"), interest_radius=4)
+        assert coordinator._get_update_format_info(game=game)["interest_radius"] == 4
+        cell_size = game.settings.cell_size
+
+        for tick in range(120):
+            for index, player_id in enumerate(game.game_mode.players):
+                direction = ("up", "right", "down", "left")[(tick // 20 + index) % 4]
+                await coordinator.game_input(game_id="g1", player_id=player_id, inputs={direction: True})
+                if tick % 40 == 0:
+                    game.place_weapon(player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1)
+            update = await game.update(delta_seconds=1 / 30)
+            changed = {entity_id for update_key, _, _ in ENTITY_KINDS for entity_id in update[update_key] or ()}
+            assert set(update["entity_cells"]) <= changed
+
+            for entity_id, (x, y) in update["entity_cells"].items():
+                entity = game.game_mode.players.get(entity_id) or game.game_mode.enemies.get(entity_id) \
+                    or game.game_mode.weapons.get(entity_id) or game.game_mode.power_ups.get(entity_id)
+                assert x == int((entity.x + entity.width / 2) // cell_size)
+                assert y == int((entity.y + entity.height / 2) // cell_size)
+
+        keyframe = game.get_keyframe()
+        entity_ids = {entity_id for kind in ("players", "enemies", "weapons", "power_ups") for entity_id in keyframe[kind]}
+        assert set(keyframe["entity_cells"]) == entity_ids
+
+    asyncio.run(play())
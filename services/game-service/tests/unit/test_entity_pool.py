@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.entities.bomb import Bomb
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+
+
+def test_entities_are_slotted() -> None:
+    bomb = Bomb.__new__(Bomb)
+    with pytest.raises(AttributeError):
+        bomb.unknown_field = 1
+
+
+def test_exploded_weapons_are_reused_from_the_pool(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p1", "p2"))
+        game_mode = game.game_mode
+        for player in game_mode.players.values():
+            player.invulnerable = True
+            player.invulnerable_timer = 1000
+
+        assert game.place_weapon(player_id="p1", weapon_action=WeaponAction.PLACEWEAPON1)
+        first_bomb = next(iter(game_mode.weapons.values()))
+        first_id = first_bomb.id
+        update = {}
+        for _ in range(300):
+            update = await game.update(delta_seconds=1 / 30)
+            if not game_mode.weapons:
+                break
+        assert not game_mode.weapons
+        assert first_id in update["weapons_update"]
+        assert game_mode.pool_stats["weapons_created"] == 1
+
+        assert game.place_weapon(player_id="p1", weapon_action=WeaponAction.PLACEWEAPON1)
+        second_bomb = next(iter(game_mode.weapons.values()))
+        assert second_bomb is first_bomb
+        assert second_bomb.id != first_id
+        assert game_mode.pool_stats["weapons_pooled"] == 1
+        # Переинициализированное оружие отдаёт полное состояние без следов прошлого взрыва
+        changes = second_bomb.get_changes()
+        assert changes["activated"] is False and changes["exploded"] is False
+        assert not second_bomb.destroyed_blocks
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["weapons_removed"] == [first_id]
+
+    asyncio.run(play())
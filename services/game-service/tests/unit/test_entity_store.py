@@ -0,0 +1,79 @@
+import copy
+import random
+
+from app.entities.cell_type import CellType
+from app.entities.enemy import Enemy, EnemyType
+from app.entities.entity_store import EntityStore
+from app.entities.flow_field import FlowField
+from app.entities.map import Map
+from app.models.game_models import GameSettings
+
+
+def make_map() -> Map:
+    game_map = Map(width=11, height=9)
+    game_map.grid[0, :] = game_map.grid[-1, :] = CellType.SOLID_WALL.value
+    game_map.grid[:, 0] = game_map.grid[:, -1] = CellType.SOLID_WALL.value
+    game_map.grid[2:-2:2, 2:-2:2] = CellType.SOLID_WALL.value
+    # Замкнутый угол: игроки недостижимы для преследующих врагов в нём
+    game_map.grid[1:4, 8] = game_map.grid[3, 8:] = CellType.BREAKABLE_BLOCK.value
+    game_map.rebuild_layers()
+    return game_map
+
+
+def make_enemies(game_map: Map, settings: GameSettings, flow_field: FlowField) -> dict[str, list[Enemy]]:
+    cells = [(1, 1), (3, 1), (5, 3), (7, 5), (9, 7), (1, 7), (3, 5), (5, 7), (9, 1)]
+    enemies: dict[str, list[Enemy]] = {"continuous": [], "grid_based": [], "chasing": []}
+    for index, (cell_x, cell_y) in enumerate(cells):
+        kind = list(enemies)[index % 3]
+        enemy = Enemy(
+            x=settings.cell_size * cell_x,
+            y=settings.cell_size * cell_y,
+            size=settings.cell_size,
+            speed=1.0 + index * 0.1,
+            enemy_type=EnemyType.COIN,
+            map=game_map,
+            settings=settings,
+            ai=kind == "grid_based",
+            rng=random.Random(index),
+        )
+        enemy.direction = game_map.get_available_direction(x=cell_x, y=cell_y)[0]
+        if kind == "chasing":
+            enemy.flow_field = flow_field
+        enemies[kind].append(enemy)
+    return enemies
+
+
+def test_batched_advance_matches_per_entity_update() -> None:
+    settings = GameSettings()
+    game_map = make_map()
+    flow_field = FlowField()
+    flow_field.update(game_map=game_map, targets=[(5, 5)])
+    enemies = make_enemies(game_map=game_map, settings=settings, flow_field=flow_field)
+    batched: dict[str, list[Enemy]] = {}
+    for kind, group in enemies.items():
+        batched[kind] = [copy.copy(enemy) for enemy in group]
+        for enemy, batched_enemy in zip(group, batched[kind]):
+            batched_enemy.rng = copy.deepcopy(enemy.rng)
+    store = EntityStore(settings=settings)
+
+    for tick in range(300):
+        if tick == 150:
+            # Блок разрушен: маска твёрдых клеток хранилища пересобирается
+            game_map.destroy_block(x=8, y=2)
+            flow_field.update(game_map=game_map, targets=[(5, 5)])
+        for group in enemies.values():
+            for enemy in group:
+                enemy.update(delta_time=1 / 30)
+        store.advance(game_map=game_map, flow_field=flow_field, delta_time=1 / 30, **batched)
+        for kind, group in enemies.items():
+            for enemy, batched_enemy in zip(group, batched[kind]):
+                assert (enemy.x, enemy.y, enemy.direction, enemy.move_timer) == (
+                    batched_enemy.x,
+                    batched_enemy.y,
+                    batched_enemy.direction,
+                    batched_enemy.move_timer,
+                ), f"{kind} enemy diverged at tick {tick}"
+
+    # Враг из угла вышел к игроку после разрушения блока
+    cell_size = settings.cell_size
+    assert [(round(enemy.x / cell_size), round(enemy.y / cell_size)) for enemy in batched["chasing"]] == [(5, 5)] * 3
@@ -0,0 +1,75 @@
+import copy
+import random
+
+import numpy as np
+
+from app.entities.cell_type import CellType
+from app.entities.enemy import Enemy, EnemyType
+from app.entities.entity_store import EntityStore
+from app.entities.flow_field import FlowField, UNREACHABLE
+from app.entities.map import Map
+from app.models.game_models import GameSettings
+
+
+def make_map() -> Map:
+    game_map = Map(width=9, height=7)
+    game_map.grid[0, :] = game_map.grid[-1, :] = CellType.SOLID_WALL.value
+    game_map.grid[:, 0] = game_map.grid[:, -1] = CellType.SOLID_WALL.value
+    # Ряд разрушаемых блоков отделяет левую часть карты от правой
+    game_map.grid[1:-1, 4] = CellType.BREAKABLE_BLOCK.value
+    game_map.rebuild_layers()
+    return game_map
+
+
+def test_distances_and_rebuild_on_change() -> None:
+    game_map = make_map()
+    flow_field = FlowField()
+    assert flow_field.update(game_map=game_map, targets=[(1, 1)])
+    assert not flow_field.update(game_map=game_map, targets=[(1, 1)])
+
+    assert flow_field.distances[0, 1 + 3, 1 + 3] == 4
+    # Обычные враги не проходят сквозь блоки, GHOST - проходит
+    assert flow_field.distances[0, 1 + 1, 1 + 7] == UNREACHABLE
+    assert flow_field.distances[1, 1 + 1, 1 + 7] == 6
+    assert flow_field.next_direction(cell_x=7, cell_y=1, passes_breakable=True, rng=random.Random(0)) == (-1, 0)
+    assert flow_field.next_direction(cell_x=1, cell_y=1, passes_breakable=False, rng=random.Random(0)) == (0, 0)
+
+    game_map.set_cell_type(x=4, y=3, cell_type=CellType.EMPTY)
+    assert flow_field.update(game_map=game_map, targets=[(1, 1)])
+    assert flow_field.distances[0, 1 + 1, 1 + 7] == 10
+    assert flow_field.update(game_map=game_map, targets=[(7, 5)])
+
+
+def test_batched_chase_matches_per_entity_update() -> None:
+    settings = GameSettings()
+    game_map = make_map()
+    flow_field = FlowField()
+    flow_field.update(game_map=game_map, targets=[(2, 3)])
+    cell_size = settings.cell_size
+
+    enemies = []
+    for (cell_x, cell_y), enemy_type in zip(((1, 1), (7, 5), (3, 5)), (EnemyType.COIN, EnemyType.GHOST, EnemyType.BEAR)):
+        enemy = Enemy(
+            x=cell_size * cell_x,
+            y=cell_size * cell_y,
+            size=cell_size,
+            speed=2.0,
+            enemy_type=enemy_type,
+            map=game_map,
+            settings=settings,
+        )
+        enemy.flow_field = flow_field
+        enemies.append(enemy)
+    batched = [copy.copy(enemy) for enemy in enemies]
+    store = EntityStore(settings=settings)
+
+    for _ in range(150):
+        for enemy in enemies:
+            enemy.update(delta_time=1 / 30)
+        store.advance(game_map=game_map, continuous=[], grid_based=[], chasing=batched, flow_field=flow_field, delta_time=1 / 30)
+        for enemy, batched_enemy in zip(enemies, batched):
+            assert np.isclose(enemy.x, batched_enemy.x) and np.isclose(enemy.y, batched_enemy.y)
+
+    # Все враги дошли до клетки игрока, GHOST - сквозь разрушаемые блоки
+    for enemy in enemies:
+        assert (round(enemy.x / cell_size), round(enemy.y / cell_size)) == (2, 3)
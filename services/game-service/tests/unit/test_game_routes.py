@@ -0,0 +1,42 @@
+import asyncio
+
+from app.coordinators.game_coordinator import GameCoordinator
+from app.coordinators.game_worker_pool import GameWorkerPool, _run_route
+from app.entities.game_mode import GameModeType
+from app.models.game_models import GameFilter
+from app.routes import game_routes
+
+
+class InProcessWorkerPool(GameWorkerPool):
+    """Пул, воркеры которого — координаторы в текущем процессе"""
+
+    def __init__(self, coordinators: list[GameCoordinator]) -> None:
+        super().__init__(workers=len(coordinators), notification_service=None)
+        self.coordinators: list[GameCoordinator] = coordinators
+
+    async def call(self, worker_index: int, method: str, **kwargs):
+        coordinator = self.coordinators[worker_index]
+        if method == "run_route":
+            return await _run_route(coordinator, **kwargs)
+        return await getattr(coordinator, method)(**kwargs)
+
+
+def test_get_games_paginates_merged_list_across_workers(monkeypatch, coordinator, make_coordinator) -> None:
+    async def scenario() -> None:
+        coordinator.worker_pool = InProcessWorkerPool(coordinators=[make_coordinator() for _ in range(3)])
+        monkeypatch.setattr(game_routes, "game_coordinator", coordinator)
+        for index in range(7):
+            await coordinator.worker_pool.game_create(game_id=f"g{index}", game_mode=GameModeType.FREE_FOR_ALL.value)
+        assert all(len(worker.games) >= 2 for worker in coordinator.worker_pool.coordinators)
+
+        all_ids = [game.game_id for game in await game_routes.get_games(filter=GameFilter(limit=100))]
+        assert sorted(all_ids) == [f"g{index}" for index in range(7)]
+
+        pages = [
+            [game.game_id for game in await game_routes.get_games(filter=GameFilter(limit=3, offset=offset))]
+            for offset in (0, 3, 6)
+        ]
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [game_id for page in pages for game_id in page] == all_ids
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.coordinators.game_worker_pool import GameWorkerPool
+from app.entities.game_mode import GameModeType
+
+
+def test_dead_worker_fails_pending_calls_and_ends_its_games(monkeypatch, notification_service) -> None:
+    monkeypatch.setattr(settings, "GAME_WORKER_RESTART_DELAY", 0.1)
+    monkeypatch.setattr(settings, "GAME_WORKER_CALL_TIMEOUT", 10.0)
+
+    async def scenario() -> None:
+        pool = GameWorkerPool(workers=1, notification_service=notification_service)
+        pool.start()
+        run_task = asyncio.create_task(pool.run())
+        try:
+            result = await pool.game_create(game_id="g1", game_mode=GameModeType.FREE_FOR_ALL.value)
+            assert result["success"] and pool.game_workers == {"g1": 0}
+
+            dead_process = pool._processes[0]
+            dead_process.kill()
+            dead_process.join()
+            # Ответа на команду мёртвому воркеру не будет: future завершается ошибкой, а не по таймауту
+            with pytest.raises(HTTPException) as error:
+                await pool.call(0, "game_get_state", game_id="g1")
+            assert error.value.status_code == 503
+            assert notification_service.game_overs == ["g1"]
+            assert pool.game_workers == {}
+            with pytest.raises(HTTPException) as error:
+                await pool.call(0, "game_get_state", game_id="g1")
+            assert error.value.detail == "Game worker is restarting"
+
+            # Воркер перезапускается с задержкой и принимает новые игры
+            while pool._processes[0] is dead_process:
+                await asyncio.sleep(0.05)
+            result = await pool.game_create(game_id="g2", game_mode=GameModeType.FREE_FOR_ALL.value)
+            assert result["success"] and pool.game_workers == {"g2": 0}
+        finally:
+            pool.stop()
+            run_task.cancel()
+
+    asyncio.run(scenario())
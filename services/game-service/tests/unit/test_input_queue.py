@@ -0,0 +1,33 @@
+import asyncio
+
+from app.entities.game_mode import GameModeType
+
+
+def test_inputs_are_applied_at_tick_and_acknowledged(coordinator, create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p0",))
+        await game.update(delta_seconds=1 / 30)
+        player = game.get_player("p0")
+
+        await coordinator.game_input(game_id="g1", player_id="p0", seq=1, inputs={"up": False, "right": True})
+        await coordinator.game_input(game_id="g1", player_id="p0", seq=2, inputs={"up": False, "right": True})
+        await coordinator.game_input(game_id="g1", player_id="p0", seq=3, inputs={"up": True, "right": False})
+        # Ввод не применяется до тика, повтор состояния схлопнут
+        assert len(player.input_queue) == 2
+        assert not player.inputs["up"] and not player.inputs["right"]
+        assert player.input_seq is None
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert player.inputs["up"] and not player.inputs["right"]
+        assert not player.input_queue
+        assert update["players_update"]["p0"]["input_seq"] == 3
+
+        # Повтор текущего состояния только подтверждает seq
+        await coordinator.game_input(game_id="g1", player_id="p0", seq=4, inputs={"up": True, "right": False})
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["players_update"]["p0"]["input_seq"] == 4
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert "input_seq" not in (update["players_update"] or {}).get("p0", {})
+
+    asyncio.run(play())
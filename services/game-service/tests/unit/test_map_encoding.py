@@ -0,0 +1,61 @@
+import asyncio
+import base64
+import zlib
+
+import numpy as np
+
+from app.entities.game_mode import GameModeType
+from app.entities.map import MAP_ENCODING_BASE64, MAP_ENCODING_LIST, MAP_ENCODING_RLE, MAP_ENCODING_ZLIB, Map
+
+
+def decode(map_data: dict) -> list[list[int]]:
+    encoding = map_data["encoding"]
+    if encoding is None:
+        return map_data["grid"]
+    if encoding == MAP_ENCODING_RLE:
+        pairs = map_data["data"]
+        cells = np.repeat(pairs[0::2], pairs[1::2]).astype(np.int8)
+    else:
+        buffer = base64.b64decode(map_data["data"])
+        if encoding == MAP_ENCODING_ZLIB:
+            buffer = zlib.decompress(buffer)
+        cells = np.frombuffer(buffer, dtype=np.int8)
+    return cells.reshape(map_data["height"], map_data["width"]).tolist()
+
+
+def test_encodings_round_trip() -> None:
+    game_map = Map(width=7, height=5)
+    rng = np.random.default_rng(1)
+    game_map.grid[:] = rng.integers(0, 5, size=(5, 7), dtype=np.int8)
+    expected = game_map.grid.tolist()
+
+    for encoding in (MAP_ENCODING_LIST, MAP_ENCODING_RLE, MAP_ENCODING_BASE64, MAP_ENCODING_ZLIB):
+        map_data = game_map.get_map(encoding=encoding).model_dump()
+        assert decode(map_data) == expected
+
+    assert game_map.get_map(encoding="unknown").grid == expected
+
+
+def test_replaced_map_is_sent_in_update(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p0", "p1"))
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["map"] is None
+
+        game_mode = game.game_mode
+        game_mode.map_service.generate_random_map(
+            width=game_mode.map.width,
+            height=game_mode.map.height,
+            difficulty=2,
+            map_instance=game_mode.map,
+        )
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["map_update"] is None
+        assert decode(update["map"]) == game_mode.map.grid.tolist()
+        assert game.has_changes
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["map"] is None
+
+    asyncio.run(play())
@@ -0,0 +1,115 @@
+import asyncio
+import itertools
+import os
+import random
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.services.game_mode_service import GameModeService
+from app.services.replay_log import ReplayReader, ReplayRecord, ReplayRecorder
+from app.services.replay_runner import replay_game
+
+
+class CyclingAIInference:
+    """Действия AI меняются от запроса к запросу, их порядок при воспроизведении берётся из записи"""
+
+    def __init__(self) -> None:
+        self.actions = itertools.cycle([1, 2, 3, 4, 0])
+
+    async def request_inference_action(self, **kwargs) -> int:
+        return next(self.actions)
+
+
+@pytest.fixture
+def ai_inference_service() -> CyclingAIInference:
+    return CyclingAIInference()
+
+
+INPUT_KEYS: list[str] = ["up", "right", "down", "left"]
+
+
+def test_recorded_game_replays_with_matching_checksums(tmp_path, monkeypatch, coordinator, create_game) -> None:
+    monkeypatch.setattr(settings, "GAME_REPLAY_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "GAME_REPLAY_CHECKSUM_INTERVAL", 20)
+    monkeypatch.setattr(settings, "AI_ACTION_INTERVAL", 0.0)
+
+    async def play() -> dict:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p0", "p1"))
+        # Другая игра того же процесса и общий random не влияют на записываемую игру
+        other_game = await create_game(GameModeType.CAMPAIGN, players=("q0",), game_id="g2")
+
+        for tick in range(200):
+            for _ in range(tick % 3):
+                random.random()
+            await other_game.update(delta_seconds=1 / 30)
+            for index, player_id in enumerate(game.game_mode.players):
+                direction = INPUT_KEYS[(tick // 15 + index) % 4]
+                await coordinator.game_input(
+                    game_id="g1", player_id=player_id, seq=tick, inputs={key: key == direction for key in INPUT_KEYS}
+                )
+                if tick % 50 == 10:
+                    game.place_weapon(player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1)
+            await game.update(delta_seconds=1 / 30)
+            # Даём завершиться запросам инференса AI
+            await asyncio.sleep(0)
+        game.close_replay()
+        return game._get_replay_state()
+
+    final_state = asyncio.run(play())
+
+    path = tmp_path / "g1.replay"
+    with ReplayReader(str(path)) as reader:
+        records = list(reader)
+    kinds = [kind for kind, _ in records]
+    assert kinds[:2] == [ReplayRecord.HEADER, ReplayRecord.MAP]
+    assert kinds.count(ReplayRecord.TICK) == 200
+    assert any(payload["ai"] for kind, payload in records if kind == ReplayRecord.TICK)
+    recorded_ids = [entity_id for _, payload in records for entity_id in payload.get("ids", ())]
+    assert recorded_ids and all(uuid.UUID(entity_id).version == 4 for entity_id in recorded_ids)
+
+    replayed: list[dict] = []
+    result = asyncio.run(replay_game(str(path), on_tick=lambda game, update: replayed.append(game._get_replay_state())))
+    assert result.ticks == 200
+    assert result.checksums == 10
+    assert result.checksum_mismatches == []
+    assert not result.map_mismatch
+    assert replayed[-1] == final_state
+
+
+def test_truncated_replay_is_read_up_to_last_record(tmp_path) -> None:
+    with ReplayRecorder(path=str(tmp_path / "g.replay"), game_id="g", checksum_interval=0, seed=1) as recorder:
+        recorder.write(ReplayRecord.STATUS, {"action": "start"})
+        recorder.write(ReplayRecord.STATUS, {"action": "pause"})
+    assert recorder.closed
+    data = (tmp_path / "g.replay").read_bytes()
+    (tmp_path / "g.replay").write_bytes(data[:-2])
+
+    with ReplayReader(str(tmp_path / "g.replay")) as reader:
+        assert list(reader) == [(ReplayRecord.STATUS, {"action": "start"})]
+
+
+def test_invalid_replay_file_is_closed_on_error(tmp_path) -> None:
+    open_files = len(os.listdir("/proc/self/fd"))
+    for name, data in (("empty.replay", b""), ("short.replay", b"BM"), ("other.replay", b"not a replay")):
+        (tmp_path / name).write_bytes(data)
+        with pytest.raises(ValueError):
+            ReplayReader(str(tmp_path / name))
+    assert len(os.listdir("/proc/self/fd")) == open_files
+
+
+def test_replay_file_is_closed_when_game_creation_fails(tmp_path, monkeypatch, coordinator) -> None:
+    monkeypatch.setattr(settings, "GAME_REPLAY_DIR", str(tmp_path))
+
+    async def broken_map(self) -> None:
+        raise RuntimeError("map generation failed")
+
+    monkeypatch.setattr(GameModeService, "initialize_map", broken_map)
+    open_files = len(os.listdir("/proc/self/fd"))
+    result = asyncio.run(coordinator.game_create(game_id="g1", game_mode=GameModeType.CAMPAIGN.value))
+
+    assert not result["success"]
+    assert len(os.listdir("/proc/self/fd")) == open_files
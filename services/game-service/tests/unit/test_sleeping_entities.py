@@ -0,0 +1,91 @@
+import asyncio
+
+from app.entities.cell_type import CellType
+from app.entities.enemy import Enemy, EnemyType
+from app.entities.game_mode import GameModeType
+
+
+def test_idle_player_sleeps_until_input(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p1", "p2"))
+        player = game.game_mode.players["p1"]
+
+        await game.update(delta_seconds=1 / 30)
+        assert player.sleeping
+        # Спящий игрок остаётся в игре и не пропадает у клиентов
+        update = await game.update(delta_seconds=1 / 30)
+        assert "p1" not in (update.get("players_removed") or [])
+
+        x, y = player.x, player.y
+        cell_size = player.settings.cell_size
+        dx, dy = player.map.get_available_direction(x=round(x / cell_size), y=round(y / cell_size))[0]
+        key = {(1, 0): "right", (-1, 0): "left", (0, 1): "down", (0, -1): "up"}[(dx, dy)]
+        player.queue_inputs(inputs={key: True}, seq=1)
+        update = await game.update(delta_seconds=1 / 30)
+        assert not player.sleeping
+        assert update["players_update"]["p1"]["input_seq"] == 1
+        assert (player.x, player.y) != (x, y)
+
+    asyncio.run(play())
+
+
+def test_boxed_enemy_wakes_when_neighbouring_cell_changes(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p1",))
+        game_mode = game.game_mode
+        game_map = game_mode.map
+        cell_size = game_mode.settings.cell_size
+
+        game_map.grid[1:-1, 1:-1] = CellType.EMPTY.value
+        game_map.grid[4:7, 4:7] = CellType.BREAKABLE_BLOCK.value
+        game_map.grid[5, 5] = CellType.EMPTY.value
+        game_map.rebuild_layers()
+        enemy = Enemy(
+            x=cell_size * 5,
+            y=cell_size * 5,
+            size=cell_size,
+            speed=1.0,
+            enemy_type=EnemyType.COIN,
+            map=game_map,
+            settings=game_mode.settings,
+        )
+        game_mode.enemies = {enemy.id: enemy}
+
+        await game.update(delta_seconds=1 / 30)
+        assert enemy.sleeping
+        for _ in range(5):
+            await game.update(delta_seconds=1 / 30)
+        assert enemy.sleeping and enemy.move_timer == 1 / 30
+
+        game_map.destroy_block(x=6, y=5)
+        await game.update(delta_seconds=1 / 30)
+        assert not enemy.sleeping
+
+    asyncio.run(play())
+
+
+def test_only_change_fields_mark_changes_and_wake(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p1",))
+        game_mode = game.game_mode
+        enemy = Enemy(
+            x=0.0,
+            y=0.0,
+            size=game_mode.settings.cell_size,
+            speed=1.0,
+            enemy_type=EnemyType.COIN,
+            map=game_mode.map,
+            settings=game_mode.settings,
+        )
+        enemy.get_changes()
+        enemy.sleep()
+
+        enemy.move_timer = 1.0
+        enemy.x = 0.0
+        assert enemy.sleeping and enemy.get_changes() is None
+
+        enemy.lives = 3
+        assert not enemy.sleeping
+        assert enemy.get_changes() == {"entity_id": enemy.id, "lives": 3}
+
+    asyncio.run(play())
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.entities.game_mode import GameModeType
+from app.entities.timer_wheel import TimerEvent, TimerWheel
+from app.entities.weapon import WeaponAction
+
+
+def test_events_fire_on_their_tick_in_schedule_order() -> None:
+    wheel = TimerWheel(tick_duration=0.1, size=8)
+    wheel.schedule(delay=0.2, event=TimerEvent.WEAPON_FUSE, entity_id="b1")
+    wheel.schedule(delay=0.2, event=TimerEvent.INVULNERABILITY_END, entity_id="p1")
+    # Больше оборота колеса: лежит в слоте тика 2, но срабатывает на тике 10
+    wheel.schedule(delay=1.0, event=TimerEvent.WEAPON_CLEAR, entity_id="b1")
+    wheel.schedule(delay=0, event=TimerEvent.ENEMY_REMOVE, entity_id="e1")
+
+    assert wheel.advance(delta_time=0.1) == [(TimerEvent.ENEMY_REMOVE, "e1")]
+    assert wheel.advance(delta_time=0.1) == [
+        (TimerEvent.WEAPON_FUSE, "b1"),
+        (TimerEvent.INVULNERABILITY_END, "p1"),
+    ]
+    assert wheel.advance(delta_time=0.5) == []
+    # Длинный шаг покрывает несколько тиков сразу
+    assert wheel.advance(delta_time=0.35) == [(TimerEvent.WEAPON_CLEAR, "b1")]
+    assert len(wheel) == 0
+
+
+def test_bomb_detonates_and_clears_by_timer_events(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p1", "p2"))
+        game_mode = game.game_mode
+        settings = game_mode.settings
+        player = game_mode.players["p1"]
+
+        assert game.place_weapon(player_id="p1", weapon_action=WeaponAction.PLACEWEAPON1)
+        bomb = next(iter(game_mode.weapons.values()))
+        assert bomb.id not in game_mode.moving_weapons
+
+        elapsed = 0.0
+        while not bomb.activated:
+            await game.update(delta_seconds=1 / 30)
+            elapsed += 1 / 30
+        assert abs(elapsed - settings.bomb_timer) < 1 / 30 + 1e-6
+        # Владелец стоит на своей бомбе: попадание и бессмертие до события INVULNERABILITY_END
+        assert player.lives == settings.player_start_lives - 1 and player.invulnerable
+
+        while bomb.id in game_mode.weapons:
+            await game.update(delta_seconds=1 / 30)
+            elapsed += 1 / 30
+        assert bomb.exploded
+        while player.invulnerable:
+            await game.update(delta_seconds=1 / 30)
+            elapsed += 1 / 30
+        assert elapsed >= settings.bomb_timer + settings.enemy_invulnerable_time - 1e-6
+
+    asyncio.run(play())
@@ -0,0 +1,95 @@
+import asyncio
+
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.models.game_models import GameSettings
+from app.services.update_quantizer import DIRECTIONS, TIME_SCALE, TIMER_FIELD_SUFFIX, UpdateQuantizer
+
+
+def test_jitter_below_step_is_not_sent() -> None:
+    quantizer = UpdateQuantizer(settings=GameSettings(quantize_updates=True, position_precision=8))
+
+    first = {"players_update": {"p1": {"player_id": "p1", "x": 100.0, "y": 40.0, "lives": 3}}}
+    quantizer.apply(first)
+    assert first["players_update"]["p1"] == {"player_id": "p1", "x": 20, "y": 8, "lives": 3}
+
+    jitter = {"players_update": {"p1": {"player_id": "p1", "x": 100.4, "y": 40.2}}}
+    quantizer.apply(jitter)
+    assert jitter["players_update"] == {}
+
+    moved = {"players_update": {"p1": {"player_id": "p1", "x": 106.0, "y": 40.2}}, "time_remaining": 12.3456}
+    quantizer.apply(moved)
+    assert moved["players_update"]["p1"] == {"player_id": "p1", "x": 21}
+    assert moved["time_remaining"] == 12346
+
+
+def test_returning_entity_gets_full_position() -> None:
+    quantizer = UpdateQuantizer(settings=GameSettings(quantize_updates=True))
+    quantizer.apply({"enemies_update": {"e1": {"entity_id": "e1", "x": 80.0, "y": 80.0}}})
+    quantizer.apply({"enemies_update": {}, "enemies_removed": ["e1"]})
+
+    returned = {"enemies_update": {"e1": {"entity_id": "e1", "x": 80.0, "y": 80.0}}}
+    quantizer.apply(returned)
+
+    assert returned["enemies_update"]["e1"] == {"entity_id": "e1", "x": 128, "y": 128}
+
+
+def test_client_state_follows_entities(coordinator, create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p0", "p1"), quantize_updates=True)
+        info = coordinator._get_update_format_info(game=game)["update_quantization"]
+        step = info["position_step"]
+        assert info["time_scale"] == TIME_SCALE
+        assert [tuple(direction) for direction in info["directions"]] == list(DIRECTIONS)
+
+        positions: dict[str, tuple[float, float]] = {}
+        for tick in range(240):
+            for index, player_id in enumerate(game.game_mode.players):
+                direction = ("up", "right", "down", "left")[(tick // 30 + index) % 4]
+                await coordinator.game_input(game_id="g1", player_id=player_id, inputs={direction: True})
+                if tick % 60 == 0:
+                    game.place_weapon(player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1)
+            update = await game.update(delta_seconds=1 / 30)
+            if update["time_remaining"] is not None:
+                assert isinstance(update["time_remaining"], int)
+            for update_key in ("players_update", "enemies_update", "weapons_update"):
+                for entity_id, changes in (update[update_key] or {}).items():
+                    x, y = positions.get(entity_id, (None, None))
+                    positions[entity_id] = (changes.get("x", x), changes.get("y", y))
+                    if "direction" in changes:
+                        assert changes["direction"] in range(len(DIRECTIONS))
+
+        entities = {**game.game_mode.players, **game.game_mode.enemies, **game.game_mode.weapons}
+        for entity_id, entity in entities.items():
+            x, y = positions[entity_id]
+            assert abs(x * step - entity.x) <= step / 2
+            assert abs(y * step - entity.y) <= step / 2
+
+    asyncio.run(play())
+
+
+def test_entity_timers_are_sent_in_milliseconds() -> None:
+    quantizer = UpdateQuantizer(settings=GameSettings(quantize_updates=True))
+    update = {
+        "players_update": {"p1": {"player_id": "p1", "invulnerable": True, "invulnerable_timer": 1.2504}},
+        "weapons_update": {"b1": {"entity_id": "b1", "explosion_timer": 0.5, "activated": True}},
+        "time_remaining": 30.0,
+    }
+    quantizer.apply(update)
+
+    assert update["players_update"]["p1"]["invulnerable_timer"] == 1250
+    assert update["weapons_update"]["b1"]["explosion_timer"] == 500
+    assert update["time_remaining"] == 30000
+    assert quantizer.get_info()["timer_suffix"] == TIMER_FIELD_SUFFIX
+
+
+def test_every_direction_is_sent_as_an_ordinal() -> None:
+    quantizer = UpdateQuantizer(settings=GameSettings(quantize_updates=True))
+    update = {"weapons_update": {
+        f"w{index}": {"entity_id": f"w{index}", "direction": direction}
+        for index, direction in enumerate([(0, 0), (1, 0), [0, -1], (0.5, 0.5)])
+    }}
+    quantizer.apply(update)
+
+    directions = [changes["direction"] for changes in update["weapons_update"].values()]
+    assert directions == [DIRECTIONS.index((0, 0)), 1, 0, None]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import random
+
+import msgpack
+
+from app.entities.cell_type import CellType
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.models.game_models import GAME_UPDATE_FIELDS, GameUpdateEvent
+from app.models.map_models import MapUpdate
+from app.repositories.nats_repository import NumpyAwareEncoder
+from app.services.update_codec import ENTITY_KINDS, EntityHandles, pack_game_update
+
+
+INPUT_KEYS: list[str] = ["up", "down", "left", "right", "weapon1", "action1", "weapon2"]
+
+
+def to_json(value) -> dict:
+    return json.loads(json.dumps(value, cls=NumpyAwareEncoder))
+
+
+def normalize(value):
+    """Привести множества (explosion_cells) к сравнимому виду: порядок элементов не важен"""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [normalize(item) for item in value]
+        if items and isinstance(items[0], list):
+            return sorted(items)
+        return items
+    return value
+
+
+def round_floats(value):
+    """Числа с плавающей точкой в msgpack передаются как float32"""
+    if isinstance(value, dict):
+        return {key: round_floats(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [round_floats(item) for item in value]
+    if isinstance(value, float):
+        return msgpack.unpackb(msgpack.packb(value, use_single_float=True))
+    return value
+
+
+def schema_payload(update: dict) -> dict:
+    """Тот же тик через pydantic: валидация GameUpdateEvent и model_dump(mode="json")"""
+    fields = {key: value for key, value in update.items() if value is not None}
+    return GameUpdateEvent(**fields).model_dump(mode="json")
+
+
+def run_game(coordinator, create_game, game_mode: GameModeType, ticks: int) -> list[dict]:
+    async def play() -> list[dict]:
+        rng = random.Random(1)
+        game = await create_game(game_mode, players=("p0", "p1", "p2"), game_id=game_mode.value)
+
+        updates = []
+        for tick in range(ticks):
+            for player_id in list(game.game_mode.players):
+                if tick % 20 == 0:
+                    direction = rng.choice(INPUT_KEYS[:4])
+                    await coordinator.game_input(
+                        game_id=game_mode.value,
+                        player_id=player_id,
+                        inputs={key: key == direction for key in INPUT_KEYS},
+                    )
+                if tick % 45 == 0:
+                    game.place_weapon(player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1)
+            updates.append(await game.update(delta_seconds=1 / 30))
+        return updates
+
+    return asyncio.run(play())
+
+
+def test_tick_update_has_game_update_event_fields(coordinator, create_game) -> None:
+    updates = run_game(coordinator, create_game, game_mode=GameModeType.FREE_FOR_ALL, ticks=5)
+
+    for update in updates:
+        assert tuple(update) == GAME_UPDATE_FIELDS
+
+
+def test_tick_update_matches_schema_payload(coordinator, create_game) -> None:
+    for game_mode in (GameModeType.FREE_FOR_ALL, GameModeType.CAMPAIGN):
+        updates = run_game(coordinator, create_game, game_mode=game_mode, ticks=300)
+
+        assert any(update["map_update"] for update in updates)
+        assert any(update["weapons_removed"] for update in updates)
+        for update in updates:
+            assert normalize(to_json(update)) == normalize(schema_payload(update))
+
+
+def test_map_changes_match_map_update_schema(create_game) -> None:
+    async def first_map_changes() -> list[dict]:
+        game_map = (await create_game(GameModeType.FREE_FOR_ALL)).game_mode.map
+        game_map.set_cell_type(x=1, y=1, cell_type=CellType.BREAKABLE_BLOCK)
+        game_map.set_cell_type(x=1, y=1, cell_type=CellType.EMPTY)
+        return game_map.get_changes()
+
+    changes = asyncio.run(first_map_changes())
+
+    assert changes
+    for change in changes:
+        assert to_json(change) == MapUpdate(**change).model_dump(mode="json")
+
+
+def test_packed_update_matches_json_payload(coordinator, create_game) -> None:
+    updates = run_game(coordinator, create_game, game_mode=GameModeType.FREE_FOR_ALL, ticks=200)
+    handles = EntityHandles()
+    ids: dict[int, str] = {}
+
+    for update in updates:
+        expected = {key: value for key, value in to_json(update).items() if value is not None}
+        decoded = msgpack.unpackb(pack_game_update(update=update, handles=handles), strict_map_key=False)
+        for update_key, removed_key, id_field in ENTITY_KINDS:
+            entities = {}
+            for handle, fields in decoded.get(update_key, {}).items():
+                ids.setdefault(handle, fields.get(id_field))
+                entities[ids[handle]] = {**fields, id_field: ids[handle]}
+            decoded[update_key] = entities
+            decoded[removed_key] = [ids.pop(handle) for handle in decoded.get(removed_key, [])]
+            if not expected.get(update_key):
+                expected[update_key] = {}
+            if not expected.get(removed_key):
+                expected[removed_key] = []
+        if not expected.get("map_update"):
+            expected.pop("map_update", None)
+
+        assert normalize(to_json(decoded)) == normalize(round_floats(expected))
+    assert set(ids.values()) == {entity_id for entity_id in handles.table().values()}
+
@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import json
+import random
+
+import numpy as np
+
+from app.config import settings
+from app.entities.game_mode import GameModeType
+from app.entities.weapon import WeaponAction
+from app.repositories.nats_repository import NumpyAwareEncoder
+
+
+INPUT_KEYS: list[str] = ["up", "down", "left", "right"]
+ENTITY_KINDS: tuple[str, ...] = ("players", "enemies", "weapons", "power_ups")
+
+
+def to_json(value) -> dict:
+    return json.loads(json.dumps(value, cls=NumpyAwareEncoder))
+
+
+def decode_grid(map_data: dict) -> list[list[int]]:
+    if map_data.get("encoding") is None:
+        return map_data["grid"]
+    cells = np.frombuffer(base64.b64decode(map_data["data"]), dtype=np.int8)
+    return cells.reshape(map_data["height"], map_data["width"]).tolist()
+
+
+def normalize(value):
+    """Привести множества (explosion_cells) к сравнимому виду: порядок элементов не важен"""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [normalize(item) for item in value]
+        if items and isinstance(items[0], list):
+            return sorted(items)
+        return items
+    return value
+
+
+def test_keyframe_plus_updates_restore_state(notification_service, coordinator, create_game) -> None:
+    async def play() -> None:
+        rng = random.Random(3)
+        game = await create_game(GameModeType.CAMPAIGN, players=("p0", "p1", "p2"))
+
+        keyframe = None
+        for tick in range(300):
+            for player_id in list(game.game_mode.players):
+                if tick % 20 == 0:
+                    direction = rng.choice(INPUT_KEYS)
+                    await coordinator.game_input(
+                        game_id="g1",
+                        player_id=player_id,
+                        inputs={key: key == direction for key in INPUT_KEYS},
+                    )
+                if tick % 45 == 0:
+                    game.place_weapon(player_id=player_id, weapon_action=WeaponAction.PLACEWEAPON1)
+            update = await game.update(delta_seconds=1 / 30)
+            if game.has_changes:
+                await coordinator._publish_update(game_id="g1", game=game, update=update, sample=None)
+            if tick == 100:
+                keyframe = to_json(game.get_keyframe())
+
+        # Сущность, удалённая вместе с последними изменениями, попадает в *_removed следующего обновления:
+        # досчитываем тики, пока последнее обновление ссылается на уже удалённые сущности
+        for _ in range(10):
+            final = to_json(game.get_keyframe())
+            if all(set(update[f"{kind}_update"] or {}) <= set(final[kind]) for kind in ENTITY_KINDS):
+                break
+            update = await game.update(delta_seconds=1 / 30)
+            if game.has_changes:
+                await coordinator._publish_update(game_id="g1", game=game, update=update, sample=None)
+
+        seqs = [update["seq"] for update in notification_service.updates]
+        assert seqs == list(range(1, len(seqs) + 1))
+        assert keyframe["seq"] in seqs
+
+        state = {kind: dict(keyframe[kind]) for kind in ENTITY_KINDS}
+        grid = decode_grid(keyframe["map"])
+        for update in notification_service.updates:
+            if update["seq"] <= keyframe["seq"]:
+                continue
+            for kind in ENTITY_KINDS:
+                for entity_id, changes in (update[f"{kind}_update"] or {}).items():
+                    state[kind][entity_id] = {**state[kind].get(entity_id, {}), **changes}
+                for entity_id in update[f"{kind}_removed"] or []:
+                    state[kind].pop(entity_id, None)
+            if update["map"]:
+                grid = decode_grid(update["map"])
+            for cell in update["map_update"] or []:
+                grid[cell["y"]][cell["x"]] = cell["type"]
+
+        for kind in ENTITY_KINDS:
+            assert normalize(state[kind]) == normalize(final[kind])
+        assert grid == decode_grid(final["map"])
+
+    asyncio.run(play())
+
+
+def test_paused_game_update_has_no_changes(create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.CAMPAIGN, players=("p0",))
+        await game.update(delta_seconds=1 / 30)
+        game.pause_game()
+
+        update = await game.update(delta_seconds=1 / 30)
+        assert update["is_active"] is False
+        assert not game.has_changes
+
+    asyncio.run(play())
+
+
+def test_empty_ticks_are_replaced_by_heartbeat(monkeypatch, notification_service, coordinator, create_game) -> None:
+    async def play() -> None:
+        game = await create_game(GameModeType.FREE_FOR_ALL, players=("p0", "p1"))
+        monkeypatch.setattr(settings, "GAME_HEARTBEAT_INTERVAL", 1000.0)
+        for _ in range(3):
+            await coordinator._tick_game(game_id="g1", game=game, delta_seconds=1 / 30)
+        published = len(notification_service.updates)
+        assert not game.has_changes
+
+        await coordinator._tick_game(game_id="g1", game=game, delta_seconds=1 / 30)
+        assert len(notification_service.updates) == published
+
+        monkeypatch.setattr(settings, "GAME_HEARTBEAT_INTERVAL", 0.0)
+        await coordinator._tick_game(game_id="g1", game=game, delta_seconds=1 / 30)
+        assert not game.has_changes
+        heartbeat = notification_service.updates[-1]
+        assert set(heartbeat) == {"game_id", "tick", "seq", "time_remaining"}
+        assert heartbeat["tick"] == game.tick and heartbeat["seq"] == game.update_seq
+
+    asyncio.run(play())
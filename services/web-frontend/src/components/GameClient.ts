@@ -4,18 +4,20 @@ import {Renderer} from './Renderer';
 import logger from '../utils/Logger';
 import {tokenService} from '../services/tokenService';
 import {
-    EnemyState,
-    GamePlayerInfo,
     GameState,
     GameStatus,
     GameUpdateEvent,
-    OptionalEnemyState,
-    OptionalGamePlayerInfo,
-    OptionalPowerUpState,
-    OptionalWeaponState, PowerUpState,
-    ResponseGameState, WeaponActionType, WeaponState
+    MapData,
+    ResponseGameState, ResponseResyncGame, UpdateQuantization, WeaponActionType
 } from "../types/Game";
 import {EntitiesInfo} from "../types/EntitiesParams";
+import {
+    decodeMapGrid,
+    dequantizeUpdate,
+    GameUpdateDecoder,
+    MAP_ENCODING_BASE64,
+    UPDATE_FORMAT_MSGPACK
+} from "../utils/updateCodec";
 
 export class GameClient {
     private canvas: HTMLCanvasElement;
@@ -36,6 +38,22 @@ export class GameClient {
     // Кеш полной карты для обновлений с изменениями
     private cachedMapGrid: number[][] | null = null;
 
+    // Таблица хэндлов сущностей для бинарных обновлений (msgpack)
+    private updateDecoder: GameUpdateDecoder = new GameUpdateDecoder();
+    private updateQuantization: UpdateQuantization | null = null;
+
+    // Номер последнего применённого обновления и обновления, пришедшие во время восстановления потока
+    private lastSeq: number | null = null;
+    private isResyncing: boolean = false;
+    private pendingUpdates: GameUpdateEvent[] = [];
+
+    // Ввод отправляется только при изменении; seq последнего отправленного ввода сервер возвращает
+    // в input_seq игрока, пока подтверждения нет - ввод периодически переотправляется
+    private inputSeq: number = 0;
+    private lastSentInputs: string | null = null;
+    private lastInputSentTime: number = 0;
+    private static readonly INPUT_RESEND_INTERVAL: number = 500;
+
     // Колбек для уведомления о проблемах с авторизацией
     private onAuthenticationFailed?: () => void;
 
@@ -175,11 +193,16 @@ export class GameClient {
         });
 
         // Добавляем обработчик для game_update
-        this.socket.on('game_update', (gameUpdate: GameUpdateEvent) => {
+        this.socket.on('game_update', (payload: GameUpdateEvent | ArrayBuffer | Uint8Array) => {
+            // Бинарные обновления приходят, если сервер согласовал msgpack при join_game
+            const gameUpdate: GameUpdateEvent = (payload instanceof ArrayBuffer || payload instanceof Uint8Array)
+                ? this.updateDecoder.decode(payload)
+                : payload;
+            dequantizeUpdate(gameUpdate, this.updateQuantization);
             logger.debug('Получено событие game_update', {
                 hasGrid: !!gameUpdate?.map_update,
             });
-            this.processGameStateUpdate(gameUpdate);
+            this.receiveGameUpdate(gameUpdate);
         });
 
         this.socket.on('player_disconnected', (data: { player_id: string }) => {
@@ -250,18 +273,19 @@ export class GameClient {
     // Функция для обработки результата запроса состояния игры
     private handleGetGameStateResponse(response: ResponseGameState): void {
         if (response.success) {
+            this.updateDecoder.mergeTable(response.entity_handles);
+            this.updateQuantization = response.update_quantization ?? null;
             logger.debug('Получено состояние игры и полная карта', {
                 hasFullMap: !!(response.game_state && response.game_state.map),
                 hasGameState: !!response.game_state
             });
             
             // Сохраняем полную карту в кеш
-            if (response.game_state.map && response.game_state.map.grid) {
+            if (response.game_state.map && this.setMapGrid(response.game_state.map)) {
                 logger.debug('Получена полная карта', {
                     width: response.game_state.map.width,
                     height: response.game_state.map.height
                 });
-                this.cachedMapGrid = JSON.parse(JSON.stringify(response.game_state.map.grid));
             } else {
                 logger.error('Не удалось получить карту из запроса состояния', {
                     message: response.message,
@@ -275,6 +299,7 @@ export class GameClient {
             });
             // Сохраняем состояние игры
             this.gameState = response.game_state;
+            this.lastSeq = response.seq ?? null;
         } else {
             logger.error('Ошибка получения состояния игры', {
                 message: response.message,
@@ -283,20 +308,120 @@ export class GameClient {
                 responseData: response
             });
         }
+        this.finishResync();
     }
 
-    // Запрос полного состояния игры
+    // Восстановление состояния: keyframe и хвост обновлений из webapi, если их нет - полное состояние игры
     private requestGameState(): void {
+        if (this.isResyncing) {
+            return;
+        }
+        this.isResyncing = true;
+        const fromSeq = this.gameState && this.cachedMapGrid ? this.lastSeq : null;
+        logger.debug('Восстанавливаем поток обновлений игры', {
+            gameId: this.gameId,
+            fromSeq
+        });
+        this.socket?.emit('resync_game', {
+            game_id: this.gameId,
+            from_seq: fromSeq
+        }, this.handleResyncResponse.bind(this));
+    }
+
+    // Запрос полного состояния игры
+    private requestFullGameState(): void {
         logger.debug('Запрашиваем состояние игры', {
             gameId: this.gameId,
             playerId: this.playerId
         });
         this.socket?.emit('get_game_state', {
-            game_id: this.gameId
+            game_id: this.gameId,
+            map_encoding: MAP_ENCODING_BASE64
         }, this.handleGetGameStateResponse.bind(this));
 
     }
 
+    private handleResyncResponse(response: ResponseResyncGame): void {
+        if (!response.success) {
+            logger.debug('Восстановление потока недоступно, запрашиваем полное состояние', {
+                message: response.message
+            });
+            this.requestFullGameState();
+            return;
+        }
+        this.updateDecoder.mergeTable(response.entity_handles);
+        if (response.update_quantization !== undefined) {
+            this.updateQuantization = response.update_quantization;
+        }
+        if (response.keyframe) {
+            if (!response.keyframe.map || !this.setMapGrid(response.keyframe.map)) {
+                this.cachedMapGrid = null;
+            }
+            this.processFullGameStateUpdate(response.keyframe);
+            this.lastSeq = response.keyframe.seq;
+        }
+        // Обновления ответа всегда в JSON и ещё не восстановлены из квантованного вида
+        for (const gameUpdate of response.updates ?? []) {
+            this.applySequencedUpdate(dequantizeUpdate(gameUpdate, this.updateQuantization));
+        }
+        this.finishResync();
+    }
+
+    // Применить обновление по порядку seq; при пропуске восстановить поток через resync_game
+    private receiveGameUpdate(gameUpdate: GameUpdateEvent): void {
+        if (this.isResyncing || !this.gameState || !this.cachedMapGrid) {
+            this.pendingUpdates.push(gameUpdate);
+            this.requestGameState();
+            return;
+        }
+        const seq = gameUpdate.seq;
+        if (seq !== undefined && seq !== null && this.lastSeq !== null && seq > this.lastSeq + 1) {
+            logger.warn('Пропущены обновления игры', {
+                expected: this.lastSeq + 1,
+                received: seq
+            });
+            this.pendingUpdates.push(gameUpdate);
+            this.requestGameState();
+            return;
+        }
+        this.applySequencedUpdate(gameUpdate);
+    }
+
+    private applySequencedUpdate(gameUpdate: GameUpdateEvent): void {
+        const seq = gameUpdate.seq;
+        if (seq !== undefined && seq !== null) {
+            if (this.lastSeq !== null && seq <= this.lastSeq) {
+                // Уже учтено в keyframe или хвосте resync
+                return;
+            }
+            this.lastSeq = seq;
+        }
+        this.processGameStateUpdate(gameUpdate);
+    }
+
+    // Завершить восстановление и применить обновления, пришедшие за это время
+    private finishResync(): void {
+        this.isResyncing = false;
+        const pending = this.pendingUpdates.sort((a, b) => (a.seq ?? 0) - (b.seq ?? 0));
+        this.pendingUpdates = [];
+        for (const gameUpdate of pending) {
+            this.receiveGameUpdate(gameUpdate);
+        }
+    }
+
+    // Развернуть карту в кеш и в map.grid (компактные кодировки приходят в map.data)
+    private setMapGrid(map: MapData): boolean {
+        const grid = decodeMapGrid(map);
+        if (!grid) {
+            return false;
+        }
+        this.cachedMapGrid = grid;
+        map.grid = grid;
+        map.encoding = null;
+        map.data = null;
+        return true;
+    }
+
     // Обработка обновлений игры
     private processFullGameStateUpdate(gameState: GameState): void {
         this.lastUpdateTime = performance.now();
@@ -323,13 +448,28 @@ export class GameClient {
             return;
         }else{
             this.lastUpdateTime = performance.now();
-            this.gameState.status = gameUpdate.status
-            this.gameState.is_active = gameUpdate.is_active
+            // Heartbeat не содержит статуса игры: он приходит только вместе с изменениями
+            if (gameUpdate.status !== undefined) {
+                this.gameState.status = gameUpdate.status
+                this.gameState.is_active = gameUpdate.is_active ?? this.gameState.is_active
+            }
 
             // Обновляем оставшееся время обратного отсчёта
             if (gameUpdate.time_remaining !== undefined && gameUpdate.time_remaining !== null) {
                 this.gameState.time_remaining = gameUpdate.time_remaining;
             }
+            // Карта заменена целиком (новый уровень)
+            if (gameUpdate.map) {
+                this.gameState.map = {...gameUpdate.map};
+                if (!this.setMapGrid(this.gameState.map)) {
+                    logger.warn('Не удалось разобрать карту из обновления', {
+                        encoding: gameUpdate.map.encoding
+                    });
+                    this.cachedMapGrid = null;
+                    this.requestGameState();
+                    return;
+                }
+            }
             // Применяем изменения к кешированной карте
             if (gameUpdate.map_update && this.cachedMapGrid){
                 try {
@@ -343,93 +483,20 @@ export class GameClient {
                 }
             }
 
-            // Создаем новый объект для актуальных игроков
-            const updatedPlayers: { [key: string]: GamePlayerInfo } = {};
-            // Обновляем/добавляем игроков из gameUpdate.players_update
-            for (const playerId in gameUpdate.players_update) {
-              if (Object.prototype.hasOwnProperty.call(gameUpdate.players_update, playerId)) {
-                const player = gameUpdate.players_update[playerId];
-                const updatedState = this.gameState.players[playerId]
-                  ? { ...this.gameState.players[playerId] }
-                  : {} as GamePlayerInfo;
-                for (const key in player) {
-                  if (Object.prototype.hasOwnProperty.call(player, key)) {
-                    (updatedState as any)[key] = player[key as keyof OptionalGamePlayerInfo];
-                  }
-                }
-                updatedPlayers[playerId] = updatedState;
-              }
-            }
-
-            // Заменяем gameState.players только актуальными игроками
-            this.gameState.players = updatedPlayers;
-
-
-            // Создаем новый объект для актуальных enemies
-            const updatedEnemies: { [key: string]: EnemyState } = {};
-            // Обновляем/добавляем игроков из gameUpdate.enemies_update
-            for (const enemyId in gameUpdate.enemies_update) {
-              if (Object.prototype.hasOwnProperty.call(gameUpdate.enemies_update, enemyId)) {
-                const enemy = gameUpdate.enemies_update[enemyId];
-                const updatedState = this.gameState.enemies[enemyId]
-                  ? { ...this.gameState.enemies[enemyId] }
-                  : {} as EnemyState;
-                for (const key in enemy) {
-                  if (Object.prototype.hasOwnProperty.call(enemy, key)) {
-                    (updatedState as any)[key] = enemy[key as keyof OptionalEnemyState];
-                  }
-                }
-                updatedEnemies[enemyId] = updatedState;
-              }
-            }
-
-            // Заменяем gameState.enemies только актуальными enemies
-            this.gameState.enemies = updatedEnemies;
-
-
-
-            // Создаем новый объект для актуальных weapons
-            const updatedWeapons: { [key: string]: WeaponState } = {};
-            // Обновляем/добавляем игроков из gameUpdate.weapons_update
-            for (const weaponId in gameUpdate.weapons_update) {
-              if (Object.prototype.hasOwnProperty.call(gameUpdate.weapons_update, weaponId)) {
-                const weapon = gameUpdate.weapons_update[weaponId];
-                const updatedState = this.gameState.weapons[weaponId]
-                  ? { ...this.gameState.weapons[weaponId] }
-                  : {} as WeaponState;
-                for (const key in weapon) {
-                  if (Object.prototype.hasOwnProperty.call(weapon, key)) {
-                    (updatedState as any)[key] = weapon[key as keyof OptionalWeaponState];
-                  }
-                }
-                updatedWeapons[weaponId] = updatedState;
-              }
-            }
-
-            // Заменяем gameState.weapons только актуальными weapons
-            this.gameState.weapons = updatedWeapons;
-
-
-            // Создаем новый объект для актуальных power_ups
-            const updatedPowerUps: { [key: string]: PowerUpState } = {};
-            // Обновляем/добавляем игроков из gameUpdate.power_ups_update
-            for (const powerUpId in gameUpdate.power_ups_update) {
-              if (Object.prototype.hasOwnProperty.call(gameUpdate.power_ups_update, powerUpId)) {
-                const powerUp = gameUpdate.power_ups_update[powerUpId];
-                const updatedState = this.gameState.power_ups[powerUpId]
-                  ? { ...this.gameState.power_ups[powerUpId] }
-                  : {} as PowerUpState;
-                for (const key in powerUp) {
-                  if (Object.prototype.hasOwnProperty.call(powerUp, key)) {
-                    (updatedState as any)[key] = powerUp[key as keyof OptionalPowerUpState];
-                  }
-                }
-                updatedPowerUps[powerUpId] = updatedState;
-              }
-            }
-
-            // Заменяем gameState.weapons только актуальными weapons
-            this.gameState.power_ups = updatedPowerUps;
+            // Применяем изменения сущностей: неизменившиеся сущности в обновление не попадают,
+            // пропавшие сущности приходят списком *_removed
+            this.gameState.players = this.applyEntityUpdates(
+                this.gameState.players, gameUpdate.players_update, gameUpdate.players_removed
+            );
+            this.gameState.enemies = this.applyEntityUpdates(
+                this.gameState.enemies, gameUpdate.enemies_update, gameUpdate.enemies_removed
+            );
+            this.gameState.weapons = this.applyEntityUpdates(
+                this.gameState.weapons, gameUpdate.weapons_update, gameUpdate.weapons_removed
+            );
+            this.gameState.power_ups = this.applyEntityUpdates(
+                this.gameState.power_ups, gameUpdate.power_ups_update, gameUpdate.power_ups_removed
+            );
 
 
             // for (const entityId in gameUpdate.teams_update) {
@@ -463,6 +530,24 @@ export class GameClient {
         this.startGameLoop();
     }
 
+    // Обновление сущностей одного типа частичными изменениями
+    private applyEntityUpdates<T>(
+        current: { [entityId: string]: T },
+        updates?: { [entityId: string]: Partial<T> } | null,
+        removed?: string[] | null
+    ): { [entityId: string]: T } {
+        const updatedEntities: { [entityId: string]: T } = { ...current };
+        for (const entityId in updates) {
+            if (Object.prototype.hasOwnProperty.call(updates, entityId)) {
+                updatedEntities[entityId] = { ...updatedEntities[entityId], ...updates[entityId] } as T;
+            }
+        }
+        for (const entityId of removed ?? []) {
+            delete updatedEntities[entityId];
+        }
+        return updatedEntities;
+    }
+
     private startGameLoop(): void {
         const gameLoop = () => {
 
@@ -626,10 +711,17 @@ export class GameClient {
         }
 
         logger.info(`Attempting to join game ${gameId} as player ${playerId}`);
-        this.socket.emit('join_game', { game_id: gameId, player_id: playerId }, (response: any) => {
+        this.updateDecoder.reset();
+        this.lastSeq = null;
+        this.isResyncing = false;
+        this.pendingUpdates = [];
+        this.lastSentInputs = null;
+        this.socket.emit('join_game', { game_id: gameId, player_id: playerId, update_format: UPDATE_FORMAT_MSGPACK, map_encoding: MAP_ENCODING_BASE64 }, (response: any) => {
             if (response.success) {
                 this.gameId = gameId;
                 this.playerId = playerId;
+                this.updateDecoder.mergeTable(response.entity_handles);
+                this.updateQuantization = response.update_quantization ?? null;
                 
                 // Очищаем кнопки меню, так как игра начинается
                 this.clearButtons();
@@ -769,18 +861,31 @@ export class GameClient {
         }
         
         const inputs = this.inputHandler.getInput();
-        
+        const movement = {
+            up: inputs.up,
+            down: inputs.down,
+            left: inputs.left,
+            right: inputs.right
+        };
+        const movementKey = JSON.stringify(movement);
+        const ackedSeq = this.playerId ? this.gameState?.players[this.playerId]?.input_seq : null;
+        const now = Date.now();
+        const isUnacked = ackedSeq !== this.inputSeq
+            && now - this.lastInputSentTime > GameClient.INPUT_RESEND_INTERVAL;
+
         // Отправляем ввод игрока в соответствии с форматом, ожидаемым сервером
-        // if (inputs.up || inputs.down || inputs.left || inputs.right)
-        this.socket?.emit('input', {
-            game_id: this.gameId,
-            inputs: {
-                up: inputs.up,
-                down: inputs.down,
-                left: inputs.left,
-                right: inputs.right
+        if (movementKey !== this.lastSentInputs || isUnacked) {
+            if (movementKey !== this.lastSentInputs) {
+                this.inputSeq += 1;
             }
-        });
+            this.lastSentInputs = movementKey;
+            this.lastInputSentTime = now;
+            this.socket?.emit('input', {
+                game_id: this.gameId,
+                seq: this.inputSeq,
+                inputs: movement
+            });
+        }
         
 
         if (inputs.weapon1) {
@@ -81,6 +81,7 @@ export interface GamePlayerInfo {
     invulnerable: boolean;
     color: string;
     unit_type: UnitType;
+    input_seq?: number | null;
 }
 export type OptionalGamePlayerInfo = Partial<GamePlayerInfo>;
 
@@ -120,6 +121,9 @@ export interface MapData {
   grid: number[][] | null;
   width: number;
   height: number;
+  // Компактная кодировка карты: при ней grid = null, а ячейки записаны в data
+  encoding?: string | null;
+  data?: string | number[] | null;
 }
 
 export interface GameTeamInfo {
@@ -255,6 +259,11 @@ export interface GameCreateSettings {
     time_limit?: number | null;       // = 300
     score_limit?: number | null;      // = 10
     rounds_count?: number | null;     // = 15
+    // Квантование координат и таймеров в обновлениях
+    quantize_updates?: boolean;       // = false
+    position_precision?: number;      // = 64
+    // Радиус области интереса в клетках (0 = изменения всей карты)
+    interest_radius?: number;         // = 0
 }
 
 export interface GameListItem {
@@ -305,11 +314,14 @@ export interface GameState {
 }
 
 export interface GameUpdateEvent {
-    status: GameStatus;
-    is_active: boolean;
+    // Отсутствуют в heartbeat (game_id, tick, seq и time_remaining тика без изменений)
+    status?: GameStatus;
+    is_active?: boolean;
     error?: boolean; // по умолчанию False → необязательное с типом boolean
     message?: string | null;
     map_update?: MapUpdate[] | null;
+    // Карта целиком, если она заменена (переход на новый уровень)
+    map?: MapData | null;
     players_update?: {
         [playerId: string]: OptionalGamePlayerInfo
     };
@@ -322,15 +334,56 @@ export interface GameUpdateEvent {
     power_ups_update?: {
         [entityId: string]: OptionalPowerUpState
     };
+    // Сущности, пропавшие с прошлого обновления
+    players_removed?: string[] | null;
+    enemies_removed?: string[] | null;
+    weapons_removed?: string[] | null;
+    power_ups_removed?: string[] | null;
     game_id?: string | null;
+    // Номер тика игры; тики без изменений не публикуются, раз в интервал приходит heartbeat
+    tick?: number | null;
+    // Номер опубликованного обновления: растёт на 1, пропуск означает потерянное обновление
+    seq?: number | null;
     // Оставшееся время обратного отсчёта (null/undefined = таймер не активен)
     time_remaining?: number | null;
 }
 
 
+// Параметры квантования обновлений игры (null - значения передаются как есть)
+export interface UpdateQuantization {
+    // Размер шага координаты в пикселях
+    position_step: number;
+    // Множитель таймеров (1000 - миллисекунды)
+    time_scale: number;
+    // Суффикс полей-таймеров сущностей, передаваемых в единицах time_scale
+    timer_suffix?: string;
+    // Направления по индексам
+    directions: Array<[number, number]>;
+}
+
 export interface ResponseGameState{
     success: boolean,
     game_state: GameState,
-    message?: string
+    message?: string,
+    // Таблица хэндл -> id сущностей для обновлений в формате msgpack
+    entity_handles?: { [handle: string]: string } | null,
+    update_quantization?: UpdateQuantization | null,
+    // Номер последнего обновления, уже учтённого в game_state
+    seq?: number | null
+}
+
+// Снимок состояния игры, после которого применяются обновления с большим seq
+export interface GameKeyframe extends GameState {
+    seq: number;
+}
+
+// Ответ resync_game: keyframe (если недостающих обновлений уже нет) и JSON-обновления после него
+export interface ResponseResyncGame {
+    success: boolean;
+    message?: string;
+    keyframe?: GameKeyframe | null;
+    updates?: GameUpdateEvent[];
+    entity_handles?: { [handle: string]: string } | null;
+    update_quantization?: UpdateQuantization | null;
 }
 
@@ -0,0 +1,153 @@
+import {decode} from '@msgpack/msgpack';
+import {GameUpdateEvent, MapData, UpdateQuantization} from "../types/Game";
+
+// Форматы обновлений игры, согласуемые при join_game
+export const UPDATE_FORMAT_JSON = 'json';
+export const UPDATE_FORMAT_MSGPACK = 'msgpack';
+
+// Кодировки карты (MapData.encoding), согласуемые при join_game/get_game_state:
+// list - вложенный список grid, rle - пары [значение, длина серии] в data, base64 - буфер int8 в data
+export const MAP_ENCODING_LIST = 'list';
+export const MAP_ENCODING_RLE = 'rle';
+export const MAP_ENCODING_BASE64 = 'base64';
+
+// [ключ изменений, ключ удалённых, поле идентификатора в словаре изменений]
+const ENTITY_KINDS: Array<[string, string, string]> = [
+    ['players_update', 'players_removed', 'player_id'],
+    ['enemies_update', 'enemies_removed', 'entity_id'],
+    ['weapons_update', 'weapons_removed', 'entity_id'],
+    ['power_ups_update', 'power_ups_removed', 'entity_id'],
+];
+
+// Таблица хэндлов сущностей игры и перевод бинарных обновлений в GameUpdateEvent
+export class GameUpdateDecoder {
+    private ids: Map<number, string> = new Map();
+
+    // Добавить хэндлы из ответа join_game/get_game_state (известные хэндлы не перезаписываются)
+    public mergeTable(table?: { [handle: string]: string } | null): void {
+        if (!table) {
+            return;
+        }
+        for (const handle in table) {
+            const key = Number(handle);
+            if (!this.ids.has(key)) {
+                this.ids.set(key, table[handle]);
+            }
+        }
+    }
+
+    public reset(): void {
+        this.ids.clear();
+    }
+
+    public decode(payload: ArrayBuffer | Uint8Array): GameUpdateEvent {
+        const data = decode(payload) as any;
+        for (const [updateKey, removedKey, idField] of ENTITY_KINDS) {
+            const updates = data[updateKey];
+            if (updates) {
+                const translated: { [entityId: string]: any } = {};
+                for (const handle in updates) {
+                    const fields = updates[handle];
+                    const key = Number(handle);
+                    let entityId: string | undefined = fields[idField];
+                    if (entityId === undefined) {
+                        entityId = this.ids.get(key);
+                        if (entityId === undefined) {
+                            // Хэндл выдан до присоединения к игре и не попал в таблицу
+                            continue;
+                        }
+                        fields[idField] = entityId;
+                    } else {
+                        this.ids.set(key, entityId);
+                    }
+                    translated[entityId] = fields;
+                }
+                data[updateKey] = translated;
+            }
+            const removed: number[] | undefined = data[removedKey];
+            if (removed) {
+                const removedIds: string[] = [];
+                for (const handle of removed) {
+                    const entityId = this.ids.get(handle);
+                    if (entityId !== undefined) {
+                        this.ids.delete(handle);
+                        removedIds.push(entityId);
+                    }
+                }
+                data[removedKey] = removedIds;
+            }
+        }
+        return data as GameUpdateEvent;
+    }
+}
+
+// Восстановить координаты, таймер и направления квантованного обновления (GameSettings.quantize_updates)
+export function dequantizeUpdate(update: GameUpdateEvent, quantization?: UpdateQuantization | null): GameUpdateEvent {
+    if (!quantization) {
+        return update;
+    }
+    const step = quantization.position_step;
+    for (const [updateKey] of ENTITY_KINDS) {
+        const updates = (update as any)[updateKey];
+        if (!updates) {
+            continue;
+        }
+        for (const entityId in updates) {
+            const fields = updates[entityId];
+            if (fields.x !== undefined) {
+                fields.x *= step;
+            }
+            if (fields.y !== undefined) {
+                fields.y *= step;
+            }
+            if (typeof fields.direction === 'number') {
+                fields.direction = quantization.directions[fields.direction];
+            }
+            // Таймеры сущностей (поля *_timer) приходят в тех же единицах, что и time_remaining
+            if (quantization.timer_suffix) {
+                for (const field in fields) {
+                    if (field.endsWith(quantization.timer_suffix) && typeof fields[field] === 'number') {
+                        fields[field] /= quantization.time_scale;
+                    }
+                }
+            }
+        }
+    }
+    if (update.time_remaining !== undefined && update.time_remaining !== null) {
+        update.time_remaining /= quantization.time_scale;
+    }
+    return update;
+}
+
+// Развернуть карту в двумерный grid; null - кодировка не поддерживается (например, zlib)
+export function decodeMapGrid(map: MapData): number[][] | null {
+    const encoding = map.encoding ?? MAP_ENCODING_LIST;
+    if (encoding === MAP_ENCODING_LIST) {
+        return map.grid ? map.grid.map(row => row.slice()) : null;
+    }
+    let cells: ArrayLike<number>;
+    if (encoding === MAP_ENCODING_RLE && Array.isArray(map.data)) {
+        const pairs = map.data;
+        const expanded: number[] = [];
+        for (let index = 0; index < pairs.length; index += 2) {
+            for (let count = 0; count < pairs[index + 1]; count++) {
+                expanded.push(pairs[index]);
+            }
+        }
+        cells = expanded;
+    } else if (encoding === MAP_ENCODING_BASE64 && typeof map.data === 'string') {
+        const binary = atob(map.data);
+        const bytes = new Uint8Array(binary.length);
+        for (let index = 0; index < binary.length; index++) {
+            bytes[index] = binary.charCodeAt(index);
+        }
+        cells = new Int8Array(bytes.buffer);
+    } else {
+        return null;
+    }
+    const grid: number[][] = [];
+    for (let y = 0; y < map.height; y++) {
+        grid.push(Array.from({length: map.width}, (_, x) => cells[y * map.width + x]));
+    }
+    return grid;
+}
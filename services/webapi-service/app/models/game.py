@@ -58,6 +58,11 @@ class GameCreateSettings(BaseModel):
     time_limit: int | None = 300  # в секундах
     score_limit: int | None = 10
     rounds_count: int | None = 15
+    # Квантование координат и таймеров в обновлениях игры
+    quantize_updates: bool = False
+    position_precision: int = Field(64, ge=1)
+    # Радиус области интереса в клетках (0 = игрок получает изменения всей карты)
+    interest_radius: int = Field(0, ge=0)
 
 class JoinGameRequest(BaseModel):
     """Модель для присоединения к игре"""
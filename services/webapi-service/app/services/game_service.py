@@ -3,6 +3,7 @@ import logging
 from typing import Dict, Any, Callable
 
 from ..models.game import GameCreateSettings
+from ..services.update_codec import MAP_ENCODING_LIST
 from ..services.nats_service import NatsService
 
 logger = logging.getLogger(__name__)
@@ -120,7 +121,13 @@ class GameService:
             logger.error(f"Error registering socket handler for SID {sid}, event {event}: {e}", exc_info=True)
             raise
 
-    async def send_input(self, game_id: str, sid_user_id: str, inputs: Dict[str, bool]) -> None:
+    def unregister_socket_handler(self, game_id: str) -> None:
+        """
+        Прокси метод для удаления слушателей игры в nats
+        """
+        self.nats_service.unregister_socket_handler(game_id=game_id)
+
+    async def send_input(self, game_id: str, sid_user_id: str, inputs: Dict[str, bool], seq: int | None = None) -> None:
         """
         Команда: Отправить ввод игрока
         
@@ -128,6 +135,7 @@ class GameService:
             game_id: Идентификатор игры
             player_id: Идентификатор игрока
             inputs: Ввод игрока
+            seq: Номер ввода клиента (возвращается в input_seq игрока после применения)
         """
         try:
             if not game_id:
@@ -145,7 +153,7 @@ class GameService:
             player_id = self.sid_user_id_to_player[sid_user_id]
             logger.debug(f"Sending inputs for player {player_id} in game {game_id}: {inputs}")
 
-            await self.nats_service.send_input(game_id=game_id, player_id=player_id, inputs=inputs)
+            await self.nats_service.send_input(game_id=game_id, player_id=player_id, inputs=inputs, seq=seq)
             logger.debug(f"Input sent successfully for player {player_id} in game {game_id}")
         except Exception as e:
             logger.error(f"Error sending input for SID {sid_user_id} in game {game_id}: {e}", exc_info=True)
@@ -259,19 +267,20 @@ class GameService:
     
     # Queries - не изменяют состояние, только запрашивают данные
     
-    async def get_game_state(self, game_id: str) -> Dict[str, Any]:
+    async def get_game_state(self, game_id: str, map_encoding: str = MAP_ENCODING_LIST) -> Dict[str, Any]:
         """
         Запрос: Получить состояние игры
         
         Args:
             game_id: Идентификатор игры
+            map_encoding: Кодировка карты в состоянии (MAP_ENCODINGS)
             
         Returns:
             Dict[str, Any]: Состояние игры
         """
         try:
             logger.debug(f"Getting state for game {game_id}")
-            response = await self.nats_service.get_game_state(game_id)
+            response = await self.nats_service.get_game_state(game_id=game_id, map_encoding=map_encoding)
             
             if response.get('success'):
                 logger.debug(f"Successfully retrieved state for game {game_id}")
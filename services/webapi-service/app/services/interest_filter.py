@@ -0,0 +1,137 @@
+from typing import Any
+
+from .update_codec import ENTITY_KINDS
+
+
+class GameInterestFilter:
+    """
+    Область интереса игры (GameSettings.interest_radius): клиент получает изменения только тех сущностей,
+    клетка которых не дальше radius клеток от клетки его игрока (свой игрок - всегда).
+
+    Фильтр ведёт копию полного состояния сущностей (keyframe и обновления после него) и их клетки
+    из entity_cells. Сущность, вошедшая в область интереса клиента, отправляется ему целиком,
+    покинувшая её - попадает в *_removed. Изменения карты, статус, таймер и seq получают все клиенты.
+    До первого keyframe полного состояния нет, и клиенты получают обновления без фильтрации.
+    """
+
+    def __init__(self, radius: int) -> None:
+        self.radius: int = radius
+        # ключ *_update -> {id сущности: полное состояние}
+        self.entities: dict[str, dict[str, dict[str, Any]]] = {update_key: {} for update_key, _, _ in ENTITY_KINDS}
+        self.cells: dict[str, tuple[int, int]] = {}
+        # Копия состояния построена по keyframe (до него в обновлениях есть только изменения)
+        self.has_keyframe: bool = False
+        # sid -> id игрока клиента
+        self.viewers: dict[str, str] = {}
+        # sid -> сущности, которые есть у клиента (None - клиент получил состояние всей игры)
+        self.visible: dict[str, set[str] | None] = {}
+        # sid -> клетка игрока клиента при прошлой фильтрации
+        self.viewer_cells: dict[str, tuple[int, int] | None] = {}
+
+    def add_viewer(self, sid: str, player_id: str) -> None:
+        self.viewers[sid] = player_id
+        self.reset_viewer(sid=sid)
+
+    def reset_viewer(self, sid: str) -> None:
+        """Клиент получил полное состояние (get_game_state, resync_game): область интереса строится заново"""
+        if sid in self.viewers:
+            self.visible[sid] = None
+            self.viewer_cells[sid] = None
+
+    def remove_viewer(self, sid: str) -> None:
+        self.viewers.pop(sid, None)
+        self.visible.pop(sid, None)
+        self.viewer_cells.pop(sid, None)
+
+    def add_keyframe(self, keyframe: dict[str, Any]) -> None:
+        """Заменить копию состояния снимком game.keyframe.* (значения в нём не квантованы)"""
+        quantization = keyframe.get("update_quantization")
+        for update_key, _, _ in ENTITY_KINDS:
+            entities = keyframe.get(update_key.removesuffix("_update")) or {}
+            self.entities[update_key] = {
+                entity_id: self._quantize(state=dict(state), quantization=quantization)
+                for entity_id, state in entities.items()
+            }
+        self.cells = {entity_id: tuple(cell) for entity_id, cell in (keyframe.get("entity_cells") or {}).items()}
+        self.has_keyframe = True
+
+    def apply(self, update: dict[str, Any]) -> None:
+        """Применить обновление к копии состояния (до фильтрации для клиентов)"""
+        if not self.has_keyframe:
+            return
+        for update_key, removed_key, _ in ENTITY_KINDS:
+            entities = self.entities[update_key]
+            for entity_id, changes in (update.get(update_key) or {}).items():
+                entities[entity_id] = {**entities.get(entity_id, {}), **changes}
+            for entity_id in update.get(removed_key) or ():
+                entities.pop(entity_id, None)
+                self.cells.pop(entity_id, None)
+        for entity_id, cell in (update.get("entity_cells") or {}).items():
+            self.cells[entity_id] = tuple(cell)
+
+    def filter(self, sid: str, update: dict[str, Any]) -> dict[str, Any]:
+        """Обновление для клиента sid: только сущности в области интереса его игрока"""
+        update = {key: value for key, value in update.items() if key != "entity_cells"}
+        if not self.has_keyframe:
+            # Клиент остаётся с состоянием всей игры (visible - None) до первой фильтрации после keyframe
+            return update
+        player_id = self.viewers.get(sid)
+        center = self.cells.get(player_id)
+
+        visible = self.visible.get(sid)
+        if visible is None:
+            visible = {entity_id for entities in self.entities.values() for entity_id in entities}
+        # Клиент сменил клетку: сущности вокруг могли войти в область интереса или выйти из неё без изменений
+        viewer_moved = center != self.viewer_cells.get(sid)
+        self.viewer_cells[sid] = center
+
+        for update_key, removed_key, _ in ENTITY_KINDS:
+            entities = self.entities[update_key]
+            changes = update.get(update_key) or {}
+            filtered: dict[str, dict[str, Any]] = {}
+            removed = [entity_id for entity_id in update.get(removed_key) or () if entity_id in visible]
+            visible.difference_update(removed)
+            for entity_id in (entities if viewer_moved else changes):
+                if entity_id not in entities:
+                    continue
+                if self._is_visible(entity_id=entity_id, player_id=player_id, center=center):
+                    if entity_id not in visible:
+                        visible.add(entity_id)
+                        filtered[entity_id] = entities[entity_id]
+                    elif entity_id in changes:
+                        filtered[entity_id] = changes[entity_id]
+                elif entity_id in visible:
+                    visible.discard(entity_id)
+                    removed.append(entity_id)
+            update[update_key] = filtered or None
+            update[removed_key] = removed or None
+
+        self.visible[sid] = visible
+        return update
+
+    def _is_visible(self, entity_id: str, player_id: str, center: tuple[int, int] | None) -> bool:
+        """Игрока клиента нет на карте (ещё не появился или выбыл) - клиент видит всю игру"""
+        cell = self.cells.get(entity_id)
+        if center is None or entity_id == player_id or cell is None:
+            return True
+        return max(abs(cell[0] - center[0]), abs(cell[1] - center[1])) <= self.radius
+
+    @staticmethod
+    def _quantize(state: dict[str, Any], quantization: dict[str, Any] | None) -> dict[str, Any]:
+        """Привести значения снимка к виду квантованных обновлений, которые клиент восстанавливает сам"""
+        if not quantization:
+            return state
+        step = quantization["position_step"]
+        for field in ("x", "y"):
+            if state.get(field) is not None:
+                state[field] = round(state[field] / step)
+        timer_suffix = quantization.get("timer_suffix")
+        if timer_suffix:
+            for field, value in state.items():
+                if value is not None and field.endswith(timer_suffix):
+                    state[field] = round(value * quantization["time_scale"])
+        direction = state.get("direction")
+        if direction is not None:
+            directions = quantization["directions"]
+            state["direction"] = directions.index(list(direction)) if list(direction) in directions else None
+        return state
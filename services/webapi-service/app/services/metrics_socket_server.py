@@ -82,7 +82,10 @@ class MetricsSocketServer(socketio.AsyncServer):
             # Замерить размер данных
             if data is not None:
                 try:
-                    data_size = len(json.dumps(data).encode('utf-8'))
+                    if isinstance(data, bytes):
+                        data_size = len(data)
+                    else:
+                        data_size = len(json.dumps(data).encode('utf-8'))
                     self.message_size_bytes.observe({'event_type': event_type, 'direction': 'outgoing'}, data_size)
                 except Exception as e:
                     logger.warning(f"Failed to calculate data size for event {event_type}: {e}")
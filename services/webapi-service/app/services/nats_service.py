@@ -9,6 +9,7 @@ from nats.aio.msg import Msg
 
 from ..config import settings
 from ..models.game import GameCreateSettings
+from .update_codec import MAP_ENCODING_LIST, MSGPACK_CONTENT_TYPE
 
 if TYPE_CHECKING:
     from .game_cache import GameInstanceCache
@@ -38,6 +39,7 @@ class NatsService:
                 # шардируем евенты с HOSTNAME для распределения по инстансам сервиса
                 # Подписываемся на обновления игры
                 await self._nc.subscribe(f"game.update.*", cb=self.handle_game_update)
+                await self._nc.subscribe("game.keyframe.*", cb=self.handle_game_keyframe)
                 await self._nc.subscribe(f"game.over.*", cb=self.handle_game_over)
                 await self._nc.subscribe(f"game.player_disconnected.*", cb=self.handle_player_disconnected)
 
@@ -89,17 +91,30 @@ class NatsService:
         """Обработчик обновления игры"""
         try:
             game_id = msg.subject.split('.')[-1]
-            game_state = json.loads(msg.data.decode())
             
             # Отправляем обновление всем подключенным клиентам через сокеты
             handler = self.socket_event_handlers.get(f"game_{game_id}", {}).get('game_update', None)
             if handler is not None:
-                await handler(game_id=game_id, game_state=game_state)
+                if msg.headers and msg.headers.get("Content-Type") == MSGPACK_CONTENT_TYPE:
+                    # Бинарное обновление раскодирует обработчик: клиентам msgpack оно уходит как есть
+                    await handler(game_id=game_id, packed=msg.data)
+                else:
+                    await handler(game_id=game_id, game_state=json.loads(msg.data.decode()))
 
             logger.debug(f"Game update for game {game_id} forwarded to {handler} handler")
         except Exception as e:
             logger.error(f"Error handling game update: {e}", exc_info=True)
     
+    async def handle_game_keyframe(self, msg: Msg) -> None:
+        """Обработчик снимка состояния игры (для resync клиентов, клиентам не рассылается)"""
+        try:
+            game_id = msg.subject.split('.')[-1]
+            handler = self.socket_event_handlers.get(f"game_{game_id}", {}).get('game_keyframe', None)
+            if handler is not None:
+                await handler(game_id=game_id, keyframe=json.loads(msg.data.decode()))
+        except Exception as e:
+            logger.error(f"Error handling game keyframe: {e}", exc_info=True)
+
     async def handle_game_over(self, msg: Msg) -> None:
         """Обработчик завершения игры"""
         try:
@@ -232,7 +247,7 @@ class NatsService:
             return {"success": False, "message": error_msg}
 
     
-    async def send_input(self, game_id: str, player_id: str, inputs: dict[str, bool]) -> None:
+    async def send_input(self, game_id: str, player_id: str, inputs: dict[str, bool], seq: int | None = None) -> None:
         """Отправка ввода игрока"""
         logger.debug(f"Sending input for player {player_id} in game {game_id}: {inputs}")
         try:
@@ -246,7 +261,8 @@ class NatsService:
                 json.dumps({
                     "game_id": game_id,
                     "player_id": player_id,
-                    "inputs": inputs
+                    "inputs": inputs,
+                    "seq": seq,
                 }).encode()
             )
         except Exception as e:
@@ -284,7 +300,7 @@ class NatsService:
             return {"success": False, "message": error_msg}
 
     
-    async def get_game_state(self, game_id: str) -> dict[str, Any]:
+    async def get_game_state(self, game_id: str, map_encoding: str = MAP_ENCODING_LIST) -> dict[str, Any]:
         """Получение состояния игры"""
         logger.debug(f"Getting state for game {game_id}")
 
@@ -297,7 +313,7 @@ class NatsService:
             sharded_subject = f"game.get_state.{game_service_address}"
             response = await nc.request(
                 sharded_subject,
-                json.dumps({"game_id": game_id}).encode(),
+                json.dumps({"game_id": game_id, "map_encoding": map_encoding}).encode(),
                 timeout=settings.NATS_TIMEOUT
             )
             result = json.loads(response.data.decode())
@@ -6,6 +6,17 @@ import socketio
 from redis.asyncio import Redis
 
 from .game_service import GameService
+from .interest_filter import GameInterestFilter
+from .update_codec import (
+    GameUpdateDecoder,
+    MAP_ENCODING_LIST,
+    MAP_ENCODINGS,
+    UPDATE_FORMAT_JSON,
+    UPDATE_FORMAT_MSGPACK,
+    get_map_encoding,
+    transcode_map,
+)
+from .update_log import GameUpdateLog
 from socketio import AsyncRedisManager
 from ..config import settings
 
@@ -32,6 +43,16 @@ class SocketIOService:
             cors_credentials=settings.CORS_CREDENTIALS
         )
         self.game_service = game_service
+        # game_id -> таблица хэндлов сущностей игры, публикующей обновления в msgpack
+        self.update_decoders: dict[str, GameUpdateDecoder] = {}
+        # game_id -> {sid: формат обновлений, согласованный с клиентом этого инстанса}
+        self.update_formats: dict[str, dict[str, str]] = {}
+        # sid -> кодировка карты, согласованная с клиентом (MAP_ENCODINGS)
+        self.map_encodings: dict[str, str] = {}
+        # game_id -> фильтр обновлений по области интереса игроков (игры с interest_radius)
+        self.interest_filters: dict[str, GameInterestFilter] = {}
+        # game_id -> последний keyframe игры и обновления после него (resync_game)
+        self.update_logs: dict[str, GameUpdateLog] = {}
 
         # Регистрируем обработчики событий
         self.register_handlers()
@@ -45,6 +66,7 @@ class SocketIOService:
         self.sio.on("input", self.io_handle_input)
         self.sio.on("place_weapon", self.io_handle_place_weapon)
         self.sio.on("get_game_state", self.io_handle_get_game_state)
+        self.sio.on("resync_game", self.io_handle_resync_game)
 
     async def io_handle_connect(self, sid: str, environ: Dict[str, Any]) -> None:
         """Handle client connection"""
@@ -54,6 +76,11 @@ class SocketIOService:
         """Handle client disconnection"""
         # Только логирование и уведомление game-service
         logger.info(f"Handling application-level disconnect for: {sid_user_id}")
+        for formats in self.update_formats.values():
+            formats.pop(sid_user_id, None)
+        self.map_encodings.pop(sid_user_id, None)
+        for interest_filter in self.interest_filters.values():
+            interest_filter.remove_viewer(sid=sid_user_id)
         
         # Уведомляем game-service об отключении игрока
         await self.game_service.disconnect_player(sid_user_id=sid_user_id)
@@ -75,20 +102,58 @@ class SocketIOService:
         try:
             game_id = data.get('game_id')
             player_id = data.get('player_id')
+            requested_format = data.get('update_format', UPDATE_FORMAT_JSON)
             if not game_id:
                 return {"success": False, "message": "Missing game_id"}
 
+            # Обновления начинаем разбирать до ответа game-service, чтобы не пропустить выданные за это время хэндлы
+            is_new_game = game_id not in self.update_decoders
+            decoder = self.update_decoders.setdefault(game_id, GameUpdateDecoder())
+            self.update_logs.setdefault(game_id, GameUpdateLog())
+            await self.game_service.register_socket_handler(sid=game_id, event='game_update', handler=self.handle_game_update)
+            await self.game_service.register_socket_handler(sid=game_id, event='game_keyframe', handler=self.handle_game_keyframe)
+
             response = await self.game_service.join_game(sid_user_id=sid, player_id=player_id, game_id=game_id)
 
             if response.get('success'):
-                # Присоединяемся к комнате для этой игры
+                interest_radius = response.get('interest_radius')
+                # msgpack отдаём только клиентам, которые его запросили, и только если игра публикует msgpack.
+                # Игры с областью интереса отправляют каждому клиенту своё обновление, только в JSON
+                update_format = (
+                    UPDATE_FORMAT_MSGPACK
+                    if requested_format == UPDATE_FORMAT_MSGPACK
+                    and response.get('update_format') == UPDATE_FORMAT_MSGPACK
+                    and not interest_radius
+                    else UPDATE_FORMAT_JSON
+                )
+                decoder.merge_table(response.get('entity_handles'))
+
+                # Присоединяемся к комнате для этой игры и к комнате её обновлений в выбранном формате
                 await self.sio.enter_room(sid, f"game_{game_id}")
+                if interest_radius:
+                    interest_filter = self.interest_filters.setdefault(game_id, GameInterestFilter(radius=interest_radius))
+                    interest_filter.add_viewer(sid=sid, player_id=response.get('player_id'))
+                else:
+                    await self.sio.enter_room(sid, f"game_{game_id}:{update_format}")
+                self.update_formats.setdefault(game_id, {})[sid] = update_format
+                self.map_encodings[sid] = self._get_requested_map_encoding(data=data)
 
                 # Регистрируем обработчики событий обновления игры
-                await self.game_service.register_socket_handler(sid=game_id, event='game_update', handler=self.handle_game_update)
                 await self.game_service.register_socket_handler(sid=game_id, event='game_over', handler=self.handle_game_over)
                 await self.game_service.register_socket_handler(sid=game_id, event='player_disconnected', handler=self.handle_player_disconnected)
 
+                response = {**response, "update_format": update_format}
+                if update_format == UPDATE_FORMAT_MSGPACK:
+                    # Таблица снимается после входа в комнату: все более поздние хэндлы клиент получит в обновлениях
+                    response["entity_handles"] = decoder.table()
+                else:
+                    response.pop("entity_handles", None)
+            elif is_new_game:
+                self.update_decoders.pop(game_id, None)
+                self.update_logs.pop(game_id, None)
+                self.interest_filters.pop(game_id, None)
+                self.game_service.unregister_socket_handler(game_id=game_id)
+
             return response
         except Exception as e:
             logger.error(f"Error joining game: {e}", exc_info=True)
@@ -99,9 +164,10 @@ class SocketIOService:
         try:
             game_id = data.get('game_id')
             inputs = data.get('inputs')
+            seq = data.get('seq')
 
             # Отправляем ввод игрока в game-service через NATS
-            await self.game_service.send_input(game_id=game_id, sid_user_id=sid_user_id, inputs=inputs)
+            await self.game_service.send_input(game_id=game_id, sid_user_id=sid_user_id, inputs=inputs, seq=seq)
         except Exception as e:
             logger.error(f"Error handling input: {e}", exc_info=True)
 
@@ -127,27 +193,154 @@ class SocketIOService:
                 return {"success": False, "message": "Missing game_id"}
 
             # Получаем состояние игры из game-service через NATS
-            response = await self.game_service.get_game_state(game_id=game_id)
+            map_encoding = self._get_requested_map_encoding(data=data, default=self.map_encodings.get(sid))
+            response = await self.game_service.get_game_state(game_id=game_id, map_encoding=map_encoding)
+            if game_id in self.interest_filters:
+                self.interest_filters[game_id].reset_viewer(sid=sid)
+            decoder = self.update_decoders.get(game_id)
+            if decoder is not None and 'entity_handles' in response:
+                decoder.merge_table(response['entity_handles'])
+                if self.update_formats.get(game_id, {}).get(sid) == UPDATE_FORMAT_MSGPACK:
+                    response = {**response, "entity_handles": decoder.table()}
+                else:
+                    response = {key: value for key, value in response.items() if key != 'entity_handles'}
             return response
         except Exception as e:
             logger.error(f"Error getting game state: {e}", exc_info=True)
             return {"success": False, "message": str(e)}
 
-    async def handle_game_update(self, game_id: str, game_state: Dict[str, Any]) -> None:
-        """Handle game state update from game service"""
+    async def io_handle_resync_game(self, sid: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Восстановить поток обновлений клиента после пропуска seq или при присоединении (from_seq = None)
+        по последнему keyframe и хвосту обновлений этого инстанса, без запроса в game-service.
+        Обновления в ответе всегда в JSON-формате; если восстановить нельзя, клиент запрашивает get_game_state.
+        """
         try:
-            await self.sio.emit(event='game_update', data=game_state, room=f"game_{game_id}")
+            game_id = data.get('game_id')
+            if not game_id:
+                return {"success": False, "message": "Missing game_id"}
+
+            update_log = self.update_logs.get(game_id)
+            resync = update_log.resync(from_seq=data.get('from_seq')) if update_log is not None else None
+            if resync is None:
+                return {"success": False, "message": "No keyframe available"}
+
+            # Карта в keyframe и в обновлениях со сменой уровня - в кодировке, согласованной с клиентом
+            map_encoding = self.map_encodings.get(sid, MAP_ENCODING_LIST)
+            keyframe = resync["keyframe"]
+            if keyframe is not None and keyframe.get("map"):
+                keyframe = {**keyframe, "map": transcode_map(keyframe["map"], map_encoding)}
+            updates = [
+                {**update, "map": transcode_map(update["map"], map_encoding)} if update.get("map") else update
+                for update in resync["updates"]
+            ]
+            if game_id in self.interest_filters:
+                self.interest_filters[game_id].reset_viewer(sid=sid)
+            response = {
+                "success": True,
+                "keyframe": keyframe,
+                "updates": updates,
+                "update_quantization": (update_log.keyframe or {}).get("update_quantization"),
+            }
+            decoder = self.update_decoders.get(game_id)
+            if decoder is not None and self.update_formats.get(game_id, {}).get(sid) == UPDATE_FORMAT_MSGPACK:
+                response["entity_handles"] = decoder.table()
+            return response
+        except Exception as e:
+            logger.error(f"Error resyncing game: {e}", exc_info=True)
+            return {"success": False, "message": str(e)}
+
+    async def handle_game_update(
+            self,
+            game_id: str,
+            game_state: Dict[str, Any] | None = None,
+            packed: bytes | None = None
+    ) -> None:
+        """Handle game state update from game service (JSON or msgpack with entity handles)"""
+        try:
+            if packed is not None:
+                decoder = self.update_decoders.setdefault(game_id, GameUpdateDecoder())
+                # Таблица хэндлов ведётся всегда, перевод в JSON нужен только клиентам без msgpack
+                game_state = decoder.decode(packed)
+                await self.sio.emit(event='game_update', data=packed, room=f"game_{game_id}:{UPDATE_FORMAT_MSGPACK}")
+                if game_id in self.interest_filters or UPDATE_FORMAT_JSON in self.update_formats.get(game_id, {}).values():
+                    await self._emit_json_update(game_id=game_id, game_state=game_state)
+            else:
+                await self._emit_json_update(game_id=game_id, game_state=game_state)
+            update_log = self.update_logs.get(game_id)
+            if update_log is not None:
+                update_log.add_update(game_state)
             cached_game_id = await game_cache.get_instance(game_id=game_id)
             if not cached_game_id:
                 logger.error(f"Game id: {game_id} wasn't found in cache")
         except Exception as e:
             logger.error(f"Error in handle_game_update: {e}", exc_info=True)
     
+    async def _emit_json_update(self, game_id: str, game_state: Dict[str, Any]) -> None:
+        """
+        Разослать обновление JSON-клиентам игры. Карту целиком (смена уровня) клиентам этого инстанса,
+        запросившим другую кодировку, перекодируем и отправляем отдельно. В играх с областью интереса
+        каждый клиент получает своё отфильтрованное обновление.
+        """
+        map_data = game_state.get('map')
+        interest_filter = self.interest_filters.get(game_id)
+        if interest_filter is not None:
+            interest_filter.apply(update=game_state)
+            for sid in list(interest_filter.viewers):
+                data = interest_filter.filter(sid=sid, update=game_state)
+                if map_data:
+                    data["map"] = transcode_map(map_data, self.map_encodings.get(sid, MAP_ENCODING_LIST))
+                await self.sio.emit(event='game_update', data=data, to=sid)
+            return
+
+        room = f"game_{game_id}:{UPDATE_FORMAT_JSON}"
+        if not map_data:
+            await self.sio.emit(event='game_update', data=game_state, room=room)
+            return
+
+        source_encoding = get_map_encoding(map_data)
+        transcoded: dict[str, list[str]] = {}
+        for sid, update_format in self.update_formats.get(game_id, {}).items():
+            encoding = self.map_encodings.get(sid, MAP_ENCODING_LIST)
+            if update_format == UPDATE_FORMAT_JSON and encoding != source_encoding:
+                transcoded.setdefault(encoding, []).append(sid)
+
+        skip_sids = [sid for sids in transcoded.values() for sid in sids]
+        await self.sio.emit(event='game_update', data=game_state, room=room, skip_sid=skip_sids or None)
+        for encoding, sids in transcoded.items():
+            data = {**game_state, "map": transcode_map(map_data, encoding)}
+            for sid in sids:
+                await self.sio.emit(event='game_update', data=data, to=sid)
+
+    @staticmethod
+    def _get_requested_map_encoding(data: Dict[str, Any], default: str | None = None) -> str:
+        """Кодировка карты из запроса клиента; неизвестная заменяется вложенным списком"""
+        encoding = data.get('map_encoding') or default or MAP_ENCODING_LIST
+        return encoding if encoding in MAP_ENCODINGS else MAP_ENCODING_LIST
+
+    async def handle_game_keyframe(self, game_id: str, keyframe: Dict[str, Any]) -> None:
+        """Handle game state keyframe from game service (kept for resync_game, not sent to clients)"""
+        try:
+            decoder = self.update_decoders.get(game_id)
+            if decoder is not None:
+                decoder.merge_table(keyframe.get('entity_handles'))
+            self.update_logs.setdefault(game_id, GameUpdateLog()).add_keyframe(keyframe)
+            if keyframe.get('interest_radius'):
+                self.interest_filters.setdefault(
+                    game_id, GameInterestFilter(radius=keyframe['interest_radius'])
+                ).add_keyframe(keyframe)
+        except Exception as e:
+            logger.error(f"Error in handle_game_keyframe: {e}", exc_info=True)
+
     async def handle_game_over(self, game_id: str) -> None:
         """Handle game over notification from game service"""
         try:
             logger.info(f"Handling game_over event for {game_id}")
             await self.sio.emit('game_over', {}, room=f"game_{game_id}")
+            self.update_decoders.pop(game_id, None)
+            self.update_formats.pop(game_id, None)
+            self.update_logs.pop(game_id, None)
+            self.interest_filters.pop(game_id, None)
             self.sio.decrement_games()
         except Exception as e:
             logger.error(f"Error in handle_game_over: {e}", exc_info=True)
@@ -0,0 +1,122 @@
+import base64
+import logging
+import zlib
+from array import array
+from itertools import groupby
+from typing import Any
+
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+
+# Форматы обновлений игры, которые клиент может запросить при join_game
+UPDATE_FORMAT_JSON: str = "json"
+UPDATE_FORMAT_MSGPACK: str = "msgpack"
+# Заголовок Content-Type бинарных обновлений game.update.* от game-service
+MSGPACK_CONTENT_TYPE: str = "application/msgpack"
+
+# Кодировки карты (MapData.encoding), которые клиент может запросить при join_game / get_game_state.
+# list - вложенный список grid, остальные записывают ячейки построчно в data:
+# rle - пары [значение, длина серии], base64 - буфер int8, zlib - буфер int8, сжатый zlib, в base64
+MAP_ENCODING_LIST: str = "list"
+MAP_ENCODING_RLE: str = "rle"
+MAP_ENCODING_BASE64: str = "base64"
+MAP_ENCODING_ZLIB: str = "zlib"
+MAP_ENCODINGS: tuple[str, ...] = (MAP_ENCODING_LIST, MAP_ENCODING_RLE, MAP_ENCODING_BASE64, MAP_ENCODING_ZLIB)
+
+# (ключ изменений, ключ удалённых, поле идентификатора в словаре изменений)
+ENTITY_KINDS: tuple[tuple[str, str, str], ...] = (
+    ("players_update", "players_removed", "player_id"),
+    ("enemies_update", "enemies_removed", "entity_id"),
+    ("weapons_update", "weapons_removed", "entity_id"),
+    ("power_ups_update", "power_ups_removed", "entity_id"),
+)
+
+
+class GameUpdateDecoder:
+    """
+    Таблица хэндлов сущностей одной игры и перевод бинарных обновлений в JSON-формат GameUpdateEvent.
+
+    Таблица пополняется id, которые приходят вместе с новыми хэндлами, и из ответов game-service
+    на join/get_state; хэндлы удалённых сущностей из неё убираются.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[int, str] = {}
+
+    def merge_table(self, table: dict[str, str] | None) -> None:
+        """Добавить хэндлы из таблицы game-service (уже известные хэндлы не перезаписываются)"""
+        if not table:
+            return
+        for handle, entity_id in table.items():
+            self.ids.setdefault(int(handle), entity_id)
+
+    def table(self) -> dict[str, str]:
+        return {str(handle): entity_id for handle, entity_id in self.ids.items()}
+
+    def decode(self, payload: bytes) -> dict[str, Any]:
+        """Распаковать обновление и заменить хэндлы на id сущностей"""
+        data = msgpack.unpackb(payload, strict_map_key=False)
+        ids = self.ids
+        for update_key, removed_key, id_field in ENTITY_KINDS:
+            updates = data.get(update_key)
+            if updates:
+                translated: dict[str, dict] = {}
+                for handle, fields in updates.items():
+                    entity_id = fields.get(id_field)
+                    if entity_id is None:
+                        entity_id = ids.get(handle)
+                        if entity_id is None:
+                            logger.debug(f"Unknown entity handle {handle} in {update_key}")
+                            continue
+                        fields[id_field] = entity_id
+                    else:
+                        ids[handle] = entity_id
+                    translated[entity_id] = fields
+                data[update_key] = translated
+            removed = data.get(removed_key)
+            if removed:
+                data[removed_key] = [
+                    entity_id for entity_id in (ids.pop(handle, None) for handle in removed)
+                    if entity_id is not None
+                ]
+        entity_cells = data.get("entity_cells")
+        if entity_cells:
+            data["entity_cells"] = {ids[handle]: cell for handle, cell in entity_cells.items() if handle in ids}
+        return data
+
+
+def get_map_encoding(map_data: dict[str, Any]) -> str:
+    return map_data.get("encoding") or MAP_ENCODING_LIST
+
+
+def transcode_map(map_data: dict[str, Any], encoding: str) -> dict[str, Any]:
+    """Перевести MapData из кодировки game-service в кодировку, согласованную с клиентом"""
+    source = get_map_encoding(map_data)
+    if source == encoding or not map_data.get("width"):
+        return map_data
+    width = map_data["width"]
+    encoded = map_data.get("data")
+    if source == MAP_ENCODING_RLE:
+        cells = array("b")
+        for index in range(0, len(encoded), 2):
+            cells.extend([encoded[index]] * encoded[index + 1])
+    elif source == MAP_ENCODING_BASE64:
+        cells = array("b", base64.b64decode(encoded))
+    elif source == MAP_ENCODING_ZLIB:
+        cells = array("b", zlib.decompress(base64.b64decode(encoded)))
+    else:
+        cells = array("b", [cell for row in map_data["grid"] for cell in row])
+
+    result = {**map_data, "grid": None, "encoding": encoding, "data": None}
+    if encoding == MAP_ENCODING_RLE:
+        result["data"] = [item for value, run in groupby(cells) for item in (value, len(list(run)))]
+    elif encoding == MAP_ENCODING_BASE64:
+        result["data"] = base64.b64encode(cells.tobytes()).decode("ascii")
+    elif encoding == MAP_ENCODING_ZLIB:
+        result["data"] = base64.b64encode(zlib.compress(cells.tobytes())).decode("ascii")
+    else:
+        result["grid"] = [cells[start:start + width].tolist() for start in range(0, len(cells), width)]
+        result["encoding"] = None
+    return result
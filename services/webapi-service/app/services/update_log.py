@@ -0,0 +1,58 @@
+import logging
+from collections import deque
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+# Предел хвоста обновлений после keyframe (на случай, если снимки перестали приходить)
+MAX_TAIL_UPDATES: int = 1000
+
+
+class GameUpdateLog:
+    """
+    Последний keyframe игры (game.keyframe.*) и опубликованные после него обновления.
+
+    Клиент, заметивший пропуск в номерах seq или только присоединившийся, восстанавливает состояние
+    по хвосту обновлений после своего seq либо по keyframe и хвосту после него, без запроса get_state
+    в game-service.
+    """
+
+    def __init__(self) -> None:
+        self.keyframe: dict[str, Any] | None = None
+        self.updates: deque[dict[str, Any]] = deque(maxlen=MAX_TAIL_UPDATES)
+
+    def add_keyframe(self, keyframe: dict[str, Any]) -> None:
+        """Запомнить снимок; обновления, которые он уже учитывает, больше не нужны"""
+        self.keyframe = keyframe
+        seq = keyframe.get("seq", 0)
+        while self.updates and self.updates[0]["seq"] <= seq:
+            self.updates.popleft()
+
+    def add_update(self, update: dict[str, Any]) -> None:
+        seq = update.get("seq")
+        if seq is None or (self.keyframe is not None and seq <= self.keyframe.get("seq", 0)):
+            return
+        if self.updates and seq != self.updates[-1]["seq"] + 1:
+            # Пропуск на стороне webapi: хвост до него бесполезен, клиенты восстановятся со следующего keyframe
+            logger.debug(f"Gap in game update log: {self.updates[-1]['seq']} -> {seq}")
+            self.updates.clear()
+        self.updates.append(update)
+
+    def resync(self, from_seq: int | None) -> dict[str, Any] | None:
+        """
+        Данные для восстановления клиента, применившего обновление from_seq (None - состояния нет):
+        {"keyframe": снимок или None, "updates": [...]}. None, если восстановить нельзя.
+        """
+        updates = self.updates
+        if from_seq is not None:
+            last_seq = updates[-1]["seq"] if updates else (self.keyframe or {}).get("seq")
+            if last_seq is not None and from_seq >= last_seq:
+                return {"keyframe": None, "updates": []}
+            if updates and updates[0]["seq"] <= from_seq + 1:
+                return {"keyframe": None, "updates": [update for update in updates if update["seq"] > from_seq]}
+        if self.keyframe is None:
+            return None
+        if updates and updates[0]["seq"] != self.keyframe["seq"] + 1:
+            return None
+        return {"keyframe": self.keyframe, "updates": list(updates)}
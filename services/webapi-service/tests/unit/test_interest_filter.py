@@ -0,0 +1,124 @@
+from app.services.interest_filter import GameInterestFilter
+
+
+def make_keyframe() -> dict:
+    return {
+        "game_id": "g1",
+        "seq": 10,
+        "players": {
+            "p1": {"player_id": "p1", "x": 40, "y": 40, "lives": 3},
+            "p2": {"player_id": "p2", "x": 400, "y": 400, "lives": 3},
+        },
+        "enemies": {"e1": {"entity_id": "e1", "x": 200, "y": 200, "lives": 1}},
+        "entity_cells": {"p1": [1, 1], "p2": [10, 10], "e1": [5, 5]},
+    }
+
+
+def make_filter() -> GameInterestFilter:
+    interest_filter = GameInterestFilter(radius=2)
+    interest_filter.add_keyframe(make_keyframe())
+    interest_filter.add_viewer(sid="s1", player_id="p1")
+    interest_filter.add_viewer(sid="s2", player_id="p2")
+    return interest_filter
+
+
+def send(interest_filter: GameInterestFilter, update: dict) -> dict[str, dict]:
+    interest_filter.apply(update=update)
+    return {sid: interest_filter.filter(sid=sid, update=update) for sid in interest_filter.viewers}
+
+
+def test_entities_outside_radius_are_removed_after_full_state() -> None:
+    interest_filter = make_filter()
+    sent = send(interest_filter, {"seq": 11, "time_remaining": 50.0})
+
+    # После полного состояния клиент знает всю игру: всё за пределами радиуса убирается
+    assert sent["s1"]["players_removed"] == ["p2"] and sent["s1"]["enemies_removed"] == ["e1"]
+    assert sent["s2"]["players_removed"] == ["p1"] and sent["s2"]["enemies_removed"] == ["e1"]
+    assert sent["s1"]["time_remaining"] == 50.0
+    assert "entity_cells" not in sent["s1"]
+
+
+def test_entity_entering_radius_is_sent_whole_and_leaving_is_removed() -> None:
+    interest_filter = make_filter()
+    send(interest_filter, {"seq": 11})
+
+    sent = send(interest_filter, {
+        "seq": 12,
+        "enemies_update": {"e1": {"entity_id": "e1", "x": 80}},
+        "entity_cells": {"e1": [2, 2]},
+    })
+    assert sent["s1"]["enemies_update"] == {"e1": {"entity_id": "e1", "x": 80, "y": 200, "lives": 1}}
+    assert sent["s2"]["enemies_update"] is None
+
+    sent = send(interest_filter, {"seq": 13, "enemies_update": {"e1": {"entity_id": "e1", "y": 80}}})
+    assert sent["s1"]["enemies_update"] == {"e1": {"entity_id": "e1", "y": 80}}
+
+    sent = send(interest_filter, {
+        "seq": 14,
+        "enemies_update": {"e1": {"entity_id": "e1", "x": 360}},
+        "entity_cells": {"e1": [9, 2]},
+    })
+    assert sent["s1"]["enemies_update"] is None and sent["s1"]["enemies_removed"] == ["e1"]
+
+
+def test_removed_entity_is_sent_only_to_clients_that_see_it() -> None:
+    interest_filter = make_filter()
+    send(interest_filter, {"seq": 11, "enemies_update": {"e1": {"entity_id": "e1"}}, "entity_cells": {"e1": [2, 2]}})
+
+    sent = send(interest_filter, {"seq": 12, "enemies_removed": ["e1"]})
+    assert sent["s1"]["enemies_removed"] == ["e1"]
+    assert sent["s2"]["enemies_removed"] is None
+
+
+def test_own_player_is_always_sent() -> None:
+    interest_filter = make_filter()
+    send(interest_filter, {"seq": 11})
+
+    sent = send(interest_filter, {
+        "seq": 12,
+        "players_update": {"p1": {"player_id": "p1", "lives": 2}, "p2": {"player_id": "p2", "lives": 2}},
+    })
+    assert sent["s1"]["players_update"] == {"p1": {"player_id": "p1", "lives": 2}}
+    assert sent["s2"]["players_update"] == {"p2": {"player_id": "p2", "lives": 2}}
+
+
+def test_viewer_moving_brings_unchanged_entities_into_view() -> None:
+    interest_filter = make_filter()
+    send(interest_filter, {"seq": 11})
+
+    sent = send(interest_filter, {
+        "seq": 12,
+        "players_update": {"p1": {"player_id": "p1", "x": 160, "y": 160}},
+        "entity_cells": {"p1": [4, 4]},
+    })
+    assert sent["s1"]["players_update"]["p1"] == {"player_id": "p1", "x": 160, "y": 160}
+    assert sent["s1"]["enemies_update"] == {"e1": {"entity_id": "e1", "x": 200, "y": 200, "lives": 1}}
+
+
+def test_viewer_without_player_on_map_sees_whole_game() -> None:
+    interest_filter = make_filter()
+    interest_filter.add_viewer(sid="s3", player_id="p3")
+
+    sent = send(interest_filter, {"seq": 11, "enemies_update": {"e1": {"entity_id": "e1", "x": 240}}})
+    assert sent["s3"]["enemies_update"] == {"e1": {"entity_id": "e1", "x": 240}}
+    assert sent["s3"]["players_removed"] is None
+
+
+def test_updates_are_not_filtered_before_first_keyframe() -> None:
+    interest_filter = GameInterestFilter(radius=2)
+    interest_filter.add_viewer(sid="s1", player_id="p1")
+    update = {
+        "seq": 5,
+        "players_update": {"p1": {"player_id": "p1", "x": 40}},
+        "enemies_update": {"e1": {"entity_id": "e1", "x": 200}},
+        "entity_cells": {"p1": [1, 1], "e1": [5, 5]},
+    }
+
+    sent = send(interest_filter, update)
+    # Частичную копию из одних изменений фильтр не строит и отдаёт обновление как есть
+    assert sent["s1"] == {key: value for key, value in update.items() if key != "entity_cells"}
+    assert interest_filter.entities["enemies_update"] == {}
+
+    interest_filter.add_keyframe(make_keyframe())
+    sent = send(interest_filter, {"seq": 11})
+    assert sent["s1"]["enemies_removed"] == ["e1"]
@@ -0,0 +1,93 @@
+import msgpack
+import pytest
+
+from app.services.update_codec import (
+    MAP_ENCODING_BASE64,
+    MAP_ENCODING_LIST,
+    MAP_ENCODING_RLE,
+    MAP_ENCODING_ZLIB,
+    MAP_ENCODINGS,
+    GameUpdateDecoder,
+    transcode_map,
+)
+
+
+def pack(update: dict) -> bytes:
+    return msgpack.packb(update)
+
+
+def test_new_handles_are_announced_with_ids() -> None:
+    decoder = GameUpdateDecoder()
+    update = decoder.decode(pack({
+        "seq": 1,
+        "players_update": {1: {"player_id": "p1", "x": 10}},
+        "enemies_update": {2: {"entity_id": "e1", "x": 3}},
+        "entity_cells": {1: [0, 0], 2: [3, 4]},
+    }))
+
+    assert update["players_update"] == {"p1": {"player_id": "p1", "x": 10}}
+    assert update["enemies_update"] == {"e1": {"entity_id": "e1", "x": 3}}
+    assert update["entity_cells"] == {"p1": [0, 0], "e1": [3, 4]}
+    assert decoder.table() == {"1": "p1", "2": "e1"}
+
+    # Дальше сущности приходят только по хэндлу
+    update = decoder.decode(pack({"seq": 2, "enemies_update": {2: {"y": 7}}}))
+    assert update["enemies_update"] == {"e1": {"y": 7, "entity_id": "e1"}}
+
+
+def test_removed_handles_are_translated_and_forgotten() -> None:
+    decoder = GameUpdateDecoder()
+    decoder.decode(pack({"seq": 1, "weapons_update": {5: {"entity_id": "w1", "x": 1}}}))
+
+    update = decoder.decode(pack({"seq": 2, "weapons_removed": [5, 6]}))
+    assert update["weapons_removed"] == ["w1"]
+    assert decoder.ids == {}
+
+
+def test_handle_used_before_announcement_is_dropped_until_table_is_merged() -> None:
+    decoder = GameUpdateDecoder()
+    update = decoder.decode(pack({"seq": 3, "enemies_update": {4: {"x": 1}}, "entity_cells": {4: [1, 1]}}))
+    assert update["enemies_update"] == {}
+    assert update["entity_cells"] == {}
+
+    # Таблица из ответа game-service (join_game / get_state) не перезаписывает известные хэндлы
+    decoder.merge_table({"4": "e4", "2": "e2"})
+    decoder.merge_table({"4": "other"})
+    update = decoder.decode(pack({"seq": 4, "enemies_update": {4: {"x": 2}}}))
+    assert update["enemies_update"] == {"e4": {"x": 2, "entity_id": "e4"}}
+    assert decoder.table() == {"4": "e4", "2": "e2"}
+
+
+def test_update_without_entities_is_unchanged() -> None:
+    decoder = GameUpdateDecoder()
+    update = decoder.decode(pack({"seq": 1, "tick": 5, "time_remaining": 12.5, "map_update": [[1, 2, 0]]}))
+    assert update == {"seq": 1, "tick": 5, "time_remaining": 12.5, "map_update": [[1, 2, 0]]}
+
+
+GRID = [
+    [1, 1, 1, 1, 1],
+    [1, 0, 0, 2, 1],
+    [1, 1, 1, 1, 1],
+]
+
+
+@pytest.mark.parametrize("source", MAP_ENCODINGS)
+@pytest.mark.parametrize("target", MAP_ENCODINGS)
+def test_map_transcoding_preserves_cells(source: str, target: str) -> None:
+    map_data = {"width": 5, "height": 3, "grid": GRID}
+    encoded = transcode_map(map_data=map_data, encoding=source)
+    assert encoded.get("encoding") == (None if source == MAP_ENCODING_LIST else source)
+
+    decoded = transcode_map(map_data=transcode_map(map_data=encoded, encoding=target), encoding=MAP_ENCODING_LIST)
+    assert decoded["grid"] == GRID
+    assert decoded.get("data") is None
+
+
+def test_map_encodings_match_client_format() -> None:
+    map_data = {"width": 5, "height": 3, "grid": GRID}
+    assert transcode_map(map_data=map_data, encoding=MAP_ENCODING_RLE)["data"] == [1, 6, 0, 2, 2, 1, 1, 6]
+    base64_data = transcode_map(map_data=map_data, encoding=MAP_ENCODING_BASE64)["data"]
+    zlib_data = transcode_map(map_data=map_data, encoding=MAP_ENCODING_ZLIB)["data"]
+    assert isinstance(base64_data, str) and isinstance(zlib_data, str)
+    # Карта без размеров (пустая) не перекодируется
+    assert transcode_map(map_data={"width": 0, "grid": []}, encoding=MAP_ENCODING_RLE) == {"width": 0, "grid": []}
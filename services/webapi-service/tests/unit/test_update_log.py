@@ -0,0 +1,75 @@
+from app.services.update_log import GameUpdateLog
+
+
+def make_update(seq: int) -> dict:
+    return {"game_id": "g1", "seq": seq, "tick": seq}
+
+
+def make_log(keyframe_seq: int, update_seqs: range) -> GameUpdateLog:
+    log = GameUpdateLog()
+    log.add_keyframe({"game_id": "g1", "seq": keyframe_seq})
+    for seq in update_seqs:
+        log.add_update(make_update(seq))
+    return log
+
+
+def seqs(resync: dict) -> list[int]:
+    return [update["seq"] for update in resync["updates"]]
+
+
+def test_client_resyncs_from_tail_after_its_seq() -> None:
+    log = make_log(keyframe_seq=10, update_seqs=range(11, 16))
+
+    resync = log.resync(from_seq=12)
+    assert resync["keyframe"] is None and seqs(resync) == [13, 14, 15]
+    assert log.resync(from_seq=15) == {"keyframe": None, "updates": []}
+
+    resync = log.resync(from_seq=None)
+    assert resync["keyframe"]["seq"] == 10 and seqs(resync) == list(range(11, 16))
+
+
+def test_gap_inside_tail_drops_updates_before_it() -> None:
+    log = make_log(keyframe_seq=10, update_seqs=range(11, 14))
+    log.add_update(make_update(15))
+    log.add_update(make_update(16))
+
+    # Клиент после пропуска восстанавливается по хвосту
+    resync = log.resync(from_seq=14)
+    assert resync["keyframe"] is None and seqs(resync) == [15, 16]
+    # До пропуска хвост потерян, а keyframe без 11..14 недостаточен
+    assert log.resync(from_seq=12) is None
+    assert log.resync(from_seq=None) is None
+
+    # Следующий keyframe снова позволяет восстановиться
+    log.add_keyframe({"game_id": "g1", "seq": 16})
+    resync = log.resync(from_seq=12)
+    assert resync["keyframe"]["seq"] == 16 and resync["updates"] == []
+
+
+def test_client_older_than_keyframe_gets_keyframe_and_tail() -> None:
+    log = make_log(keyframe_seq=10, update_seqs=range(11, 13))
+    # Обновления, уже учтённые в keyframe, не попадают в хвост
+    log.add_update(make_update(9))
+    log.add_update(make_update(10))
+
+    resync = log.resync(from_seq=3)
+    assert resync["keyframe"]["seq"] == 10 and seqs(resync) == [11, 12]
+
+
+def test_new_keyframe_replaces_old_one_and_trims_tail() -> None:
+    log = make_log(keyframe_seq=10, update_seqs=range(11, 16))
+    log.add_keyframe({"game_id": "g1", "seq": 13})
+
+    assert [update["seq"] for update in log.updates] == [14, 15]
+    resync = log.resync(from_seq=None)
+    assert resync["keyframe"]["seq"] == 13 and seqs(resync) == [14, 15]
+    resync = log.resync(from_seq=11)
+    assert resync["keyframe"]["seq"] == 13 and seqs(resync) == [14, 15]
+
+
+def test_no_keyframe_and_no_tail_cannot_resync() -> None:
+    log = GameUpdateLog()
+    assert log.resync(from_seq=None) is None
+    log.add_update(make_update(5))
+    assert log.resync(from_seq=2) is None
+    assert seqs(log.resync(from_seq=4)) == [5]